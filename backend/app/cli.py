@@ -0,0 +1,241 @@
+"""
+Command-line tools for the backend.
+
+    python -m app.cli convert [--to tflite onnx] [--samples DIR]
+    python -m app.cli quantize [--variants int8 fp16] [--calibration DIR] [--samples DIR]
+    python -m app.cli sort SRC DST [--strategy auto] [--batch-size 32] [--no-resume]
+
+Run from backend/ (same as uvicorn / pytest).
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional
+
+from app.config import MODEL_EXTENSIONS, settings
+
+
+def _default_keras_path() -> Path:
+    if settings.model_path.suffix == ".keras":
+        return settings.model_path
+    return settings.repo_root / "model" / "exported" / "best_finetuned_model.keras"
+
+
+def _convert(args: argparse.Namespace) -> int:
+    from app.services.model_backends import KerasBackend, load_backend
+    from app.services.model_export import compare_backends, export_onnx, export_tflite, load_keras_model, sample_batch
+
+    keras_path: Path = args.model
+    if not keras_path.exists():
+        print(f"Model file not found at: {keras_path}", file=sys.stderr)
+        return 2
+
+    out_dir: Path = args.out_dir or keras_path.parent
+    keras_model = load_keras_model(keras_path)
+    reference = KerasBackend(keras_path, model=keras_model)
+
+    batch = sample_batch(args.samples, args.count)
+    exporters = {"tflite": export_tflite, "onnx": export_onnx}
+    failed = False
+
+    for target in args.to:
+        out_path = out_dir / f"{keras_path.stem}{MODEL_EXTENSIONS[target]}"
+
+        try:
+            exporters[target](keras_model, out_path)
+        except ImportError as e:
+            print(f"[{target}] skipped: converter not installed ({e})", file=sys.stderr)
+            failed = True
+            continue
+
+        report = compare_backends(reference, load_backend(target, out_path), batch)
+        ok = report.top1_agreement >= args.min_agreement
+        failed = failed or not ok
+
+        print(
+            f"[{target}] {out_path} ({out_path.stat().st_size / 1e6:.1f} MB): "
+            f"top-1 agreement {report.top1_agreement:.2%} on {report.samples} samples, "
+            f"max |dp| {report.max_abs_diff:.2e} -> {'OK' if ok else 'FAILED'}"
+        )
+
+    return 1 if failed else 0
+
+
+def _quantize(args: argparse.Namespace) -> int:
+    from app.services.inference import _load_class_names
+    from app.services.model_backends import KerasBackend, load_backend
+    from app.services.model_export import (
+        evaluate_variant,
+        export_tflite,
+        load_keras_model,
+        quantization_hook,
+        sample_batch,
+        sample_labels,
+        variant_path,
+    )
+
+    keras_path: Path = args.model
+    if not keras_path.exists():
+        print(f"Model file not found at: {keras_path}", file=sys.stderr)
+        return 2
+
+    out_dir: Path = args.out_dir or keras_path.parent
+    keras_model = load_keras_model(keras_path)
+    reference = KerasBackend(keras_path, model=keras_model)
+
+    if args.calibration is None:
+        print("No --calibration set: calibrating on random inputs (int8 accuracy will suffer).", file=sys.stderr)
+    calibration = sample_batch(args.calibration, args.calibration_count, seed=1)
+
+    batch = sample_batch(args.samples, args.count)
+    labels = sample_labels(args.samples, args.count, _load_class_names())
+
+    reports = []
+    failed = False
+
+    for variant in args.variants:
+        out_path = out_dir / variant_path(keras_path, variant).name
+        export_tflite(keras_model, out_path, converter_hook=quantization_hook(variant, calibration))
+
+        report = evaluate_variant(variant, reference, load_backend("tflite", out_path), batch, labels)
+        reports.append(report)
+
+        if report.accuracy_delta is not None:
+            ok = -report.accuracy_delta <= args.max_accuracy_drop
+            quality = (
+                f"accuracy {report.accuracy:.2%} vs float {report.reference_accuracy:.2%} "
+                f"on {report.labelled} labelled samples"
+            )
+        else:
+            ok = report.top1_agreement >= 1.0 - args.max_accuracy_drop
+            quality = f"top-1 agreement {report.top1_agreement:.2%} on {report.samples} unlabelled samples"
+
+        failed = failed or not ok
+        print(f"[{variant}] {out_path} ({report.size_bytes / 1e6:.1f} MB): {quality} -> {'OK' if ok else 'FAILED'}")
+
+    report_path = out_dir / "quantization_report.json"
+    report_path.write_text(
+        json.dumps([{**asdict(r), "model_path": str(r.model_path)} for r in reports], indent=2),
+        encoding="utf-8",
+    )
+    print(f"Report written to {report_path}")
+
+    return 1 if failed else 0
+
+
+def _sort(args: argparse.Namespace) -> int:
+    from fastapi import HTTPException
+
+    from app.services.bulk_sort import SORT_MANIFEST_NAME, SortStats, sort_directory
+    from app.services.executors import shutdown_executors
+    from app.services.inference_pool import shutdown_inference_pool
+
+    if not args.src.is_dir():
+        print(f"Source folder not found: {args.src}", file=sys.stderr)
+        return 2
+
+    def progress(stats: SortStats) -> None:
+        print(
+            f"\r{stats.sorted} sorted, {stats.failed} failed, {stats.images_per_s:.1f} images/s",
+            end="", file=sys.stderr, flush=True,
+        )
+
+    try:
+        stats = sort_directory(
+            args.src,
+            args.dst,
+            batch_size=args.batch_size,
+            strategy=args.strategy,
+            unsure_threshold=args.unsure_threshold,
+            resume=not args.no_resume,
+            on_batch=progress,
+        )
+    except HTTPException as e:
+        print(f"\n{e.detail}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("\nInterrupted - run the same command again to resume.", file=sys.stderr)
+        return 130
+    finally:
+        shutdown_inference_pool()
+        shutdown_executors()
+
+    print(file=sys.stderr)
+    if stats.resumed_from:
+        print(f"Resumed after {stats.resumed_from}")
+    print(
+        f"Sorted {stats.sorted} images ({stats.failed} failed) into {args.dst} "
+        f"in {stats.seconds:.1f}s - {stats.images_per_s:.1f} images/s"
+    )
+    print(f"Manifest: {args.dst / SORT_MANIFEST_NAME}")
+
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="scene-sorter", description="Scene Sorter backend tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser(
+        "convert",
+        help="Export the Keras model to TFLite / ONNX and verify top-1 agreement.",
+    )
+    convert.add_argument("--model", type=Path, default=None, help="Source .keras model (default: the configured model path).")
+    convert.add_argument("--to", nargs="+", choices=("tflite", "onnx"), default=["tflite"], help="Formats to export.")
+    convert.add_argument("--out-dir", type=Path, default=None, help="Where to write the exports (default: next to the model).")
+    convert.add_argument("--samples", type=Path, default=None, help="Folder of sample images for the agreement check.")
+    convert.add_argument("--count", type=int, default=64, help="Max samples to compare (random inputs without --samples).")
+    convert.add_argument("--min-agreement", type=float, default=0.99, help="Fail if top-1 agreement is below this.")
+    convert.set_defaults(func=_convert)
+
+    quantize = sub.add_parser(
+        "quantize",
+        help="Build post-training quantized TFLite variants and gate them on accuracy.",
+    )
+    quantize.add_argument("--model", type=Path, default=None, help="Source .keras model (default: the configured model path).")
+    quantize.add_argument("--variants", nargs="+", choices=("int8", "fp16"), default=["int8"], help="Variants to build.")
+    quantize.add_argument("--out-dir", type=Path, default=None, help="Where to write the variants (default: next to the model).")
+    quantize.add_argument("--calibration", type=Path, default=None, help="Folder of representative images for int8 calibration.")
+    quantize.add_argument("--calibration-count", type=int, default=200, help="Max calibration images.")
+    quantize.add_argument(
+        "--samples", type=Path, default=None,
+        help="Evaluation images; put them in <class>/ folders (labels.json names) to measure accuracy.",
+    )
+    quantize.add_argument("--count", type=int, default=500, help="Max evaluation samples.")
+    quantize.add_argument(
+        "--max-accuracy-drop", type=float, default=0.01,
+        help="Fail if accuracy (or top-1 agreement, without labels) drops by more than this.",
+    )
+    quantize.set_defaults(func=_quantize)
+
+    sort = sub.add_parser(
+        "sort",
+        help="Sort a local folder tree of photos into class folders (resumable).",
+    )
+    sort.add_argument("src", type=Path, help="Folder to read images from (walked recursively).")
+    sort.add_argument("dst", type=Path, help="Folder to create <class>/ folders in.")
+    sort.add_argument(
+        "--strategy", choices=("auto", "hardlink", "reflink", "copy"), default=None,
+        help="How to place files (default: SCENE_SORTER_ORGANIZE_STRATEGY).",
+    )
+    sort.add_argument("--batch-size", type=int, default=None, help="Images per forward pass (default: inference max batch size).")
+    sort.add_argument("--unsure-threshold", type=float, default=None, help="File images below this confidence under unsure/.")
+    sort.add_argument("--no-resume", action="store_true", help="Ignore the checkpoint in DST and start over.")
+    sort.set_defaults(func=_sort)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if getattr(args, "model", "unset") is None:
+        args.model = _default_keras_path()
+
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
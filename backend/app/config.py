@@ -14,6 +14,21 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+def _env_str(name: str, default: str) -> str:
+    raw = os.getenv(name, "").strip().lower()
+    return raw or default
+
+
 def _env_bool(name: str, default: bool = False) -> bool:
     raw = os.getenv(name, "").strip().lower()
     if not raw:
@@ -21,6 +36,14 @@ def _env_bool(name: str, default: bool = False) -> bool:
     return raw in {"1", "true", "yes", "y", "on"}
 
 
+# Model artifact next to best_finetuned_model.keras for each file-based backend
+MODEL_EXTENSIONS = {
+    "keras": ".keras",
+    "tflite": ".tflite",
+    "onnx": ".onnx",
+}
+
+
 @dataclass(frozen=True)
 class Settings:
     # API meta
@@ -32,10 +55,91 @@ class Settings:
 
     # Batch limits
     MAX_FILES_PER_BATCH: int = _env_int("SCENE_SORTER_MAX_FILES_PER_BATCH", 50)
+    # Upload sessions (/sessions): files per session, appended in chunks of MAX_FILES_PER_BATCH
+    SESSION_MAX_FILES: int = _env_int("SCENE_SORTER_SESSION_MAX_FILES", 10000)
+    # Open sessions with no upload for this long are expired (0 = never)
+    SESSION_IDLE_TTL_S: int = _env_int("SCENE_SORTER_SESSION_IDLE_TTL_S", 1800)
     MAX_FILE_SIZE_MB: int = _env_int("SCENE_SORTER_MAX_FILE_SIZE_MB", 10)
 
+    # Inference runtime: "keras", "tflite" or "onnx" (see `python -m app.cli convert`)
+    MODEL_BACKEND: str = _env_str("SCENE_SORTER_MODEL_BACKEND", "keras")
+    # Model variant: "fp32" (default), or a quantized TFLite export "fp16" / "int8"
+    # (see `python -m app.cli quantize`) -> best_finetuned_model_<variant>.tflite
+    MODEL_VARIANT: str = _env_str("SCENE_SORTER_MODEL_VARIANT", "fp32")
+    # Intra-op threads for the tflite / onnx runtimes (0 = all cores)
+    MODEL_NUM_THREADS: int = _env_int("SCENE_SORTER_MODEL_NUM_THREADS", 0)
+    # MODEL_BACKEND=stub: no model file, deterministic NumPy outputs (tests, I/O benchmarks).
+    # Latency per forward pass + per image; outputs "onehot" | "softmax" | "uniform"
+    STUB_LATENCY_MS: float = _env_float("SCENE_SORTER_STUB_LATENCY_MS", 0.0)
+    STUB_LATENCY_PER_IMAGE_MS: float = _env_float("SCENE_SORTER_STUB_LATENCY_PER_IMAGE_MS", 0.0)
+    STUB_DISTRIBUTION: str = _env_str("SCENE_SORTER_STUB_DISTRIBUTION", "onehot")
+
     # Image preprocessing (must match training)
     IMAGE_SIZE: Tuple[int, int] = (224, 224)
+    # Idle model-input buffers kept per batch size for reuse (0 = always allocate)
+    PREPROCESS_BUFFER_POOL: int = _env_int("SCENE_SORTER_PREPROCESS_BUFFER_POOL", 2)
+
+    # Images whose top-1 confidence is below this go to unsure/ instead of
+    # their class folder (0 = off; overridable per request)
+    UNSURE_THRESHOLD: float = _env_float("SCENE_SORTER_UNSURE_THRESHOLD", 0.0)
+
+    # Organize step: how files get from raw/ into organized/<class>/
+    # "auto" (hardlink -> reflink -> copy), "hardlink", "reflink" or "copy"
+    ORGANIZE_STRATEGY: str = _env_str("SCENE_SORTER_ORGANIZE_STRATEGY", "auto")
+    # False = skip organized/ entirely and zip straight from raw/ with class-prefixed names
+    ORGANIZE_MATERIALIZE: bool = _env_bool("SCENE_SORTER_ORGANIZE_MATERIALIZE", True)
+
+    # Zip output: "disk" builds the zip inside /predict/batch,
+    # "stream" generates it on the fly in /download/{job_id}
+    ZIP_MODE: str = _env_str("SCENE_SORTER_ZIP_MODE", "disk")
+    # Per-entry compression: "auto" (store already-compressed images, deflate the rest),
+    # "store" or "deflate"
+    ZIP_COMPRESSION: str = _env_str("SCENE_SORTER_ZIP_COMPRESSION", "auto")
+    ZIP_DEFLATE_LEVEL: int = _env_int("SCENE_SORTER_ZIP_DEFLATE_LEVEL", 6)
+    # Threads preparing (reading + compressing) entries in parallel (0 = pick from CPU count)
+    ZIP_WORKERS: int = _env_int("SCENE_SORTER_ZIP_WORKERS", 0)
+
+    # Background jobs (/predict/batch?mode=async): "memory" (this process) or
+    # "sqlite" (TEMP_ROOT/jobs.sqlite3, shared by replicas on the same volume)
+    JOB_BACKEND: str = _env_str("SCENE_SORTER_JOB_BACKEND", "memory")
+    JOB_WORKERS: int = _env_int("SCENE_SORTER_JOB_WORKERS", 2)
+    JOB_POLL_INTERVAL_MS: int = _env_int("SCENE_SORTER_JOB_POLL_INTERVAL_MS", 500)
+    # A running job whose worker hasn't sent a heartbeat for this long is
+    # claimed again (sqlite backend: the replica running it died)
+    JOB_LEASE_S: int = _env_int("SCENE_SORTER_JOB_LEASE_S", 120)
+
+    # Temp workspace eviction (0 = off for each): delete job workspaces this long
+    # after creation / after their first download, and the least recently used
+    # ones while TEMP_ROOT holds more than TEMP_QUOTA_MB
+    TEMP_TTL_S: int = _env_int("SCENE_SORTER_TEMP_TTL_S", 24 * 3600)
+    TEMP_DOWNLOAD_TTL_S: int = _env_int("SCENE_SORTER_TEMP_DOWNLOAD_TTL_S", 3600)
+    TEMP_QUOTA_MB: int = _env_int("SCENE_SORTER_TEMP_QUOTA_MB", 10 * 1024)
+    JANITOR_INTERVAL_S: int = _env_int("SCENE_SORTER_JANITOR_INTERVAL_S", 60)
+    # Unrecorded workspaces (crash, failed request, restart) are adopted after this long
+    JANITOR_ORPHAN_GRACE_S: int = _env_int("SCENE_SORTER_JANITOR_ORPHAN_GRACE_S", 3600)
+
+    # Executors (0 = pick from CPU count)
+    IO_WORKERS: int = _env_int("SCENE_SORTER_IO_WORKERS", 0)
+    INFERENCE_THREADS: int = _env_int("SCENE_SORTER_INFERENCE_THREADS", 1)
+    # > 0: run the model in this many worker processes (one model each) fed
+    # through shared memory; 0 = in this process
+    INFERENCE_PROCESSES: int = _env_int("SCENE_SORTER_INFERENCE_PROCESSES", 0)
+
+    # Inference micro-batching (coalesce concurrent requests into one forward pass)
+    INFERENCE_BATCH_WINDOW_MS: int = _env_int("SCENE_SORTER_INFERENCE_BATCH_WINDOW_MS", 10)
+    INFERENCE_MAX_BATCH_SIZE: int = _env_int("SCENE_SORTER_INFERENCE_MAX_BATCH_SIZE", 32)
+    # Within one request: images per decode -> predict sub-batch, and how many
+    # decoded sub-batches may wait for the model before decoding pauses
+    INFERENCE_PIPELINE_BATCH: int = _env_int("SCENE_SORTER_INFERENCE_PIPELINE_BATCH", 8)
+    INFERENCE_PIPELINE_DEPTH: int = _env_int("SCENE_SORTER_INFERENCE_PIPELINE_DEPTH", 2)
+
+    # Prediction cache (keyed on upload bytes + model identity; 0 entries = no in-memory LRU)
+    PREDICTION_CACHE_ENTRIES: int = _env_int("SCENE_SORTER_PREDICTION_CACHE_ENTRIES", 10000)
+    PREDICTION_CACHE_PERSIST: bool = _env_bool("SCENE_SORTER_PREDICTION_CACHE_PERSIST", False)
+
+    # Per-stage timings in a Server-Timing response header (the /metrics
+    # histograms are always collected)
+    SERVER_TIMING: bool = _env_bool("SCENE_SORTER_SERVER_TIMING", True)
 
     # CORS
     @property
@@ -55,7 +159,13 @@ class Settings:
         env = os.getenv("SCENE_SORTER_MODEL_PATH")
         if env:
             return Path(env).expanduser().resolve()
-        return (self.repo_root / "model" / "exported" / "best_finetuned_model.keras")
+        # Converted artifacts sit next to the .keras file with their own extension
+        suffix = MODEL_EXTENSIONS.get(self.MODEL_BACKEND, ".keras")
+        stem = "best_finetuned_model"
+        if self.MODEL_VARIANT != "fp32":
+            # Quantized variants only exist as TFLite exports
+            stem, suffix = f"{stem}_{self.MODEL_VARIANT}", ".tflite"
+        return (self.repo_root / "model" / "exported" / f"{stem}{suffix}")
 
     @property
     def labels_path(self) -> Path:
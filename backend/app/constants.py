@@ -61,3 +61,6 @@ API_TAG_PREDICT = "predict"
 API_TAG_BATCH = "batch"
 API_TAG_DOWNLOAD = "download"
 API_TAG_HEALTH = "health"
+API_TAG_METRICS = "metrics"
+API_TAG_JOBS = "jobs"
+API_TAG_SESSIONS = "sessions"
@@ -2,13 +2,21 @@ from fastapi import FastAPI
 
 from app.config import settings
 from app.middleware.cors import setup_cors
+from app.middleware.server_timing import setup_server_timing
 
 from app.routes.health import router as health_router
 from app.routes.predict import router as predict_router
 from app.routes.batch import router as batch_router
 from app.routes.download import router as download_router
+from app.routes.metrics import router as metrics_router
+from app.routes.jobs import router as jobs_router
+from app.routes.sessions import router as sessions_router
 
-from app.services.model_loader import get_model
+from app.services.executors import shutdown_executors
+from app.services.inference import get_serving_model
+from app.services.inference_pool import shutdown_inference_pool
+from app.services.janitor import get_janitor
+from app.services.jobs import get_job_manager
 from app.routes.predict import router as predict_router
 
 
@@ -21,17 +29,39 @@ def create_app() -> FastAPI:
 
     # Middleware
     setup_cors(app)
+    setup_server_timing(app)
 
     # Routes
     app.include_router(health_router)
     app.include_router(predict_router)
     app.include_router(batch_router)
     app.include_router(download_router)
+    app.include_router(metrics_router)
+    app.include_router(jobs_router)
+    app.include_router(sessions_router)
 
-    # Optional: warm up model at startup (faster first request)
+    # Optional: warm up model at startup (faster first request; starts the
+    # inference processes when SCENE_SORTER_INFERENCE_PROCESSES > 0)
     @app.on_event("startup")
     def _startup() -> None:
-        get_model()
+        get_serving_model()
+
+    # Background job workers (POST /predict/batch?mode=async)
+    @app.on_event("startup")
+    async def _start_job_workers() -> None:
+        get_job_manager().start()
+
+    # Temp workspace eviction (TTL / disk quota)
+    @app.on_event("startup")
+    async def _start_janitor() -> None:
+        get_janitor().start()
+
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:
+        await get_job_manager().stop()
+        await get_janitor().stop()
+        shutdown_executors()
+        shutdown_inference_pool()
 
     return app
 
@@ -0,0 +1,45 @@
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.timing import StageTimings, bind_timings, record_stage_metrics, unbind_timings
+
+
+class ServerTimingMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware task/stream overhead):
+    binds a StageTimings for the request, adds it as a Server-Timing
+    header when the response starts and records the stage histograms once
+    the request is done.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = StageTimings()
+        token = bind_timings(timings)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING and timings.stages():
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            unbind_timings(token)
+            timings.stop()
+            record_stage_metrics(timings)
+
+
+def setup_server_timing(app: FastAPI) -> None:
+    """
+    Per-stage timings for every request: Server-Timing header + /metrics.
+    """
+    app.add_middleware(ServerTimingMiddleware)
@@ -1,26 +1,59 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.responses import JSONResponse
+from typing import List, Optional
 from uuid import uuid4
 
 from app.config import settings
-from app.schemas import BatchPredictResponse, ImagePrediction
+from app.schemas import BatchPredictResponse, JobAccepted
+from app.services.executors import run_io
 from app.services.inference import run_batch_inference
-from app.services.organizer import organize_images
-from app.services.zipper import zip_folder
+from app.services.jobs import submit_batch_job
+from app.services.pipeline import build_batch_response, finish_batch, organize_as_predicted
 from app.utils.image_io import validate_images
 from app.utils.temp_storage import create_job_dirs
+from app.utils.timing import current_timings
 
 router = APIRouter(prefix="/predict", tags=["batch"])
 
+BATCH_MODES = ("sync", "async")
 
-@router.post("/batch", response_model=BatchPredictResponse)
-async def batch_predict(files: List[UploadFile] = File(...)):
+
+@router.post(
+    "/batch",
+    response_model=BatchPredictResponse,
+    response_model_exclude_none=True,
+    responses={202: {"model": JobAccepted, "description": "Job queued (mode=async)"}},
+)
+async def batch_predict(
+    files: List[UploadFile] = File(...),
+    mode: str = Query("sync", description="sync: run the whole pipeline in this request; async: queue a job and return 202"),
+    top_k: int = Query(1, ge=1, description="Also return the k most likely labels per image (1 = top-1 only)"),
+    unsure_threshold: Optional[float] = Query(
+        None, ge=0.0, le=1.0, description="File images below this confidence under unsure/ (default: SCENE_SORTER_UNSURE_THRESHOLD)"
+    ),
+    timings: bool = Query(False, description="Include per-stage timings (sync mode)"),
+):
     """
     Accept multiple images, run scene classification,
     organize them into class-based folders, zip the result,
     and return a download URL.
+
+    With ?mode=async the uploads are saved and queued as a background job:
+    the response is 202 with the job_id; poll GET /jobs/{job_id} and
+    download from /download/{job_id} once it has succeeded.
+
+    ?top_k=k adds the k best labels per image; images whose top-1
+    confidence is below ?unsure_threshold go to unsure/ in the zip.
+    ?timings=true adds per-stage busy times (decode / predict / persist /
+    organize / zip ...) and the total, to check that the stages overlap.
     """
 
+    if mode not in BATCH_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode '{mode}'. Expected one of: {', '.join(BATCH_MODES)}."
+        )
+
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded.")
 
@@ -33,49 +66,35 @@ async def batch_predict(files: List[UploadFile] = File(...)):
     # Validate file types & sizes
     await validate_images(files)
 
+    if mode == "async":
+        record = await submit_batch_job(files, top_k=top_k, unsure_threshold=unsure_threshold)
+        accepted = JobAccepted(
+            job_id=record.job_id,
+            state=record.state,
+            status_url=f"/jobs/{record.job_id}",
+            download_url=f"/download/{record.job_id}",
+        )
+        return JSONResponse(status_code=202, content=accepted.model_dump())
+
+    # Bound by the Server-Timing middleware: also reported in the header and on /metrics
+    stage_timings = current_timings()
+
     # Create unique job workspace
     job_id = uuid4().hex
-    job_dirs = create_job_dirs(job_id)
+    job_dirs = await run_io(create_job_dirs, job_id)
 
-    # Run inference
+    # Pipelined inference: sub-batches decode on the I/O pool while earlier
+    # ones are on the model, and get organized as soon as they're predicted
+    organize = organize_as_predicted(job_dirs, stage_timings)
     predictions = await run_batch_inference(
         files=files,
-        output_dir=job_dirs["raw"]
-    )
-
-    # Organize images into folders by class
-    organize_images(
-        predictions=predictions,
-        raw_dir=job_dirs["raw"],
-        organized_dir=job_dirs["organized"]
+        output_dir=job_dirs["raw"],
+        unsure_threshold=unsure_threshold,
+        on_predicted=organize,
+        timings=stage_timings
     )
 
-    # Zip organized folder
-    zip_path = zip_folder(
-        source_dir=job_dirs["organized"],
-        job_id=job_id
-    )
-
-    # Build response
-    by_class = {}
-    results = []
-
-    for pred in predictions:
-        by_class[pred.label] = by_class.get(pred.label, 0) + 1
-        results.append(
-            ImagePrediction(
-                filename=pred.filename,
-                label=pred.label,
-                confidence=pred.confidence
-            )
-        )
+    # Manifest, zip (organize already happened above)
+    await finish_batch(job_id, job_dirs, predictions, organized=organize is not None, timings=stage_timings)
 
-    return BatchPredictResponse(
-        job_id=job_id,
-        summary={
-            "total": len(predictions),
-            "by_class": by_class
-        },
-        results=results,
-        download_url=f"/download/{job_id}"
-    )
+    return build_batch_response(job_id, predictions, top_k=top_k, timings=stage_timings if timings else None)
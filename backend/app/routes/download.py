@@ -1,34 +1,79 @@
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
+from app.config import settings
+from app.services.janitor import get_janitor
+from app.services.jobs import get_job_manager
+from app.services.zipper import iter_zip, job_zip_entries, zip_name
 from app.utils.temp_storage import get_job_dirs
 
 router = APIRouter(prefix="/download", tags=["download"])
 
 
+def _hold_while_streaming(job_id: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Keep the janitor off the workspace until the last chunk is sent (or
+    the client goes away), so a sweep can't delete files mid-archive.
+    """
+    with get_janitor().hold(job_id):
+        yield from chunks
+
+
 @router.get("/{job_id}")
-def download_zip(job_id: str):
+def download_zip(job_id: str, stream: Optional[bool] = None):
     """
     Download the organized zip for a job_id.
 
-    Expects zip at:
+    Serves the prebuilt zip if present:
       TEMP_ROOT/{job_id}/zips/organized_photos_{job_id}.zip
+
+    Otherwise (or with ?stream=true) the zip is generated on the fly from the
+    job's files and predictions and streamed in chunks - it never touches disk.
+    Streaming is the default when SCENE_SORTER_ZIP_MODE=stream.
+
+    Background jobs (mode=async) answer 409 until they have succeeded.
+    Workspaces expire (SCENE_SORTER_TEMP_TTL_S / _DOWNLOAD_TTL_S / _QUOTA_MB):
+    an evicted job answers 404.
     """
+    job = get_job_manager().get(job_id)
+    if job is not None and job.state != "succeeded":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job '{job_id}' is {job.state}; poll /jobs/{job_id} until it has succeeded."
+        )
+
     job_dirs = get_job_dirs(job_id)
     zips_dir: Path = job_dirs["zips"]
 
-    zip_path = zips_dir / f"organized_photos_{job_id}.zip"
+    # Starts the after-download TTL and makes it the most recently used
+    get_janitor().note_download(job_id)
 
-    if not zip_path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail="Zip not found. Run /predict/batch first to generate it."
+    zip_path = zips_dir / zip_name(job_id)
+
+    if stream is None:
+        stream = settings.ZIP_MODE == "stream" or not zip_path.exists()
+
+    if not stream:
+        if not zip_path.exists():
+            raise HTTPException(
+                status_code=404,
+                detail="Zip not found. Run /predict/batch first to generate it."
+            )
+
+        return FileResponse(
+            path=str(zip_path),
+            filename=zip_path.name,
+            media_type="application/zip",
         )
 
-    return FileResponse(
-        path=str(zip_path),
-        filename=zip_path.name,
+    # Resolve entries up front so a missing job/manifest is a clean 404
+    entries = job_zip_entries(job_id)
+
+    return StreamingResponse(
+        _hold_while_streaming(job_id, iter_zip(entries)),
         media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{zip_path.name}"'},
     )
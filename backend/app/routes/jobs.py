@@ -0,0 +1,34 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, HTTPException
+
+from app.schemas import JobStatusResponse
+from app.services.executors import run_io
+from app.services.jobs import PIPELINE_STAGES, get_job_manager
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def job_status(job_id: str):
+    """
+    State and per-stage progress of a background batch job
+    (POST /predict/batch?mode=async).
+
+    Stages run in order: ingest -> decode -> predict -> organize -> zip.
+    Once state is "succeeded", result holds the same payload the
+    synchronous endpoint returns and /download/{job_id} serves the zip.
+    """
+    record = await run_io(get_job_manager().get, job_id)
+
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+
+    return JobStatusResponse(
+        job_id=record.job_id,
+        state=record.state,
+        stages={name: asdict(record.stages[name]) for name in PIPELINE_STAGES},
+        error=record.error,
+        result=record.result,
+        download_url=f"/download/{record.job_id}",
+    )
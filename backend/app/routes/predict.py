@@ -1,7 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import Optional
+from uuid import uuid4
 
 from app.schemas import ImagePrediction
+from app.services.executors import run_io
 from app.services.inference import run_batch_inference
+from app.services.janitor import get_janitor
+from app.services.pipeline import image_predictions
 from app.utils.image_io import validate_images
 from app.utils.temp_storage import create_job_dirs
 
@@ -9,33 +14,52 @@ from app.utils.temp_storage import create_job_dirs
 router = APIRouter(prefix="/predict", tags=["predict"])
 
 
-@router.post("", response_model=ImagePrediction)
-async def predict_single(file: UploadFile = File(...)):
+@router.post("", response_model=ImagePrediction, response_model_exclude_none=True)
+async def predict_single(
+    file: UploadFile = File(...),
+    top_k: int = Query(1, ge=1, description="Also return the k most likely labels (1 = top-1 only)"),
+    unsure_threshold: Optional[float] = Query(
+        None, ge=0.0, le=1.0, description="Flag the image as unsure below this confidence (default: SCENE_SORTER_UNSURE_THRESHOLD)"
+    ),
+    persist: bool = Query(False, description="Also save the upload into its own workspace (raw/) and return its job_id"),
+):
     """
     Predict scene class for a single image.
     Useful for quick testing and demos.
+
+    By default nothing touches TEMP_ROOT: the image is decoded from the
+    upload spool and predicted through the shared micro-batcher. With
+    persist=true the upload is saved into a fresh per-request workspace
+    (tracked by the janitor like any batch job).
     """
 
     # Reuse batch validation logic
     await validate_images([file])
 
-    # Create a lightweight job workspace
-    job_id = "single"
-    job_dirs = create_job_dirs(job_id)
-
-    # Run inference using batch pipeline (with 1 image)
-    predictions = await run_batch_inference(
-        files=[file],
-        output_dir=job_dirs["raw"]
-    )
+    job_id: Optional[str] = None
+    if not persist:
+        predictions = await run_batch_inference(
+            files=[file],
+            output_dir=None,
+            unsure_threshold=unsure_threshold
+        )
+    else:
+        job_id = uuid4().hex
+        janitor = get_janitor()
+        with janitor.hold(job_id):
+            try:
+                job_dirs = await run_io(create_job_dirs, job_id)
+                predictions = await run_batch_inference(
+                    files=[file],
+                    output_dir=job_dirs["raw"],
+                    unsure_threshold=unsure_threshold
+                )
+            finally:
+                await run_io(janitor.record, job_id)
 
     if not predictions:
         raise HTTPException(status_code=500, detail="Prediction failed.")
 
-    pred = predictions[0]
-
-    return ImagePrediction(
-        filename=pred.filename,
-        label=pred.label,
-        confidence=pred.confidence
-    )
+    result = image_predictions(predictions, top_k)[0]
+    result.job_id = job_id
+    return result
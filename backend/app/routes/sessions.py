@@ -0,0 +1,76 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import List, Optional
+
+from app.config import settings
+from app.schemas import BatchPredictResponse, SessionChunkAccepted, SessionOpened
+from app.services.upload_sessions import abort_session, append_files, finalize_session, open_session
+from app.utils.image_io import validate_images
+
+router = APIRouter(prefix="/sessions", tags=["sessions"])
+
+
+@router.post("", response_model=SessionOpened, status_code=201)
+async def create_session(
+    unsure_threshold: Optional[float] = Query(
+        None, ge=0.0, le=1.0, description="File images below this confidence under unsure/ (default: SCENE_SORTER_UNSURE_THRESHOLD)"
+    ),
+):
+    """
+    Open an upload session for a batch larger than one request allows.
+
+    Append files with POST /sessions/{job_id}/files (any number of
+    requests, up to MAX_FILES_PER_BATCH files each) - inference runs on
+    each chunk as soon as it lands - then POST /sessions/{job_id}/finalize
+    to organize and zip everything into one download.
+    """
+    record = await open_session(unsure_threshold)
+
+    return SessionOpened(
+        job_id=record.job_id,
+        state=record.state,
+        upload_url=f"/sessions/{record.job_id}/files",
+        finalize_url=f"/sessions/{record.job_id}/finalize",
+        status_url=f"/jobs/{record.job_id}",
+        download_url=f"/download/{record.job_id}",
+    )
+
+
+@router.post("/{job_id}/files", response_model=SessionChunkAccepted)
+async def upload_session_files(job_id: str, files: List[UploadFile] = File(...)):
+    """
+    Append a chunk of images to an open session.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded.")
+
+    if len(files) > settings.MAX_FILES_PER_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.MAX_FILES_PER_BATCH} files allowed per request."
+        )
+
+    await validate_images(files)
+
+    record = await append_files(job_id, files)
+
+    return SessionChunkAccepted(job_id=job_id, received=len(files), total=len(record.inputs))
+
+
+@router.post("/{job_id}/finalize", response_model=BatchPredictResponse, response_model_exclude_none=True)
+async def finalize_upload_session(
+    job_id: str,
+    top_k: int = Query(1, ge=1, description="Also return the k most likely labels per image (1 = top-1 only)"),
+):
+    """
+    Close the session: wait for outstanding inference, then organize and
+    zip the whole batch. Returns the same payload as /predict/batch.
+    """
+    return await finalize_session(job_id, top_k=top_k)
+
+
+@router.delete("/{job_id}", status_code=204)
+async def delete_session(job_id: str):
+    """
+    Abandon an open session and delete its files.
+    """
+    await abort_session(job_id)
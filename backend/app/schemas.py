@@ -1,18 +1,27 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from typing_extensions import TypedDict
 
 from pydantic import BaseModel, Field
 
 
+class LabelScore(BaseModel):
+    label: str = Field(..., description="Scene label")
+    probability: float = Field(..., ge=0.0, le=1.0, description="Model probability for this label")
+
+
 class ImagePrediction(BaseModel):
     filename: str = Field(..., description="Saved filename of the image on the server")
     label: str = Field(..., description="Predicted scene label (top-1)")
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score for top-1 label")
+    unsure: bool = Field(False, description="Top-1 confidence is below the unsure threshold (filed under unsure/)")
+    top_k: Optional[List[LabelScore]] = Field(None, description="The k most likely labels, best first (only when top_k > 1)")
+    job_id: Optional[str] = Field(None, description="Workspace holding the saved upload (single predictions with persist=true only)")
 
 
 class BatchSummary(TypedDict):
     total: int
     by_class: Dict[str, int]
+    unsure: int
 
 
 class BatchPredictResponse(BaseModel):
@@ -20,3 +29,43 @@ class BatchPredictResponse(BaseModel):
     summary: BatchSummary = Field(..., description="Summary counts for the batch")
     results: List[ImagePrediction] = Field(..., description="Per-image top-1 predictions")
     download_url: str = Field(..., description="Relative URL to download the organized zip")
+    timings: Optional[Dict[str, float]] = Field(
+        None, description="Busy milliseconds per pipeline stage, plus total wall time (only with ?timings=true)"
+    )
+
+
+class JobAccepted(BaseModel):
+    job_id: str = Field(..., description="Unique job id for this batch upload")
+    state: str = Field(..., description="Job state: queued | running | succeeded | failed")
+    status_url: str = Field(..., description="Relative URL to poll for progress")
+    download_url: str = Field(..., description="Relative URL to download the organized zip once done")
+
+
+class StageStatus(BaseModel):
+    state: str = Field(..., description="pending | running | done | skipped")
+    done: int = Field(0, description="Items processed so far (image stages only)")
+    total: int = Field(0, description="Items to process (image stages only)")
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str = Field(..., description="Unique job id for this batch upload")
+    state: str = Field(..., description="Job state: queued | running | succeeded | failed")
+    stages: Dict[str, StageStatus] = Field(..., description="Per-stage progress, in pipeline order")
+    error: Optional[str] = Field(None, description="Failure reason when state is failed")
+    result: Optional[BatchPredictResponse] = Field(None, description="Batch result when state is succeeded")
+    download_url: str = Field(..., description="Relative URL to download the organized zip once done")
+
+
+class SessionOpened(BaseModel):
+    job_id: str = Field(..., description="Job id of the batch being uploaded")
+    state: str = Field(..., description="open until finalized")
+    upload_url: str = Field(..., description="POST files here, up to MAX_FILES_PER_BATCH per request")
+    finalize_url: str = Field(..., description="POST here once every file is uploaded")
+    status_url: str = Field(..., description="Relative URL to poll for progress")
+    download_url: str = Field(..., description="Relative URL to download the organized zip once finalized")
+
+
+class SessionChunkAccepted(BaseModel):
+    job_id: str = Field(..., description="Job id of the batch being uploaded")
+    received: int = Field(..., description="Files accepted in this request")
+    total: int = Field(..., description="Files accepted in this session so far")
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Set
+
+import numpy as np
+
+from app.utils.metrics import REGISTRY
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "scene_sorter_batcher_queue_depth",
+    "Images waiting for the next forward pass.",
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "scene_sorter_batcher_batch_size",
+    "Images per model forward pass.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+WAIT_SECONDS = REGISTRY.histogram(
+    "scene_sorter_batcher_wait_seconds",
+    "Time a request spent queued before its forward pass started.",
+)
+
+
+@dataclass
+class _PendingItem:
+    batch: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatcher:
+    """
+    Coalesces model inputs from concurrent requests into one forward pass.
+
+    Callers `await predict(batch)` with an (n,H,W,3) array. Pending inputs
+    are flushed when either:
+    - the window (window_ms) since the first pending input elapses, or
+    - the pending row count reaches max_batch_size.
+
+    predict_fn is awaited with the coalesced batch; it should hand the
+    forward pass to an executor so the event loop keeps collecting inputs
+    while the model is busy. Each caller receives its own rows of the
+    (N, num_classes) output.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], Awaitable[np.ndarray]],
+        max_batch_size: int = 32,
+        window_ms: int = 10,
+    ):
+        self._predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window_s = max(0, int(window_ms)) / 1000.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[_PendingItem] = []
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong refs so in-flight forward passes aren't garbage collected
+        self._running: Set[asyncio.Task] = set()
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Pending state belongs to one event loop (one per uvicorn worker;
+        # test clients may spin up a fresh loop per request).
+        if self._timer is not None:
+            self._timer.cancel()
+        self._loop = loop
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+
+    async def predict(self, batch: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._bind(loop)
+
+        rows = int(batch.shape[0])
+
+        # Don't let a new arrival push an already-pending batch over the limit
+        if self._pending and self._pending_rows + rows > self.max_batch_size:
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append(_PendingItem(batch=batch, future=future, enqueued_at=time.perf_counter()))
+        self._pending_rows += rows
+        QUEUE_DEPTH.set(self._pending_rows)
+
+        if self._pending_rows >= self.max_batch_size or self.window_s == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        items, self._pending = self._pending, []
+        self._pending_rows = 0
+        QUEUE_DEPTH.set(0)
+
+        if items:
+            task = self._loop.create_task(self._run(items))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, items: List[_PendingItem]) -> None:
+        started = time.perf_counter()
+        for item in items:
+            WAIT_SECONDS.observe(started - item.enqueued_at)
+
+        if len(items) == 1:
+            batch = items[0].batch
+        else:
+            batch = np.concatenate([item.batch for item in items], axis=0)
+
+        BATCH_SIZE.observe(batch.shape[0])
+
+        try:
+            probs = await self._predict_fn(batch)
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        offset = 0
+        for item in items:
+            n = item.batch.shape[0]
+            # Caller may have gone away (client disconnect -> cancelled)
+            if not item.future.done():
+                item.future.set_result(probs[offset:offset + n])
+            offset += n
@@ -0,0 +1,248 @@
+"""
+Offline bulk sort of a local directory tree (python -m app.cli sort SRC DST).
+
+Same decode / model / organize steps as the API, without its per-request
+limits, in constant memory however many photos there are:
+- SRC is walked lazily (os.scandir, entries sorted by name, so the walk
+  order is the same on every run)
+- images are decoded in parallel on the I/O pool into a pooled batch
+  buffer, while the previous batch is on the model
+- each batch is filed into DST/<class>/ (or DST/unsure/) with the
+  organizer's link/copy strategies
+- after every batch its results are appended to DST/scene_sorter_manifest.jsonl
+  and the last sorted path is written to DST/.scene_sorter_checkpoint.json;
+  a re-run skips everything up to that path (whole subtrees at once)
+"""
+import json
+import os
+import time
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.executors import get_io_executor
+from app.services.inference import _load_class_names, _predict_batch, get_serving_model
+from app.services.organizer import _methods_for, _place, prediction_folder
+from app.utils.file_naming import FORMAT_EXTENSIONS, make_safe_filename
+from app.utils.predictions import PredictionBatch
+from app.utils.preprocessing import BATCH_BUFFERS, load_image_into
+
+SORT_MANIFEST_NAME = "scene_sorter_manifest.jsonl"
+CHECKPOINT_NAME = ".scene_sorter_checkpoint.json"
+
+IMAGE_EXTENSIONS = frozenset(ext for exts in FORMAT_EXTENSIONS.values() for ext in exts)
+
+# Walk position: path parts relative to SRC (tuples compare in walk order)
+WalkKey = Tuple[str, ...]
+
+
+@dataclass
+class SortStats:
+    sorted: int = 0
+    failed: int = 0
+    resumed_from: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def images_per_s(self) -> float:
+        return (self.sorted + self.failed) / self.seconds if self.seconds > 0 else 0.0
+
+
+# on_batch(stats) after each batch is filed and checkpointed
+BatchFn = Callable[[SortStats], None]
+
+
+def iter_images(src: Path, after: Optional[WalkKey] = None, exclude: Optional[Path] = None) -> Iterator[Path]:
+    """
+    Image files under src in a stable depth-first order (names sorted per
+    directory). With `after`, everything up to and including that position
+    is skipped; directories that end before it aren't even listed.
+    """
+    exclude = exclude.resolve() if exclude is not None else None
+
+    def walk(directory: Path, prefix: WalkKey) -> Iterator[Path]:
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+
+        for entry in entries:
+            key = prefix + (entry.name,)
+
+            if entry.is_dir(follow_symlinks=False):
+                path = Path(entry.path)
+                if exclude is not None and path.resolve() == exclude:
+                    continue
+                # Fully sorted in an earlier run: the checkpoint is past this subtree
+                if after is not None and key < after and after[:len(key)] != key:
+                    continue
+                yield from walk(path, key)
+            elif entry.is_file():
+                if after is not None and key <= after:
+                    continue
+                if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    yield Path(entry.path)
+
+    yield from walk(src, ())
+
+
+def load_checkpoint(dst: Path) -> Optional[WalkKey]:
+    path = dst / CHECKPOINT_NAME
+    if not path.exists():
+        return None
+    return tuple(json.loads(path.read_text(encoding="utf-8"))["last"])
+
+
+def _save_checkpoint(dst: Path, last: WalkKey, stats: SortStats) -> None:
+    path = dst / CHECKPOINT_NAME
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({"last": list(last), "sorted": stats.sorted, "failed": stats.failed}),
+        encoding="utf-8",
+    )
+    tmp_path.replace(path)
+
+
+def _dest_path(folder: Path, src_path: Path) -> Path:
+    """
+    Safe, unique name in the class folder. A file that is already this
+    source (linked by an interrupted run) is reused rather than duplicated.
+    """
+    safe = make_safe_filename(src_path.name)
+    stem, suffix = os.path.splitext(safe)
+    candidate = folder / safe
+
+    i = 1
+    while candidate.exists():
+        if os.path.samefile(candidate, src_path):
+            return candidate
+        candidate = folder / f"{stem}_{i}{suffix}"
+        i += 1
+
+    return candidate
+
+
+def _start_decode(paths: List[Path], executor: Executor) -> Tuple[np.ndarray, List[Future]]:
+    batch = BATCH_BUFFERS.acquire(len(paths))
+    futures = [executor.submit(load_image_into, path, batch[i]) for i, path in enumerate(paths)]
+    return batch, futures
+
+
+def _decode_errors(futures: List[Future]) -> List[Optional[str]]:
+    errors = []
+    for future in futures:
+        e = future.exception()
+        errors.append(f"{type(e).__name__}: {e}" if e is not None else None)
+    return errors
+
+
+def sort_directory(
+    src: Path,
+    dst: Path,
+    batch_size: Optional[int] = None,
+    strategy: Optional[str] = None,
+    unsure_threshold: Optional[float] = None,
+    resume: bool = True,
+    on_batch: Optional[BatchFn] = None,
+) -> SortStats:
+    """
+    Classify every image under src and file it into dst/<class>/.
+
+    Images that fail to decode or to be filed are recorded in the manifest
+    with their error and left out of the class folders; they don't stop
+    the run.
+    """
+    src, dst = src.resolve(), dst.resolve()
+    dst.mkdir(parents=True, exist_ok=True)
+
+    model = get_serving_model()
+    class_names = _load_class_names()
+    batch_size = batch_size or settings.INFERENCE_MAX_BATCH_SIZE
+    methods = _methods_for(strategy or settings.ORGANIZE_STRATEGY)
+    threshold = settings.UNSURE_THRESHOLD if unsure_threshold is None else unsure_threshold
+
+    after = load_checkpoint(dst) if resume else None
+    stats = SortStats(resumed_from="/".join(after) if after else None)
+
+    paths = iter_images(src, after=after, exclude=dst)
+    chunks = iter(lambda: list(islice(paths, batch_size)), [])
+    executor = get_io_executor()
+    started = time.perf_counter()
+
+    manifest_mode = "a" if after else "w"
+    with (dst / SORT_MANIFEST_NAME).open(manifest_mode, encoding="utf-8") as manifest:
+
+        def finish(chunk: List[Path], batch: np.ndarray, futures: List[Future]) -> None:
+            try:
+                errors = _decode_errors(futures)
+                ok = [i for i, e in enumerate(errors) if e is None]
+                placed = {}
+
+                if ok:
+                    rows = batch if len(ok) == len(chunk) else batch[ok]
+                    probs = _predict_batch(model, rows)
+                    predictions = PredictionBatch([str(chunk[i]) for i in ok], class_names, probs, threshold)
+
+                    for (_, label, confidence, unsure), i in zip(predictions.rows(), ok):
+                        folder = dst / prediction_folder(label, unsure)
+                        try:
+                            folder.mkdir(exist_ok=True)
+                            dest = _dest_path(folder, chunk[i])
+                            if not dest.exists():
+                                _place(chunk[i], dest, methods)
+                        except OSError as e:
+                            # e.g. permission denied or disk full: recorded like a decode failure
+                            errors[i] = f"{type(e).__name__}: {e}"
+                            continue
+                        placed[i] = (label, confidence, unsure, dest)
+            finally:
+                BATCH_BUFFERS.release(batch)
+
+            for i, path in enumerate(chunk):
+                entry = {"source": str(path.relative_to(src))}
+                if i in placed:
+                    label, confidence, unsure, dest = placed[i]
+                    entry.update(label=label, confidence=confidence, unsure=unsure, dest=str(dest.relative_to(dst)))
+                    stats.sorted += 1
+                else:
+                    entry["error"] = errors[i]
+                    stats.failed += 1
+                manifest.write(json.dumps(entry) + "\n")
+
+            # Results first, then the checkpoint: a crash in between only
+            # repeats this batch (and its links are reused)
+            manifest.flush()
+            os.fsync(manifest.fileno())
+            _save_checkpoint(dst, chunk[-1].relative_to(src).parts, stats)
+
+            stats.seconds = time.perf_counter() - started
+            if on_batch is not None:
+                on_batch(stats)
+
+        # Decode batch k+1 while batch k is on the model; at most two
+        # batch buffers are alive at any time
+        pending = decoding = None
+        try:
+            for chunk in chunks:
+                decoding = (chunk, *_start_decode(chunk, executor))
+                if pending is not None:
+                    finish(*pending)
+                pending, decoding = decoding, None
+
+            if pending is not None:
+                finish(*pending)
+        except BaseException:
+            # Interrupted: don't leave decodes running into a dropped buffer
+            if decoding is not None:
+                for future in decoding[2]:
+                    future.cancel()
+            raise
+
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,109 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Global singletons (created lazily, shut down with the app)
+_IO_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_INFERENCE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ZIP_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _io_worker_count() -> int:
+    configured = settings.IO_WORKERS
+    if configured > 0:
+        return configured
+    return min(8, os.cpu_count() or 1)
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool for blocking file I/O and image decode/resize.
+
+    Pillow releases the GIL while decoding and resampling, so these
+    threads run truly in parallel with each other and with the event loop.
+    """
+    global _IO_EXECUTOR
+
+    if _IO_EXECUTOR is None:
+        _IO_EXECUTOR = ThreadPoolExecutor(
+            max_workers=_io_worker_count(),
+            thread_name_prefix="scene-sorter-io",
+        )
+    return _IO_EXECUTOR
+
+
+def zip_worker_count() -> int:
+    configured = settings.ZIP_WORKERS
+    if configured > 0:
+        return configured
+    return min(4, os.cpu_count() or 1)
+
+
+def get_zip_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool for reading + CRC/deflating zip entries (zlib releases the GIL).
+
+    Separate from the I/O pool because zip builds are themselves submitted to
+    the I/O pool and wait on these tasks.
+    """
+    global _ZIP_EXECUTOR
+
+    if _ZIP_EXECUTOR is None:
+        _ZIP_EXECUTOR = ThreadPoolExecutor(
+            max_workers=zip_worker_count(),
+            thread_name_prefix="scene-sorter-zip",
+        )
+    return _ZIP_EXECUTOR
+
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """
+    Dedicated thread for model forward passes.
+
+    TensorFlow parallelizes a single predict() internally, so one thread
+    (fed by the micro-batcher) keeps the model busy without oversubscribing
+    the CPU. With inference processes there is one thread per process, so
+    concurrent forward passes can each wait on a worker.
+    """
+    global _INFERENCE_EXECUTOR
+
+    if _INFERENCE_EXECUTOR is None:
+        _INFERENCE_EXECUTOR = ThreadPoolExecutor(
+            max_workers=max(1, settings.INFERENCE_THREADS, settings.INFERENCE_PROCESSES),
+            thread_name_prefix="scene-sorter-inference",
+        )
+    return _INFERENCE_EXECUTOR
+
+
+async def run_io(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Await a blocking I/O / decode call without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), partial(fn, *args, **kwargs))
+
+
+async def run_inference(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Await a blocking model call on the inference executor.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(), partial(fn, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    global _IO_EXECUTOR, _INFERENCE_EXECUTOR, _ZIP_EXECUTOR
+
+    for executor in (_IO_EXECUTOR, _INFERENCE_EXECUTOR, _ZIP_EXECUTOR):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    _IO_EXECUTOR = None
+    _INFERENCE_EXECUTOR = None
+    _ZIP_EXECUTOR = None
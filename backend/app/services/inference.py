@@ -1,24 +1,50 @@
+import asyncio
 import json
-from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 from fastapi import UploadFile, HTTPException
 
 from app.config import settings
-from app.services.model_loader import get_model
+from app.services.batcher import MicroBatcher
+from app.services.executors import run_inference, run_io
+from app.services.inference_pool import get_inference_pool
+from app.services.model_loader import get_model, get_model_identity
+from app.services.prediction_cache import PredictionCache, get_prediction_cache
 from app.utils.file_naming import ensure_unique_filename
-from app.utils.image_io import read_upload_as_pil_rgb
-from app.utils.preprocessing import preprocess_pil_for_model
+from app.utils.image_io import IngestedUpload, peek_image_format, persist_upload, scan_upload
+from app.utils.predictions import PredictionBatch
+from app.utils.preprocessing import BATCH_BUFFERS, load_image_into
+from app.utils.metrics import REGISTRY
+from app.utils.timing import StageTimings, current_timings
 
 
-@dataclass(frozen=True)
-class PredictionResult:
-    filename: str
-    label: str
-    confidence: float
-    probabilities: List[float]
+# Where an image is decoded from: the multipart spool or its file in raw/
+DecodeSource = Union[BinaryIO, Path]
+
+# on_progress(stage, done, total)
+ProgressFn = Callable[[str, int, int], None]
+
+# persist(i): save upload i into raw/
+PersistFn = Callable[[int], Awaitable[None]]
+
+# on_predicted(sub_batch): called with each sub-batch as it comes back from the model
+PredictedFn = Callable[[PredictionBatch], Awaitable[None]]
+
+BATCH_IMAGES = REGISTRY.histogram(
+    "scene_sorter_batch_images",
+    "Images per inference request / job (cache hits included).",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+INGESTED_BYTES = REGISTRY.counter(
+    "scene_sorter_ingested_bytes_total",
+    "Bytes of uploaded images run through inference.",
+)
+
+# Shared across requests so concurrent uploads share forward passes
+_BATCHER: Optional[MicroBatcher] = None
 
 
 def _load_class_names() -> List[str]:
@@ -94,7 +120,7 @@ def _predict_batch(model, batch_array: np.ndarray) -> np.ndarray:
     Returns probabilities of shape (N, num_classes).
     """
     try:
-        preds = model.predict(batch_array, verbose=0)
+        preds = model.predict(batch_array)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
 
@@ -103,103 +129,361 @@ def _predict_batch(model, batch_array: np.ndarray) -> np.ndarray:
     return preds
 
 
-def _top1_from_probs(probs: np.ndarray, class_names: List[str]) -> Tuple[str, float, List[float]]:
-    idx = int(np.argmax(probs))
-    conf = float(probs[idx])
+def get_serving_model():
+    """
+    What forward passes go to: the inference process pool when
+    SCENE_SORTER_INFERENCE_PROCESSES > 0, else the in-process model.
+    Loads / starts it on first use, so also used as the fail-fast check.
+    """
+    if settings.INFERENCE_PROCESSES > 0:
+        return get_inference_pool()
+    return get_model()
+
 
-    if idx < len(class_names):
-        label = class_names[idx]
-    else:
-        label = str(idx)
+def _predict_with_loaded_model(batch_array: np.ndarray) -> np.ndarray:
+    return _predict_batch(get_serving_model(), batch_array)
 
-    return label, conf, [float(x) for x in probs.tolist()]
 
+async def _predict_on_inference_thread(batch_array: np.ndarray) -> np.ndarray:
+    return await run_inference(_predict_with_loaded_model, batch_array)
 
-def _apply_mobilenetv2_preprocess(batch: np.ndarray) -> np.ndarray:
+
+def get_batcher() -> MicroBatcher:
+    """
+    Returns the process-wide micro-batcher in front of get_model().
+    """
+    global _BATCHER
+
+    if _BATCHER is None:
+        _BATCHER = MicroBatcher(
+            predict_fn=_predict_on_inference_thread,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            window_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+        )
+    return _BATCHER
+
+
+def _load_upload_into(
+    source: DecodeSource,
+    upload: IngestedUpload,
+    out: np.ndarray,
+    timings: Optional[StageTimings] = None,
+) -> None:
     """
-    Your preprocess_pil_for_model outputs float32 in [0,1].
-    MobileNetV2 preprocess_input expects [0,255] and converts to [-1,1].
+    Blocking per-image work, run on the I/O executor: decode the upload
+    (reduced-size draft decode) straight into this image's row of the
+    batch buffer. `source` is either the multipart spool (raw/ may not be
+    written yet) or the file already saved in raw/.
     """
     try:
-        from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+        if not isinstance(source, Path):
+            source.seek(0)
+        load_image_into(source, out, timings)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"TensorFlow MobileNetV2 preprocess import failed: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid image file '{upload.original_name}': {e}")
+
 
-    batch = batch.astype(np.float32)
+def _cache_lookup_all(cache: PredictionCache, identity: str, uploads: List[IngestedUpload]) -> List[Optional[np.ndarray]]:
+    return [cache.get(identity, up.digest) for up in uploads]
 
-    # Convert [0,1] -> [0,255] before preprocess_input
-    batch = batch * 255.0
 
-    return preprocess_input(batch)
+def _check_output_shape(probs_batch: np.ndarray, class_names: List[str]) -> None:
+    if probs_batch.ndim != 2:
+        raise HTTPException(status_code=500, detail=f"Unexpected model output shape: {probs_batch.shape}")
+
+    if probs_batch.shape[1] != len(class_names):
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f"Class count mismatch: model outputs {probs_batch.shape[1]} classes "
+                f"but labels.json has {len(class_names)}."
+            )
+        )
+
+
+def _unsure_threshold(override: Optional[float]) -> float:
+    return settings.UNSURE_THRESHOLD if override is None else override
 
 
-async def run_batch_inference(files: List[UploadFile], output_dir: Path) -> List[PredictionResult]:
+async def _cache_lookup(uploads: List[IngestedUpload]) -> Tuple[List[Optional[np.ndarray]], Optional[PredictionCache], Optional[str]]:
+    cache = get_prediction_cache()
+    if cache is None:
+        return [None] * len(uploads), None, None
+
+    identity = await run_io(get_model_identity)
+    cached = await run_io(_cache_lookup_all, cache, identity, uploads)
+    return cached, cache, identity
+
+
+async def _run_pipeline(
+    uploads: List[IngestedUpload],
+    sources: List[DecodeSource],
+    class_names: List[str],
+    unsure_threshold: float,
+    persist: Optional[PersistFn] = None,
+    on_progress: Optional[ProgressFn] = None,
+    on_predicted: Optional[PredictedFn] = None,
+    timings: Optional[StageTimings] = None,
+    sub_batch_size: Optional[int] = None,
+) -> np.ndarray:
     """
-    1) Decode each UploadFile as PIL RGB
-    2) Save original image into output_dir (raw)
-    3) Preprocess for model input
-    4) Predict in a single batch
-    5) Return per-image PredictionResult
+    decode -> predict -> (persist, on_predicted) as a bounded pipeline:
+
+    - prediction cache hits (by content hash) skip decode and predict
+    - misses are cut into sub-batches; each decodes concurrently on the I/O
+      pool into a pooled (k,H,W,3) buffer and goes on a queue of at most
+      INFERENCE_PIPELINE_DEPTH sub-batches (the decoder waits when it's
+      full - backpressure, so memory stays bounded however big the batch)
+    - the predict stage takes sub-batches off the queue as soon as they
+      are ready and sends them through the micro-batcher, so the model
+      works on sub-batch k while k+1 decodes
+    - persist(i) runs right after image i is decoded (its source is free
+      again); on_predicted(sub) gets each sub-batch's PredictionBatch once
+      its images are persisted (e.g. to organize them)
+
+    Returns probabilities (N, num_classes) in upload order.
     """
-    output_dir.mkdir(parents=True, exist_ok=True)
+    total = len(uploads)
+    timings = timings or current_timings()
+    sub_batch_size = max(1, sub_batch_size or settings.INFERENCE_PIPELINE_BATCH)
 
-    model = get_model()
-    class_names = _load_class_names()
+    BATCH_IMAGES.observe(total)
+    INGESTED_BYTES.inc(sum(up.size for up in uploads))
 
-    processed: List[np.ndarray] = []
-    saved_filenames: List[str] = []
+    with timings.measure("cache"):
+        cached, cache, identity = await _cache_lookup(uploads)
 
-    existing_names: set[str] = set()
+    probs_batch = np.empty((total, len(class_names)), dtype=np.float32)
+    hits = [i for i, probs in enumerate(cached) if probs is not None]
+    for i in hits:
+        probs_batch[i] = cached[i]
 
-    for f in files:
-        safe_name = ensure_unique_filename(f.filename or "image.jpg", existing_names)
-        save_path = output_dir / safe_name
+    miss_idx = [i for i, probs in enumerate(cached) if probs is None]
+    groups = [miss_idx[k:k + sub_batch_size] for k in range(0, len(miss_idx), sub_batch_size)]
 
-        pil_img = await read_upload_as_pil_rgb(f)
+    decoded = predicted = len(hits)
+    if on_progress is not None:
+        on_progress("decode", decoded, total)
 
-        try:
-            pil_img.save(save_path)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Failed to save '{safe_name}': {e}")
+    persisted: Dict[int, asyncio.Future] = {}
+    followups: List[asyncio.Future] = []
 
-        # (H,W,3) float32 in [0,1]
-        arr = preprocess_pil_for_model(pil_img)
-        processed.append(arr)
-        saved_filenames.append(safe_name)
+    async def persist_one(i: int) -> None:
+        with timings.measure("persist"):
+            await persist(i)
 
-    if not processed:
-        raise HTTPException(status_code=400, detail="No valid images to process.")
+    def start_persist(i: int) -> None:
+        if persist is not None:
+            persisted[i] = asyncio.ensure_future(persist_one(i))
 
-    batch = np.stack(processed, axis=0)  # (N,H,W,3)
+    async def emit(indices: List[int]) -> None:
+        await asyncio.gather(*(persisted[i] for i in indices if i in persisted))
+        if on_predicted is not None:
+            sub = PredictionBatch(
+                [uploads[i].filename for i in indices], class_names, probs_batch[indices], unsure_threshold
+            )
+            await on_predicted(sub)
 
-    # ✅ Critical fix: make inference preprocessing match MobileNetV2 training
-    batch = _apply_mobilenetv2_preprocess(batch)
+    def start_emit(indices: List[int]) -> None:
+        if indices and (persist is not None or on_predicted is not None):
+            followups.append(asyncio.ensure_future(emit(indices)))
 
-    probs_batch = _predict_batch(model, batch)
+    for i in hits:
+        start_persist(i)
+    start_emit(hits)
 
-    if probs_batch.ndim != 2:
-        raise HTTPException(status_code=500, detail=f"Unexpected model output shape: {probs_batch.shape}")
+    queue: "asyncio.Queue[Optional[Tuple[List[int], np.ndarray]]]" = asyncio.Queue(
+        maxsize=max(1, settings.INFERENCE_PIPELINE_DEPTH)
+    )
 
-    if probs_batch.shape[1] != len(class_names):
-        raise HTTPException(
-            status_code=500,
-            detail=(
-                f"Class count mismatch: model outputs {probs_batch.shape[1]} classes "
-                f"but labels.json has {len(class_names)}."
+    async def decode_one(i: int, out: np.ndarray) -> None:
+        nonlocal decoded
+        # decode / preprocess are timed on the worker thread (no queueing delay)
+        await run_io(_load_upload_into, sources[i], uploads[i], out, timings)
+        decoded += 1
+        if on_progress is not None:
+            on_progress("decode", decoded, total)
+        start_persist(i)
+
+    async def produce() -> None:
+        for group in groups:
+            batch = BATCH_BUFFERS.acquire(len(group))  # (k,H,W,3) float32 in [-1,1]
+            # Let every decode finish before giving the buffer back on
+            # failure, so no straggler writes into a buffer someone else owns
+            outcomes = await asyncio.gather(
+                *(decode_one(i, batch[row]) for row, i in enumerate(group)), return_exceptions=True
             )
-        )
+            errors = [o for o in outcomes if isinstance(o, BaseException)]
+            if errors:
+                BATCH_BUFFERS.release(batch)
+                raise errors[0]
+
+            try:
+                await queue.put((group, batch))
+            except BaseException:
+                BATCH_BUFFERS.release(batch)
+                raise
+        await queue.put(None)
+
+    async def consume() -> None:
+        nonlocal predicted
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            group, batch = item
+            try:
+                with timings.measure("predict"):
+                    miss_probs = await get_batcher().predict(batch)
+            finally:
+                BATCH_BUFFERS.release(batch)
+
+            _check_output_shape(miss_probs, class_names)
+            probs_batch[group] = miss_probs
+
+            if cache is not None:
+                # One write (and one sqlite commit) per sub-batch, off the loop
+                with timings.measure("cache"):
+                    await run_io(
+                        cache.put_many, identity, [(uploads[i].digest, miss_probs[row]) for row, i in enumerate(group)]
+                    )
+
+            predicted += len(group)
+            if on_progress is not None:
+                on_progress("predict", predicted, total)
+            start_emit(group)
+
+    producer = asyncio.ensure_future(produce())
+    consumer = asyncio.ensure_future(consume())
 
-    results: List[PredictionResult] = []
+    try:
+        # First failure wins; the other side is cancelled below
+        done, _ = await asyncio.wait({producer, consumer}, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+        await asyncio.gather(producer, consumer)
+        await asyncio.gather(*followups)
+    except BaseException:
+        for task in (producer, consumer, *followups):
+            task.cancel()
+        await asyncio.gather(producer, consumer, *followups, *persisted.values(), return_exceptions=True)
+        # Sub-batches decoded but never predicted
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                BATCH_BUFFERS.release(item[1])
+        raise
+
+    if not groups and on_progress is not None:
+        on_progress("predict", total, total)
+
+    return probs_batch
+
+
+async def run_batch_inference(
+    files: List[UploadFile],
+    output_dir: Optional[Path],
+    unsure_threshold: Optional[float] = None,
+    on_predicted: Optional[PredictedFn] = None,
+    timings: Optional[StageTimings] = None,
+    sub_batch_size: Optional[int] = None,
+) -> PredictionBatch:
+    """
+    1) Sniff each UploadFile's format from its magic bytes and pick a safe,
+       unique raw/ filename with a matching extension
+    2) Scan each upload once in chunks: size limit + content hash
+    3) Look the content hashes up in the prediction cache (before any
+       decoding)
+    4) Decode cache misses in sub-batches (INFERENCE_PIPELINE_BATCH) on the
+       I/O executor, and predict each sub-batch through the shared
+       micro-batcher as soon as it is decoded - decode and inference
+       overlap (see _run_pipeline)
+    5) Copy each upload verbatim into output_dir (raw) once it is decoded,
+       and hand each predicted sub-batch to on_predicted (e.g. organize).
+       With output_dir=None nothing is written: images decode straight
+       from the multipart spool (the /predict fast path)
+    6) Return a PredictionBatch (argmax / confidence / unsure computed once
+       for the whole batch; unsure_threshold defaults to UNSURE_THRESHOLD)
+
+    Nothing CPU-heavy runs on the event loop, so other requests
+    (including /health) stay responsive during a large batch, and no
+    upload is ever held in memory as a whole. Stage busy times go into
+    `timings` (default: the current request's, see current_timings()).
+    """
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    timings = timings or current_timings()
 
-    for filename, probs in zip(saved_filenames, probs_batch):
-        label, conf, probs_list = _top1_from_probs(probs, class_names)
-        results.append(
-            PredictionResult(
-                filename=filename,
-                label=label,
-                confidence=conf,
-                probabilities=probs_list
-            )
-        )
+    # Fail fast (before saving anything) if the model can't be loaded
+    await run_inference(get_serving_model)
+    class_names = _load_class_names()
+
+    if not files:
+        raise HTTPException(status_code=400, detail="No valid images to process.")
+
+    with timings.measure("ingest"):
+        formats = await asyncio.gather(*(run_io(peek_image_format, f.file, f.filename or "") for f in files))
+
+        existing_names: set[str] = set()
+        scan_tasks = []
+
+        for f, image_format in zip(files, formats):
+            safe_name = ensure_unique_filename(f.filename or "image.jpg", existing_names, image_format)
+            dest_path = output_dir / safe_name if output_dir is not None else None
+            scan_tasks.append(run_io(scan_upload, f.file, f.filename or safe_name, safe_name, dest_path))
+
+        uploads: List[IngestedUpload] = await asyncio.gather(*scan_tasks)
+
+    async def persist(i: int) -> None:
+        # The spool is free again once image i is decoded
+        await run_io(persist_upload, files[i].file, uploads[i].path)
+
+    threshold = _unsure_threshold(unsure_threshold)
+    probs_batch = await _run_pipeline(
+        uploads,
+        [f.file for f in files],
+        class_names,
+        threshold,
+        persist=persist if output_dir is not None else None,
+        on_predicted=on_predicted,
+        timings=timings,
+        sub_batch_size=sub_batch_size,
+    )
+
+    return PredictionBatch([up.filename for up in uploads], class_names, probs_batch, threshold)
+
+
+async def run_ingested_inference(
+    uploads: List[IngestedUpload],
+    on_progress: Optional[ProgressFn] = None,
+    unsure_threshold: Optional[float] = None,
+    on_predicted: Optional[PredictedFn] = None,
+    timings: Optional[StageTimings] = None,
+) -> PredictionBatch:
+    """
+    Same pipeline as run_batch_inference for uploads that were already
+    streamed into raw/ (ingest_upload) - used by background jobs, which run
+    long after the request's spools are gone. Images decode from raw/
+    (mmap).
+
+    on_progress(stage, done, total) is called as images are decoded
+    ("decode") and as sub-batches come back from the model ("predict").
+    """
+    await run_inference(get_serving_model)
+    class_names = _load_class_names()
+
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No valid images to process.")
+
+    threshold = _unsure_threshold(unsure_threshold)
+    probs_batch = await _run_pipeline(
+        uploads,
+        [up.path for up in uploads],
+        class_names,
+        threshold,
+        on_progress=on_progress,
+        on_predicted=on_predicted,
+        timings=timings,
+    )
 
-    return results
+    return PredictionBatch([up.filename for up in uploads], class_names, probs_batch, threshold)
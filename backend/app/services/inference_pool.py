@@ -0,0 +1,314 @@
+"""
+Model forward passes in worker processes (SCENE_SORTER_INFERENCE_PROCESSES > 0).
+
+The API process keeps doing uploads, hashing and decoding; each worker
+process holds one model instance (model_loader.load_model) and owns a
+shared-memory input slot of (slot_rows, H, W, 3) float32:
+
+    parent: copy the preprocessed rows into the worker's slot, send n
+    worker: predict on slot[:n] - a NumPy view of the shared block, no
+            pickling of image data - and send back the (n, num_classes)
+            output over its pipe
+
+A batch is split across the free workers and the pieces run in parallel,
+so one large upload uses every worker. Workers are started with "spawn"
+(TensorFlow isn't fork-safe) and restarted if one dies.
+"""
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils.metrics import REGISTRY
+
+WORKER_RESTARTS = REGISTRY.counter(
+    "scene_sorter_inference_worker_restarts_total",
+    "Inference worker processes restarted after dying.",
+)
+
+# Returns an object with .predict(batch) -> (n, num_classes); must be picklable
+ModelLoader = Callable[[int], object]
+
+# Same gauge as model_loader's: the load itself happens in the worker process
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "scene_sorter_model_load_seconds",
+    "Time the last model load took (inference workers report theirs to the API process).",
+)
+
+
+def _load_configured_model(num_threads: int):
+    from app.services.model_loader import load_model
+
+    return load_model(num_threads=num_threads)
+
+
+def _worker_main(
+    shm_name: str,
+    slot_shape: Tuple[int, ...],
+    conn: Connection,
+    loader: ModelLoader,
+    num_threads: int,
+) -> None:
+    # Keras: keep this process to its share of the cores
+    os.environ.setdefault("TF_NUM_INTRAOP_THREADS", str(num_threads))
+    os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+
+    shm = SharedMemory(name=shm_name)
+    slot = np.ndarray(slot_shape, dtype=np.float32, buffer=shm.buf)
+
+    start = time.perf_counter()
+    try:
+        model = loader(num_threads)
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {getattr(e, 'detail', e)}"))
+        shm.close()
+        return
+
+    conn.send(("ready", time.perf_counter() - start))
+
+    try:
+        while True:
+            n = conn.recv()
+            if n is None:
+                break
+            try:
+                out = np.asarray(model.predict(slot[:n]), dtype=np.float32)
+                conn.send(("ok", out))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del slot
+        shm.close()
+
+
+class _Worker:
+    def __init__(self, ctx, slot_shape: Tuple[int, ...], loader: ModelLoader, num_threads: int):
+        self.slot_shape = slot_shape
+        self.shm = SharedMemory(create=True, size=int(np.prod(slot_shape)) * 4)
+        self.slot = np.ndarray(slot_shape, dtype=np.float32, buffer=self.shm.buf)
+
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(self.shm.name, slot_shape, child_conn, loader, num_threads),
+            name="scene-sorter-inference-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self) -> None:
+        try:
+            status, payload = self.conn.recv()
+        except (EOFError, OSError):
+            raise RuntimeError("Inference worker exited during model load.")
+        if status != "ready":
+            raise RuntimeError(f"Inference worker failed to load the model: {payload}")
+        MODEL_LOAD_SECONDS.set(payload)
+
+    def submit(self, rows: np.ndarray) -> None:
+        # A pipe to an exited process can still take a write; catch it here
+        if not self.process.is_alive():
+            raise BrokenPipeError("Inference worker is not running.")
+        n = rows.shape[0]
+        self.slot[:n] = rows
+        self.conn.send(n)
+
+    def result(self) -> np.ndarray:
+        try:
+            status, payload = self.conn.recv()
+        except (EOFError, OSError):
+            raise RuntimeError("Inference worker died during a forward pass.")
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+        del self.slot
+        self.shm.close()
+        self.shm.unlink()
+
+
+class InferenceProcessPool:
+    """
+    Same interface as a ModelBackend: predict(batch) -> raw model output.
+
+    Thread-safe: concurrent callers (micro-batcher flushes) each take free
+    workers; a batch is spread over up to `workers` of them.
+    """
+
+    name = "process-pool"
+
+    def __init__(
+        self,
+        workers: int,
+        slot_rows: int,
+        image_size: Tuple[int, int] = (224, 224),
+        loader: Optional[ModelLoader] = None,
+        threads_per_worker: int = 0,
+    ):
+        self.workers = max(1, int(workers))
+        self.slot_rows = max(1, int(slot_rows))
+        # image_size is (width, height) like IMAGE_SIZE; batches are (N, H, W, 3)
+        self._slot_shape = (self.slot_rows, image_size[1], image_size[0], 3)
+        self._loader = loader or _load_configured_model
+        self._threads = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self._ctx = mp.get_context("spawn")
+
+        self._free: "queue.Queue[_Worker]" = queue.Queue()
+        # Taking several workers at once happens under this lock, so two
+        # callers can never each hold part of what the other is waiting for
+        self._dispatch_lock = threading.Lock()
+        self._all: List[_Worker] = []
+
+        try:
+            for _ in range(self.workers):
+                self._all.append(self._spawn())
+            for worker in self._all:
+                worker.wait_ready()
+        except BaseException:
+            self.close()
+            raise
+
+        for worker in self._all:
+            self._free.put(worker)
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self._slot_shape, self._loader, self._threads)
+
+    def _replace(self, dead: _Worker) -> _Worker:
+        """
+        Puts a new worker in `dead`'s place in `_all`. If the new one cannot
+        start or load, whatever holds the place (the dead worker, or the
+        new one that failed) is still a pool member: it fails on its next
+        submit and is replaced again then.
+        """
+        WORKER_RESTARTS.inc()
+        worker = self._spawn()
+        try:
+            dead.close()
+        except Exception:
+            pass
+
+        self._all[self._all.index(dead)] = worker
+        try:
+            worker.wait_ready()
+        except RuntimeError:
+            # It exits after reporting; wait so its next submit sees it gone
+            worker.process.join(timeout=5)
+            raise
+        return worker
+
+    def _run_wave(self, chunks: List[np.ndarray]) -> List[np.ndarray]:
+        taken: List[_Worker] = []
+        outputs: List[np.ndarray] = []
+        error: Optional[BaseException] = None
+
+        try:
+            with self._dispatch_lock:
+                for chunk in chunks:
+                    worker = self._free.get()
+                    index = self._all.index(worker)
+                    try:
+                        try:
+                            worker.submit(chunk)
+                        except (BrokenPipeError, OSError):
+                            # Died while idle: restart it and hand the chunk to the new one
+                            worker = self._replace(worker)
+                            worker.submit(chunk)
+                    except BaseException:
+                        self._free.put(self._all[index])
+                        raise
+                    taken.append(worker)
+        finally:
+            # Every submitted chunk's reply is read, even if a later submit
+            # failed, so no worker goes back to the free list with one pending
+            for worker in taken:
+                index = self._all.index(worker)
+                try:
+                    outputs.append(worker.result())
+                except RuntimeError as e:
+                    error = error or e
+                    if not worker.process.is_alive():
+                        try:
+                            self._replace(worker)
+                        except Exception:
+                            # The forward-pass error is raised; the place is retried on next use
+                            pass
+                self._free.put(self._all[index])
+
+        if error is not None:
+            raise error
+        return outputs
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        n = batch.shape[0]
+        if n == 0:
+            raise ValueError("Empty batch.")
+
+        # Even split over the workers, no piece larger than a slot
+        rows = min(self.slot_rows, math.ceil(n / self.workers))
+        chunks = [batch[i:i + rows] for i in range(0, n, rows)]
+
+        outputs: List[np.ndarray] = []
+        for start in range(0, len(chunks), self.workers):
+            outputs.extend(self._run_wave(chunks[start:start + self.workers]))
+
+        return np.concatenate(outputs, axis=0) if len(outputs) > 1 else outputs[0]
+
+    def close(self) -> None:
+        workers, self._all = self._all, []
+        for worker in workers:
+            worker.close()
+
+
+# Global singleton (started lazily, shut down with the app)
+_POOL: Optional[InferenceProcessPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_inference_pool() -> InferenceProcessPool:
+    """
+    Returns the process-wide pool of SCENE_SORTER_INFERENCE_PROCESSES
+    workers, starting it (and loading the model in each) on first use.
+    """
+    global _POOL
+
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = InferenceProcessPool(
+                workers=settings.INFERENCE_PROCESSES,
+                slot_rows=settings.INFERENCE_MAX_BATCH_SIZE,
+                image_size=settings.IMAGE_SIZE,
+                threads_per_worker=settings.MODEL_NUM_THREADS,
+            )
+        return _POOL
+
+
+def shutdown_inference_pool() -> None:
+    global _POOL
+
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+        _POOL = None
@@ -0,0 +1,401 @@
+"""
+Temp workspace eviction: keeps TEMP_ROOT from growing until the disk fills.
+
+Every job workspace (TEMP_ROOT/{job_id}/: raw/, organized/, zips/) is
+tracked in an in-memory index with its size on disk, creation time and
+last access. The size is measured once, by walking that one job's
+folder when the job finishes - sweeps never re-walk the tree. A sweep
+(every JANITOR_INTERVAL_S, or right away when a job pushes the total
+over the quota) evicts:
+
+- ttl:       workspaces older than TEMP_TTL_S
+- downloaded: workspaces downloaded more than TEMP_DOWNLOAD_TTL_S ago
+- quota:     least recently used workspaces while the total is above
+             TEMP_QUOTA_MB
+
+Workspaces that are in use are never evicted: held by a request
+(hold()), or a job still queued / running / open (upload session). Each
+loop first expires upload sessions idle for more than SESSION_IDLE_TTL_S,
+so an abandoned session stops pinning its workspace; an "open" record
+that has been idle that long (e.g. its replica restarted) no longer
+counts as active either.
+Directories found on disk without an index entry - left by a crash, a
+failed request or a restart - are adopted (sized once) after
+JANITOR_ORPHAN_GRACE_S, so in-flight requests are never touched. Only
+directories are considered: the sqlite files next to them
+(jobs.sqlite3, prediction_cache.sqlite3) are left alone.
+
+Evicting a workspace also deletes its job record (/jobs/{job_id} would
+otherwise point at a dead download), and every loop deletes finished
+records older than TEMP_TTL_S, workspace or not.
+"""
+import asyncio
+import os
+import shutil
+import stat
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.utils.metrics import REGISTRY
+
+TEMP_BYTES = REGISTRY.gauge(
+    "scene_sorter_temp_bytes",
+    "Bytes on disk used by the job workspaces tracked under TEMP_ROOT.",
+)
+TEMP_JOBS = REGISTRY.gauge(
+    "scene_sorter_temp_jobs",
+    "Job workspaces tracked under TEMP_ROOT.",
+)
+TEMP_FREE_BYTES = REGISTRY.gauge(
+    "scene_sorter_temp_disk_free_bytes",
+    "Free bytes on the filesystem holding TEMP_ROOT (as of the last sweep).",
+)
+EVICTIONS = REGISTRY.counter(
+    "scene_sorter_temp_evictions_total",
+    "Job workspaces deleted by the janitor, by reason (ttl, downloaded, quota).",
+)
+EVICTED_BYTES = REGISTRY.counter(
+    "scene_sorter_temp_evicted_bytes_total",
+    "Bytes freed by the janitor, by reason.",
+)
+
+# Job states whose workspace is still being written / waited on
+ACTIVE_JOB_STATES = ("open", "queued", "running")
+
+
+@dataclass
+class WorkspaceEntry:
+    job_id: str
+    size: int
+    created_at: float
+    last_access: float
+    downloaded_at: Optional[float] = None
+
+
+def workspace_size(root: Path) -> int:
+    """
+    Bytes on disk under root; hardlinked files (organized/ -> raw/) count once.
+    """
+    total = 0
+    seen: Set[Tuple[int, int]] = set()
+    stack = [root]
+
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(st.st_mode):
+                        stack.append(Path(entry.path))
+                    elif (st.st_dev, st.st_ino) not in seen:
+                        seen.add((st.st_dev, st.st_ino))
+                        total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+        except OSError:
+            continue
+
+    return total
+
+
+def _job_is_active(job_id: str) -> bool:
+    from app.services.jobs import get_job_manager
+
+    record = get_job_manager().get(job_id)
+    if record is None or record.state not in ACTIVE_JOB_STATES:
+        return False
+    if record.state == "open" and settings.SESSION_IDLE_TTL_S > 0:
+        return time.time() - record.updated_at < settings.SESSION_IDLE_TTL_S
+    return True
+
+
+def _drop_job_record(job_id: str) -> None:
+    from app.services.jobs import get_job_manager
+
+    get_job_manager().delete(job_id)
+
+
+def _purge_job_records() -> None:
+    from app.services.jobs import get_job_manager
+
+    if settings.TEMP_TTL_S > 0:
+        get_job_manager().purge(settings.TEMP_TTL_S)
+
+
+class TempJanitor:
+    def __init__(
+        self,
+        root: Path,
+        ttl_s: float,
+        download_ttl_s: float,
+        quota_bytes: int,
+        interval_s: float,
+        orphan_grace_s: float,
+        is_active: Callable[[str], bool] = _job_is_active,
+        on_evict: Callable[[str], None] = _drop_job_record,
+    ):
+        self.root = root
+        self.ttl_s = ttl_s
+        self.download_ttl_s = download_ttl_s
+        self.quota_bytes = quota_bytes
+        self.interval_s = max(1.0, interval_s)
+        self.orphan_grace_s = orphan_grace_s
+        self.is_active = is_active
+        self.on_evict = on_evict
+
+        self._entries: Dict[str, WorkspaceEntry] = {}
+        self._held: Dict[str, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # -- index updates (cheap, called from request / job code) --
+
+    def record(self, job_id: str, created_at: Optional[float] = None) -> int:
+        """
+        (Re)measure a job's workspace after it has been written - blocking,
+        run it on the I/O pool. Returns its size. created_at (default: now)
+        only applies to a workspace seen for the first time.
+        """
+        size = workspace_size(self.root / job_id)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None:
+                entry = WorkspaceEntry(job_id=job_id, size=0, created_at=created_at or now, last_access=now)
+                self._entries[job_id] = entry
+            self._total += size - entry.size
+            entry.size, entry.last_access = size, now
+            over_quota = self.quota_bytes > 0 and self._total > self.quota_bytes
+
+        self._update_gauges()
+        if over_quota:
+            self._wake()
+        return size
+
+    def note_download(self, job_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None:
+                entry.last_access = now
+                if entry.downloaded_at is None:
+                    entry.downloaded_at = now
+
+    def forget(self, job_id: str) -> None:
+        """
+        Drop a workspace from the index (it was deleted elsewhere).
+        """
+        with self._lock:
+            entry = self._entries.pop(job_id, None)
+            if entry is not None:
+                self._total -= entry.size
+        self._update_gauges()
+
+    @contextmanager
+    def hold(self, job_id: str) -> Iterator[None]:
+        """
+        Keep a workspace from being evicted while a request uses it.
+        """
+        with self._lock:
+            self._held[job_id] = self._held.get(job_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._held[job_id] -= 1
+                if not self._held[job_id]:
+                    del self._held[job_id]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total
+
+    def entries(self) -> List[WorkspaceEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    # -- sweeps (blocking: run on the I/O pool) --
+
+    def adopt_orphans(self, now: Optional[float] = None) -> None:
+        """
+        Index workspaces on disk that nothing recorded (crash, failed
+        request, restart) once they are older than the grace period, and
+        forget index entries whose folder is gone. Only lists TEMP_ROOT.
+        """
+        now = time.time() if now is None else now
+
+        try:
+            with os.scandir(self.root) as it:
+                on_disk = {e.name: e for e in it if e.is_dir(follow_symlinks=False)}
+        except FileNotFoundError:
+            on_disk = {}
+
+        with self._lock:
+            known = set(self._entries)
+
+        for job_id in known - set(on_disk):
+            self.forget(job_id)
+
+        for job_id, entry in on_disk.items():
+            if job_id in known:
+                continue
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            if now - mtime < self.orphan_grace_s:
+                continue
+
+            size = workspace_size(Path(entry.path))
+            with self._lock:
+                if job_id not in self._entries:
+                    self._entries[job_id] = WorkspaceEntry(job_id=job_id, size=size, created_at=mtime, last_access=mtime)
+                    self._total += size
+
+        self._update_gauges()
+
+    def _evictable(self, entry: WorkspaceEntry) -> bool:
+        with self._lock:
+            if entry.job_id in self._held:
+                return False
+        try:
+            return not self.is_active(entry.job_id)
+        except Exception:
+            return False
+
+    def _evict(self, entry: WorkspaceEntry, reason: str) -> bool:
+        try:
+            shutil.rmtree(self.root / entry.job_id)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+
+        self.forget(entry.job_id)
+        try:
+            self.on_evict(entry.job_id)
+        except Exception:
+            pass
+        EVICTIONS.inc(reason=reason)
+        EVICTED_BYTES.inc(entry.size, reason=reason)
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        One pass: TTL evictions, then LRU evictions down to the quota.
+        Returns [(job_id, reason)] of the workspaces deleted.
+        """
+        now = time.time() if now is None else now
+        self.adopt_orphans(now)
+        evicted: List[Tuple[str, str]] = []
+
+        for entry in sorted(self.entries(), key=lambda e: e.created_at):
+            if self.ttl_s > 0 and now - entry.created_at >= self.ttl_s:
+                reason = "ttl"
+            elif self.download_ttl_s > 0 and entry.downloaded_at is not None and now - entry.downloaded_at >= self.download_ttl_s:
+                reason = "downloaded"
+            else:
+                continue
+            if self._evictable(entry) and self._evict(entry, reason):
+                evicted.append((entry.job_id, reason))
+
+        if self.quota_bytes > 0:
+            for entry in sorted(self.entries(), key=lambda e: e.last_access):
+                if self.total_bytes() <= self.quota_bytes:
+                    break
+                if self._evictable(entry) and self._evict(entry, "quota"):
+                    evicted.append((entry.job_id, "quota"))
+
+        try:
+            TEMP_FREE_BYTES.set(shutil.disk_usage(self.root).free)
+        except OSError:
+            pass
+
+        return evicted
+
+    def _update_gauges(self) -> None:
+        with self._lock:
+            TEMP_BYTES.set(self._total)
+            TEMP_JOBS.set(len(self._entries))
+
+    # -- background loop --
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # Loop already closed: the next start() sweeps anyway
+                pass
+
+    def start(self) -> None:
+        """
+        Start the sweep loop on the running loop (no-op if already running there).
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        from app.services.executors import run_io
+        from app.services.upload_sessions import expire_idle_sessions
+
+        while True:
+            try:
+                await expire_idle_sessions()
+                await run_io(self.sweep)
+                await run_io(_purge_job_records)
+            except Exception:
+                # A failed sweep (e.g. TEMP_ROOT briefly unavailable) must not end the loop
+                pass
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global singleton (created on first use)
+_JANITOR: Optional[TempJanitor] = None
+
+
+def get_janitor() -> TempJanitor:
+    """
+    Returns the process-wide janitor for settings.temp_root
+    (recreated if TEMP_ROOT changes, e.g. between tests).
+    """
+    global _JANITOR
+
+    root = settings.temp_root
+    if _JANITOR is None or _JANITOR.root != root:
+        _JANITOR = TempJanitor(
+            root=root,
+            ttl_s=settings.TEMP_TTL_S,
+            download_ttl_s=settings.TEMP_DOWNLOAD_TTL_S,
+            quota_bytes=settings.TEMP_QUOTA_MB * 1024 * 1024,
+            interval_s=settings.JANITOR_INTERVAL_S,
+            orphan_grace_s=settings.JANITOR_ORPHAN_GRACE_S,
+        )
+    return _JANITOR
@@ -0,0 +1,494 @@
+"""
+Background batch jobs.
+
+POST /predict/batch?mode=async streams the uploads into the job's raw/
+folder, records a queued JobRecord and returns 202. A small pool of
+asyncio workers (on the app's event loop, so jobs share the inference
+micro-batcher with synchronous requests) claims queued jobs and runs the
+same pipeline as the synchronous endpoint, reporting per-stage progress
+on the record as it goes.
+
+Backends:
+- "memory" (default): queue + records in this process
+- "sqlite": queue + records in TEMP_ROOT/jobs.sqlite3. Claims are atomic,
+  so several replicas sharing TEMP_ROOT (which they must anyway - that's
+  where the uploads live) share one queue. A claim is a lease: the worker
+  heartbeats while the job runs, and a job whose lease ran out
+  (JOB_LEASE_S - its replica died) is claimed again.
+
+Records go when the janitor evicts the job's workspace (their
+download_url would be dead), and finished ones at the latest TEMP_TTL_S
+after their last update.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.services.executors import run_io
+from app.services.inference import run_ingested_inference
+from app.services.pipeline import build_batch_response, finish_batch, organize_as_predicted
+from app.utils.file_naming import ensure_unique_filename
+from app.utils.image_io import IngestedUpload, ingest_upload, peek_image_format
+from app.utils.metrics import REGISTRY
+from app.utils.timing import StageTimings, record_stage_metrics
+from app.utils.temp_storage import cleanup_job, create_job_dirs, get_job_dirs
+
+# "open": an upload session still receiving files (see upload_sessions)
+JOB_STATES = ("open", "queued", "running", "succeeded", "failed")
+FINISHED_JOB_STATES = ("succeeded", "failed")
+PIPELINE_STAGES = ("ingest", "decode", "predict", "organize", "zip")
+
+JOBS_FINISHED = REGISTRY.counter(
+    "scene_sorter_jobs_finished_total",
+    "Background batch jobs finished, by final state.",
+)
+JOB_DURATION = REGISTRY.histogram(
+    "scene_sorter_job_duration_seconds",
+    "Time from a worker claiming a job to it finishing.",
+)
+
+# Global singleton (created on first use)
+_MANAGER: Optional["JobManager"] = None
+
+
+@dataclass
+class StageProgress:
+    state: str = "pending"      # pending | running | done | skipped
+    done: int = 0
+    total: int = 0
+
+
+@dataclass
+class JobRecord:
+    job_id: str
+    state: str = "queued"
+    inputs: List[Dict] = field(default_factory=list)      # IngestedUpload fields
+    options: Dict = field(default_factory=dict)            # top_k / unsure_threshold from the request
+    stages: Dict[str, StageProgress] = field(
+        default_factory=lambda: {name: StageProgress() for name in PIPELINE_STAGES}
+    )
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    error: Optional[str] = None
+    result: Optional[Dict] = None                          # BatchPredictResponse payload
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "JobRecord":
+        payload = json.loads(raw)
+        payload["stages"] = {name: StageProgress(**s) for name, s in payload.get("stages", {}).items()}
+        return cls(**payload)
+
+    def uploads(self) -> List[IngestedUpload]:
+        return [IngestedUpload(**{**item, "path": Path(item["path"])}) for item in self.inputs]
+
+
+def upload_to_input(upload: IngestedUpload) -> Dict:
+    return {**asdict(upload), "path": str(upload.path)}
+
+
+class MemoryJobBackend:
+    """
+    Queue + records in this process. Records are stored serialized so
+    callers never share mutable state with the store. No leases: a job
+    running here dies with the process that holds the records.
+    """
+
+    lease_s = 0.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: Dict[str, str] = {}
+        self._queue: Deque[str] = deque()
+
+    def enqueue(self, record: JobRecord) -> None:
+        with self._lock:
+            self._records[record.job_id] = record.to_json()
+            self._queue.append(record.job_id)
+
+    def claim(self) -> Optional[JobRecord]:
+        with self._lock:
+            while self._queue:
+                raw = self._records.get(self._queue.popleft())
+                if raw is None:
+                    continue
+                record = JobRecord.from_json(raw)
+                if record.state == "queued":
+                    record.state = "running"
+                    record.updated_at = time.time()
+                    self._records[record.job_id] = record.to_json()
+                    return record
+        return None
+
+    def save(self, record: JobRecord) -> None:
+        with self._lock:
+            self._records[record.job_id] = record.to_json()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            raw = self._records.get(job_id)
+        return JobRecord.from_json(raw) if raw is not None else None
+
+    def heartbeat(self, job_id: str) -> None:
+        pass
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._records.pop(job_id, None)
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            stale = []
+            for job_id, raw in self._records.items():
+                record = JobRecord.from_json(raw)
+                if record.state in FINISHED_JOB_STATES and record.updated_at < finished_before:
+                    stale.append(job_id)
+            for job_id in stale:
+                del self._records[job_id]
+        return len(stale)
+
+
+class SqliteJobBackend:
+    """
+    Queue + records in a sqlite file shared by every replica on the host /
+    volume - a local stand-in for Redis. A job is claimed by flipping its
+    state inside a write transaction, so exactly one worker gets it.
+
+    The updated_at column follows the record's and is also bumped by
+    heartbeats; a "running" job not touched for lease_s is claimable again.
+    """
+
+    def __init__(self, db_path: Path, lease_s: Optional[float] = None):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_s = float(settings.JOB_LEASE_S if lease_s is None else lease_s)
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly in claim()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " record TEXT NOT NULL,"
+            " updated_at REAL NOT NULL DEFAULT 0)"
+        )
+        # Databases created before leases
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "updated_at" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at)")
+
+    def enqueue(self, record: JobRecord) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, state, created_at, record, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (record.job_id, record.state, record.created_at, record.to_json(), record.updated_at),
+            )
+
+    def claim(self) -> Optional[JobRecord]:
+        """
+        Oldest queued job, or a running one whose lease expired.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._db.execute(
+                    "SELECT record FROM jobs"
+                    " WHERE state = 'queued' OR (state = 'running' AND ? > 0 AND updated_at < ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (self.lease_s, now - self.lease_s),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+
+                record = JobRecord.from_json(row[0])
+                record.state = "running"
+                record.updated_at = now
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, record = ?, updated_at = ? WHERE job_id = ?",
+                    (record.state, record.to_json(), now, record.job_id),
+                )
+                self._db.execute("COMMIT")
+                return record
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def save(self, record: JobRecord) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state = ?, record = ?, updated_at = ? WHERE job_id = ?",
+                (record.state, record.to_json(), record.updated_at, record.job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._db.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return JobRecord.from_json(row[0]) if row is not None else None
+
+    def heartbeat(self, job_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND state = 'running'", (time.time(), job_id)
+            )
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM jobs WHERE state IN (?, ?) AND updated_at < ?", (*FINISHED_JOB_STATES, finished_before)
+            )
+        return cursor.rowcount
+
+
+def _make_backend(name: str):
+    if name == "memory":
+        return MemoryJobBackend()
+    if name == "sqlite":
+        return SqliteJobBackend(settings.temp_root / "jobs.sqlite3")
+    raise HTTPException(
+        status_code=500,
+        detail=f"Unknown job backend '{name}'. Expected memory or sqlite."
+    )
+
+
+class JobManager:
+    """
+    Owns the backend and the worker tasks.
+
+    Workers live on the event loop that submitted / started them and are
+    re-created if the loop changes (same approach as MicroBatcher).
+    """
+
+    # Progress written to the backend at most this often while a stage runs
+    PROGRESS_SAVE_INTERVAL_S = 0.25
+
+    def __init__(self, backend, workers: int, poll_interval_ms: int):
+        self.backend = backend
+        self.workers = max(1, int(workers))
+        self.poll_interval_s = max(1, int(poll_interval_ms)) / 1000.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        """
+        Start the worker tasks on the running loop (no-op if already running there).
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._loop is loop and any(not t.done() for t in self._tasks):
+            return
+
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, record: JobRecord) -> None:
+        await run_io(self.backend.enqueue, record)
+        self.start()
+        self._wakeup.set()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        return self.backend.get(job_id)
+
+    def delete(self, job_id: str) -> None:
+        self.backend.delete(job_id)
+
+    def purge(self, max_age_s: float) -> int:
+        """
+        Delete finished records last updated more than max_age_s ago.
+        """
+        return self.backend.purge(time.time() - max_age_s)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        # A few beats per lease, so one slow write doesn't lose the job
+        interval = max(1.0, self.backend.lease_s / 4)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_io(self.backend.heartbeat, job_id)
+            except Exception:
+                pass
+
+    async def _worker(self) -> None:
+        while True:
+            record = await run_io(self.backend.claim)
+
+            if record is None:
+                # Woken early by local submits; the timeout picks up jobs
+                # enqueued by other replicas (sqlite backend)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(record)
+
+    async def _run(self, record: JobRecord) -> None:
+        started = time.perf_counter()
+        last_save = 0.0
+        pending_saves: List[asyncio.Future] = []
+
+        def save_soon() -> None:
+            # Throttled, fire-and-forget progress write (stage boundaries are awaited below)
+            nonlocal last_save
+            now = time.perf_counter()
+            if now - last_save >= self.PROGRESS_SAVE_INTERVAL_S:
+                last_save = now
+                record.updated_at = time.time()
+                snapshot = JobRecord.from_json(record.to_json())
+                pending_saves.append(asyncio.ensure_future(run_io(self.backend.save, snapshot)))
+
+        def on_progress(stage: str, done: int, total: int) -> None:
+            progress = record.stages[stage]
+            progress.state = "done" if done >= total else "running"
+            progress.done, progress.total = done, total
+            save_soon()
+
+        def on_stage(stage: str, state: str) -> None:
+            record.stages[stage].state = state
+            save_soon()
+
+        # No request (and no Server-Timing header) here: one StageTimings per job
+        timings = StageTimings()
+        heartbeat = asyncio.ensure_future(self._heartbeat(record.job_id)) if self.backend.lease_s > 0 else None
+
+        try:
+            job_dirs = await run_io(get_job_dirs, record.job_id)
+            organize = organize_as_predicted(job_dirs, timings)
+            if organize is not None:
+                on_stage("organize", "running")
+
+            predictions = await run_ingested_inference(
+                record.uploads(),
+                on_progress=on_progress,
+                unsure_threshold=record.options.get("unsure_threshold"),
+                on_predicted=organize,
+                timings=timings,
+            )
+            await finish_batch(
+                record.job_id, job_dirs, predictions, on_stage=on_stage, organized=organize is not None, timings=timings
+            )
+
+            response = build_batch_response(record.job_id, predictions, top_k=record.options.get("top_k", 1))
+            record.result = response.model_dump(exclude_none=True)
+            record.state = "succeeded"
+        except asyncio.CancelledError:
+            # Shutting down mid-job: put it back for another worker / replica
+            record.state = "queued"
+            await asyncio.gather(*pending_saves, return_exceptions=True)
+            await asyncio.shield(run_io(self.backend.enqueue, record))
+            raise
+        except HTTPException as e:
+            record.state = "failed"
+            record.error = str(e.detail)
+        except Exception as e:
+            record.state = "failed"
+            record.error = f"Job failed: {e}"
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+
+        # Never let a late progress write overwrite the final state
+        await asyncio.gather(*pending_saves, return_exceptions=True)
+
+        record.updated_at = time.time()
+        await run_io(self.backend.save, record)
+
+        JOBS_FINISHED.inc(state=record.state)
+        JOB_DURATION.observe(time.perf_counter() - started)
+        record_stage_metrics(timings)
+
+
+async def ingest_files(files: List[UploadFile], raw_dir: Path, existing_names: set[str]) -> List[IngestedUpload]:
+    """
+    Copy spooled uploads into raw_dir (size limit, format sniff, content
+    hash in one chunked copy each), concurrently on the I/O pool. Names are made unique
+    against (and added to) existing_names.
+    """
+    formats = await asyncio.gather(*(run_io(peek_image_format, f.file, f.filename or "") for f in files))
+
+    ingest_tasks = []
+    for f, image_format in zip(files, formats):
+        safe_name = ensure_unique_filename(f.filename or "image.jpg", existing_names, image_format)
+        ingest_tasks.append(run_io(ingest_upload, f.file, f.filename or safe_name, raw_dir / safe_name))
+
+    return list(await asyncio.gather(*ingest_tasks))
+
+
+async def submit_batch_job(
+    files: List[UploadFile],
+    top_k: int = 1,
+    unsure_threshold: Optional[float] = None,
+) -> JobRecord:
+    """
+    Accept a batch without running it:
+    - create the job workspace
+    - copy every spooled upload into raw/ (size limit, format sniff,
+      content hash) - concurrently on the I/O pool
+    - enqueue a JobRecord for the workers
+
+    Only the ingest step happens inside the request.
+    """
+    job_id = uuid4().hex
+    job_dirs = await run_io(create_job_dirs, job_id)
+
+    try:
+        uploads = await ingest_files(files, job_dirs["raw"], set())
+    except BaseException:
+        # Rejected upload (or client gone): nothing will ever run in this workspace
+        await asyncio.shield(run_io(cleanup_job, job_id))
+        raise
+
+    record = JobRecord(
+        job_id=job_id,
+        inputs=[upload_to_input(up) for up in uploads],
+        options={"top_k": top_k, "unsure_threshold": unsure_threshold},
+    )
+    record.stages["ingest"] = StageProgress(state="done", done=len(uploads), total=len(uploads))
+
+    await get_job_manager().submit(record)
+    return record
+
+
+def get_job_manager() -> JobManager:
+    """
+    Returns the process-wide job manager (backend from SCENE_SORTER_JOB_BACKEND).
+    """
+    global _MANAGER
+
+    if _MANAGER is None:
+        _MANAGER = JobManager(
+            backend=_make_backend(settings.JOB_BACKEND),
+            workers=settings.JOB_WORKERS,
+            poll_interval_ms=settings.JOB_POLL_INTERVAL_MS,
+        )
+    return _MANAGER
@@ -0,0 +1,288 @@
+"""
+Inference backends behind model_loader.get_model().
+
+Every backend exposes the same tiny interface:
+    backend.predict(batch)  # float32 (N,H,W,3), already preprocessed -> (N, num_classes)
+
+- "keras":  the exported .keras model via TensorFlow (heaviest import / RSS)
+- "tflite": a converted .tflite model on the LiteRT / TFLite interpreter
+            (XNNPACK CPU delegate). Prefers the standalone ai_edge_litert or
+            tflite_runtime packages, so serving doesn't need TensorFlow at all.
+- "onnx":   a converted .onnx model on ONNX Runtime (CPUExecutionProvider)
+- "stub":   no model file, no runtime: deterministic NumPy outputs with a
+            configurable latency (SCENE_SORTER_STUB_*) - for end-to-end
+            tests and for benchmarking the I/O pipeline without model cost
+
+Each runtime is imported only when its backend is constructed.
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.config import settings
+
+MODEL_BACKENDS = ("keras", "tflite", "onnx", "stub")
+
+# Shape of the stub backend's outputs
+STUB_DISTRIBUTIONS = ("onehot", "softmax", "uniform")
+
+
+def _num_threads(configured: int) -> int:
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+
+class ModelBackend:
+    name = "base"
+
+    def __init__(self, model_path: Path):
+        self.model_path = model_path
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class KerasBackend(ModelBackend):
+    name = "keras"
+
+    def __init__(self, model_path: Path, model=None):
+        super().__init__(model_path)
+
+        if model is None:
+            import tensorflow as tf
+            model = tf.keras.models.load_model(model_path)
+
+        self.model = model
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict(batch, verbose=0))
+
+
+def _load_tflite_interpreter_class():
+    """
+    Smallest runtime first: LiteRT, then tflite_runtime, then full TensorFlow.
+    """
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteBackend(ModelBackend):
+    """
+    The interpreter is resized to each batch's size (allocation is skipped
+    when the size repeats) and is not thread-safe, so calls are serialized.
+
+    Quantized (int8/uint8) inputs and outputs are (de)quantized here, so
+    callers always pass / get float32.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path: Path, num_threads: int = 0):
+        super().__init__(model_path)
+
+        Interpreter = _load_tflite_interpreter_class()
+        self._interpreter = Interpreter(model_path=str(model_path), num_threads=_num_threads(num_threads))
+        self._lock = threading.Lock()
+        self._batch_size: Optional[int] = None
+
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+
+    def _resize(self, batch_size: int) -> None:
+        # Caller holds self._lock
+        if batch_size == self._batch_size:
+            return
+
+        shape = list(self._input["shape"])
+        shape[0] = batch_size
+        self._interpreter.resize_tensor_input(self._input["index"], shape)
+        self._interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+        # Indices stay the same, shapes don't
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        with self._lock:
+            self._resize(batch.shape[0])
+
+            self._interpreter.set_tensor(self._input["index"], _quantize(batch, self._input))
+            self._interpreter.invoke()
+
+            out = self._interpreter.get_tensor(self._output["index"])
+            return _dequantize(out, self._output)
+
+
+def _quantize(batch: np.ndarray, detail) -> np.ndarray:
+    dtype = detail["dtype"]
+    if dtype == np.float32:
+        return np.ascontiguousarray(batch, dtype=np.float32)
+
+    scale, zero_point = detail["quantization"]
+    info = np.iinfo(dtype)
+    q = np.round(batch / scale + zero_point)
+    return np.clip(q, info.min, info.max).astype(dtype)
+
+
+def _dequantize(out: np.ndarray, detail) -> np.ndarray:
+    if detail["dtype"] == np.float32:
+        return out.copy()
+
+    scale, zero_point = detail["quantization"]
+    return (out.astype(np.float32) - zero_point) * scale
+
+
+class OnnxBackend(ModelBackend):
+    name = "onnx"
+
+    def __init__(self, model_path: Path, num_threads: int = 0):
+        super().__init__(model_path)
+
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = _num_threads(num_threads)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self._session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_name = self._session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        # InferenceSession.run is thread-safe
+        feed = {self._input_name: np.ascontiguousarray(batch, dtype=np.float32)}
+        return self._session.run(None, feed)[0]
+
+
+class StubBackend(ModelBackend):
+    """
+    Stand-in model: each image's output is a function of its pixels
+    (crc32 of a strided sample seeds its logits), so the same image gets
+    the same label on every run, in every process. predict() sleeps
+    latency_ms + per_image_ms * N first (GIL released, like a real model
+    busy on other cores).
+
+    distribution:
+    - "onehot":  probability 1.0 on one class (never unsure)
+    - "softmax": softmax of the seeded logits - spread-out confidences,
+                 some below a typical unsure threshold
+    - "uniform": 1/num_classes everywhere (everything is unsure)
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        model_path: Path,
+        num_classes: int = 6,
+        latency_ms: float = 0.0,
+        per_image_ms: float = 0.0,
+        distribution: str = "onehot",
+    ):
+        super().__init__(model_path)
+
+        if distribution not in STUB_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown stub distribution '{distribution}'. Expected one of: {', '.join(STUB_DISTRIBUTIONS)}."
+            )
+
+        self.num_classes = num_classes
+        self.latency_ms = latency_ms
+        self.per_image_ms = per_image_ms
+        self.distribution = distribution
+
+    def _logits(self, image: np.ndarray) -> np.ndarray:
+        sample = np.ascontiguousarray(image[::16, ::16])
+        rng = np.random.default_rng(zlib.crc32(sample.tobytes()))
+        return rng.normal(0.0, 2.0, size=self.num_classes)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        delay_ms = self.latency_ms + self.per_image_ms * batch.shape[0]
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+        n = batch.shape[0]
+        if self.distribution == "uniform":
+            return np.full((n, self.num_classes), 1.0 / self.num_classes, dtype=np.float32)
+
+        logits = np.stack([self._logits(image) for image in batch]) if n else np.empty((0, self.num_classes))
+        if self.distribution == "onehot":
+            probs = np.zeros((n, self.num_classes), dtype=np.float32)
+            probs[np.arange(n), logits.argmax(axis=1)] = 1.0
+            return probs
+
+        ex = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return (ex / ex.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _stub_num_classes() -> int:
+    # Match labels.json so the output shape check passes; 6 scene classes otherwise
+    try:
+        return len(json.loads(settings.labels_path.read_text(encoding="utf-8"))["class_names"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 6
+
+
+def load_stub_backend(model_path: Optional[Path] = None) -> StubBackend:
+    """
+    The stub backend as configured by SCENE_SORTER_STUB_*.
+    """
+    return StubBackend(
+        model_path or Path("stub"),
+        num_classes=_stub_num_classes(),
+        latency_ms=settings.STUB_LATENCY_MS,
+        per_image_ms=settings.STUB_LATENCY_PER_IMAGE_MS,
+        distribution=settings.STUB_DISTRIBUTION,
+    )
+
+
+def load_backend(name: str, model_path: Path, num_threads: int = 0) -> ModelBackend:
+    """
+    Build the backend `name` for the artifact at model_path.
+    """
+    if name not in MODEL_BACKENDS:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unknown model backend '{name}'. Expected one of: {', '.join(MODEL_BACKENDS)}."
+        )
+
+    try:
+        if name == "keras":
+            return KerasBackend(model_path)
+        if name == "tflite":
+            return TFLiteBackend(model_path, num_threads=num_threads)
+        if name == "stub":
+            return load_stub_backend(model_path)
+        return OnnxBackend(model_path, num_threads=num_threads)
+    except ImportError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Model backend '{name}' is not installed: {e}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to load model from '{model_path}': {e}"
+        )
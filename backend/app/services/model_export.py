@@ -0,0 +1,207 @@
+"""
+Export the Keras model to the lighter runtimes and check they still agree with it.
+
+Used by `python -m app.cli convert`. Needs TensorFlow (and tf2onnx for
+ONNX) - only at conversion time, never when serving a converted model.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.services.model_backends import ModelBackend
+from app.utils.preprocessing import load_batch
+
+SAMPLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+@dataclass(frozen=True)
+class AgreementReport:
+    backend: str
+    model_path: Path
+    samples: int
+    top1_agreement: float       # fraction of samples with the same argmax as the reference
+    max_abs_diff: float         # largest per-class probability difference
+
+
+def load_keras_model(model_path: Path):
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path)
+
+
+def export_tflite(keras_model, out_path: Path, converter_hook=None) -> Path:
+    """
+    Convert to a float32 .tflite flatbuffer (batch dimension stays dynamic).
+
+    converter_hook(converter) may tweak the TFLiteConverter before
+    conversion (e.g. quantization settings).
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if converter_hook is not None:
+        converter_hook(converter)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_bytes(converter.convert())
+    return out_path
+
+
+def export_onnx(keras_model, out_path: Path, opset: int = 13) -> Path:
+    """
+    Convert with tf2onnx (optional dependency, conversion time only).
+    """
+    import tensorflow as tf
+    import tf2onnx
+
+    input_shape = (None,) + tuple(keras_model.input_shape[1:])
+    signature = (tf.TensorSpec(input_shape, tf.float32, name="input"),)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tf2onnx.convert.from_keras(keras_model, input_signature=signature, opset=opset, output_path=str(out_path))
+    return out_path
+
+
+def list_samples(sample_dir: Path, limit: int) -> List[Path]:
+    paths = sorted(p for p in sample_dir.rglob("*") if p.suffix.lower() in SAMPLE_EXTENSIONS)
+    return paths[:limit]
+
+
+def sample_batch(sample_dir: Optional[Path], count: int, seed: int = 0) -> np.ndarray:
+    """
+    Model-ready float32 batch in [-1, 1]:
+    - decoded + preprocessed images from sample_dir (up to `count`)
+    - or, without a sample set, seeded random inputs (checks numerics only,
+      not behaviour on real photos)
+    """
+    if sample_dir is not None:
+        paths = list_samples(sample_dir, count)
+        if not paths:
+            raise ValueError(f"No sample images found in {sample_dir}")
+        return load_batch(paths)
+
+    from app.config import settings
+
+    h, w = settings.IMAGE_SIZE
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-1.0, 1.0, size=(count, h, w, 3)).astype(np.float32)
+
+
+def compare_backends(reference: ModelBackend, candidate: ModelBackend, batch: np.ndarray) -> AgreementReport:
+    ref = np.asarray(reference.predict(batch), dtype=np.float32)
+    out = np.asarray(candidate.predict(batch), dtype=np.float32)
+
+    return AgreementReport(
+        backend=candidate.name,
+        model_path=candidate.model_path,
+        samples=int(batch.shape[0]),
+        top1_agreement=float(np.mean(np.argmax(ref, axis=1) == np.argmax(out, axis=1))),
+        max_abs_diff=float(np.max(np.abs(ref - out))) if ref.size else 0.0,
+    )
+
+
+# Post-training quantized TFLite variants ("fp32" is the plain export)
+QUANT_VARIANTS = ("fp16", "int8")
+
+
+@dataclass(frozen=True)
+class QuantizationReport:
+    variant: str
+    model_path: Path
+    size_bytes: int
+    samples: int
+    labelled: int                       # samples with a ground-truth class (from their folder name)
+    reference_accuracy: Optional[float]  # float Keras model on the labelled samples
+    accuracy: Optional[float]           # this variant on the labelled samples
+    accuracy_delta: Optional[float]     # accuracy - reference_accuracy
+    top1_agreement: float               # vs. the float Keras model, all samples
+
+
+def variant_path(keras_path: Path, variant: str) -> Path:
+    """
+    best_finetuned_model.keras -> best_finetuned_model.tflite (fp32) /
+    best_finetuned_model_int8.tflite ...
+    """
+    suffix = "" if variant == "fp32" else f"_{variant}"
+    return keras_path.with_name(f"{keras_path.stem}{suffix}.tflite")
+
+
+def quantization_hook(variant: str, calibration: Optional[np.ndarray] = None):
+    """
+    TFLiteConverter settings for a variant:
+    - fp16: float16 weights (half the size, float32 compute on CPU)
+    - int8: full-integer kernels calibrated on `calibration`; inputs and
+      outputs stay float32 so serving code doesn't change
+    """
+    import tensorflow as tf
+
+    if variant not in QUANT_VARIANTS:
+        raise ValueError(f"Unknown quantization variant '{variant}'. Expected one of: {', '.join(QUANT_VARIANTS)}.")
+
+    if variant == "int8" and (calibration is None or not len(calibration)):
+        raise ValueError("int8 quantization needs a calibration batch.")
+
+    def hook(converter) -> None:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if variant == "fp16":
+            converter.target_spec.supported_types = [tf.float16]
+            return
+
+        def representative_dataset():
+            for i in range(calibration.shape[0]):
+                yield [calibration[i:i + 1]]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    return hook
+
+
+def sample_labels(sample_dir: Optional[Path], count: int, class_names: List[str]) -> np.ndarray:
+    """
+    Ground-truth class index per sample (same order as sample_batch), taken
+    from the image's parent folder name (e.g. samples/forest/x.jpg); -1
+    when the folder isn't one of labels.json's classes.
+    """
+    if sample_dir is None:
+        return np.full(count, -1, dtype=np.int64)
+
+    index = {name.lower(): i for i, name in enumerate(class_names)}
+    return np.array(
+        [index.get(p.parent.name.lower(), -1) for p in list_samples(sample_dir, count)],
+        dtype=np.int64,
+    )
+
+
+def evaluate_variant(
+    variant: str,
+    reference: ModelBackend,
+    candidate: ModelBackend,
+    batch: np.ndarray,
+    labels: np.ndarray,
+) -> QuantizationReport:
+    ref_top1 = np.argmax(reference.predict(batch), axis=1)
+    top1 = np.argmax(candidate.predict(batch), axis=1)
+
+    labelled = labels >= 0
+    n_labelled = int(np.count_nonzero(labelled))
+
+    reference_accuracy = accuracy = delta = None
+    if n_labelled:
+        reference_accuracy = float(np.mean(ref_top1[labelled] == labels[labelled]))
+        accuracy = float(np.mean(top1[labelled] == labels[labelled]))
+        delta = accuracy - reference_accuracy
+
+    return QuantizationReport(
+        variant=variant,
+        model_path=candidate.model_path,
+        size_bytes=candidate.model_path.stat().st_size,
+        samples=int(batch.shape[0]),
+        labelled=n_labelled,
+        reference_accuracy=reference_accuracy,
+        accuracy=accuracy,
+        accuracy_delta=delta,
+        top1_agreement=float(np.mean(ref_top1 == top1)),
+    )
@@ -1,46 +1,118 @@
+import hashlib
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
-import tensorflow as tf
 from fastapi import HTTPException
 
 from app.config import settings
+from app.services.model_backends import ModelBackend, StubBackend, load_backend, load_stub_backend
+from app.utils.metrics import REGISTRY
+
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "scene_sorter_model_load_seconds",
+    "Time the last model load took (inference workers report theirs to the API process).",
+)
 
 # Global singleton (loaded once)
-_MODEL: Optional[tf.keras.Model] = None
+_MODEL: Optional[ModelBackend] = None
+
+# (id of the model object / model path it was computed for, digest)
+_MODEL_FINGERPRINT: Optional[Tuple[object, str]] = None
+
+
+def _backend_name() -> str:
+    # The stub has no artifact, so no variant; quantized variants of a real
+    # model are TFLite exports whatever SCENE_SORTER_MODEL_BACKEND says
+    if settings.MODEL_BACKEND == "stub":
+        return "stub"
+    if settings.MODEL_VARIANT != "fp32":
+        return "tflite"
+    return settings.MODEL_BACKEND
+
+
+def _load_model_from_disk(model_path: Path, num_threads: Optional[int] = None) -> ModelBackend:
+    """
+    Load the model with the configured backend (SCENE_SORTER_MODEL_BACKEND /
+    SCENE_SORTER_MODEL_VARIANT).
+    """
+    if num_threads is None:
+        num_threads = settings.MODEL_NUM_THREADS
+    return load_backend(_backend_name(), model_path, num_threads=num_threads)
 
 
-def _load_model_from_disk(model_path: Path) -> tf.keras.Model:
+def load_model(num_threads: Optional[int] = None) -> ModelBackend:
     """
-    Load a Keras model from disk with safe defaults.
+    A new model backend instance from settings.model_path (not the
+    singleton) - what each inference worker process holds.
     """
-    try:
-        model = tf.keras.models.load_model(model_path)
-        return model
-    except Exception as e:
+    model_path = settings.model_path
+
+    # The stub backend has no artifact to read
+    if _backend_name() != "stub" and not model_path.exists():
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to load model from '{model_path}': {e}"
+            detail=f"Model file not found at: {model_path}"
         )
 
+    start = time.perf_counter()
+    model = _load_model_from_disk(model_path, num_threads)
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+    return model
 
-def get_model() -> tf.keras.Model:
+
+def get_model() -> ModelBackend:
     """
-    Returns a singleton Keras model instance.
+    Returns a singleton model backend instance (keras / tflite / onnx / stub).
     Loads the model only once during app lifetime.
     """
     global _MODEL
 
-    if _MODEL is not None:
-        return _MODEL
+    if _MODEL is None:
+        _MODEL = load_model()
+    return _MODEL
 
-    model_path = settings.model_path
 
-    if not model_path.exists():
-        raise HTTPException(
-            status_code=500,
-            detail=f"Model file not found at: {model_path}"
-        )
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-    _MODEL = _load_model_from_disk(model_path)
-    return _MODEL
+
+def get_model_identity() -> str:
+    """
+    Stable identity of the model currently serving predictions:
+    backend + sha256 of the model file + sha256 of labels.json.
+
+    The model part is computed once per loaded model object, so swapping
+    the model (new file, new singleton) yields a new identity. With
+    inference processes the model lives in the workers, so it is computed
+    once per model path instead (without loading the model here).
+    """
+    global _MODEL_FINGERPRINT
+
+    model = get_model() if settings.INFERENCE_PROCESSES <= 0 else None
+    key = id(model) if model is not None else str(settings.model_path)
+
+    if _MODEL_FINGERPRINT is None or _MODEL_FINGERPRINT[0] != key:
+        model_path = settings.model_path
+        if model is None and _backend_name() == "stub":
+            # The workers build theirs from the same settings
+            model = load_stub_backend(model_path)
+
+        if isinstance(model, StubBackend):
+            # Outputs depend only on the pixels, the distribution and the class count
+            digest = f"stub-{model.distribution}-{model.num_classes}"
+        elif model_path.exists():
+            digest = f"{_backend_name()}-{_file_digest(model_path)}"
+        else:
+            # Model injected without a file on disk (e.g. tests)
+            digest = f"object-{type(model).__name__}-{id(model):x}"
+        _MODEL_FINGERPRINT = (key, digest)
+
+    labels_path = settings.labels_path
+    labels_digest = _file_digest(labels_path) if labels_path.exists() else "no-labels"
+
+    return f"{_MODEL_FINGERPRINT[1]}:{labels_digest}"
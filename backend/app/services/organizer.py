@@ -1,11 +1,30 @@
+import errno
+import os
 import shutil
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, List, Optional
 
 from fastapi import HTTPException
 
+from app.config import settings
+from app.utils.metrics import REGISTRY
+from app.utils.predictions import prediction_rows
 
-def _safe_folder_name(name: str) -> str:
+ORGANIZED_FILES = REGISTRY.counter(
+    "scene_sorter_organized_files_total",
+    "Files placed into class folders, by method (hardlink/reflink/copy/move).",
+)
+
+LINK_STRATEGIES = ("auto", "hardlink", "reflink", "copy")
+
+# Low-confidence images go here instead of their argmax class
+UNSURE_FOLDER = "unsure"
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+
+def safe_folder_name(name: str) -> str:
     """
     Keep folder names predictable and filesystem-safe.
     """
@@ -15,22 +34,89 @@ def _safe_folder_name(name: str) -> str:
     return "".join(ch if ch.isalnum() or ch in {"-", "_"} else "_" for ch in name)
 
 
+def prediction_folder(label: str, unsure: bool = False) -> str:
+    """
+    Folder an image is filed under: its class, or unsure/ below the
+    confidence threshold.
+    """
+    return UNSURE_FOLDER if unsure else safe_folder_name(label)
+
+
+def _hardlink(src: Path, dst: Path) -> None:
+    os.link(src, dst)
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    """
+    Copy-on-write clone (btrfs, XFS, overlayfs on those...). Raises OSError
+    where the platform or filesystem can't clone.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+
+    with src.open("rb") as s, dst.open("wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            dst.unlink(missing_ok=True)
+            raise
+
+    shutil.copystat(src, dst)
+
+
+def _copy(src: Path, dst: Path) -> None:
+    shutil.copy2(src, dst)
+
+
+_METHODS = {
+    "hardlink": _hardlink,
+    "reflink": _reflink,
+    "copy": _copy,
+}
+
+
+def _methods_for(strategy: str) -> List[str]:
+    if strategy == "auto":
+        return ["hardlink", "reflink", "copy"]
+    if strategy in _METHODS:
+        # Explicit link strategies still fall back to a plain copy
+        return [strategy] if strategy == "copy" else [strategy, "copy"]
+    raise HTTPException(
+        status_code=500,
+        detail=f"Unknown organize strategy '{strategy}'. Expected one of: {', '.join(LINK_STRATEGIES)}."
+    )
+
+
 def organize_images(
     predictions: Iterable,
     raw_dir: Path,
     organized_dir: Path,
     copy_files: bool = True,
+    strategy: Optional[str] = None,
 ) -> None:
     """
     Organize images into class folders.
 
     Inputs:
-    - predictions: iterable of objects with attributes:
+    - predictions: PredictionBatch, or iterable of objects with attributes:
         - filename (str)
         - label (str)
+        - unsure (bool, optional) -> filed under unsure/ instead of label
     - raw_dir: folder containing the saved raw images
     - organized_dir: folder where class subfolders will be created
-    - copy_files: if True -> copy images, else -> move images
+    - copy_files: if True -> place images (see strategy), else -> move images
+    - strategy: how to place images when copy_files is True
+        (defaults to settings.ORGANIZE_STRATEGY)
+        - "auto": hardlink, then reflink, then copy
+        - "hardlink" / "reflink": that method, falling back to copy
+        - "copy": always copy
+
+    Links share the raw/ file's data blocks, so organizing costs no extra
+    disk writes or space. Once a method fails for one file (e.g. EXDEV
+    across filesystems) it isn't retried for the rest of the batch.
 
     Output:
     organized_dir/
@@ -40,18 +126,16 @@ def organize_images(
       mountain/
       sea/
       street/
+      unsure/
     """
     if not raw_dir.exists():
         raise HTTPException(status_code=500, detail=f"raw_dir not found: {raw_dir}")
 
     organized_dir.mkdir(parents=True, exist_ok=True)
 
-    op = shutil.copy2 if copy_files else shutil.move
-
-    for pred in predictions:
-        filename = getattr(pred, "filename", None)
-        label = getattr(pred, "label", None)
+    methods = ["move"] if not copy_files else _methods_for(strategy or settings.ORGANIZE_STRATEGY)
 
+    for filename, label, _, unsure in prediction_rows(predictions):
         if not filename or not label:
             raise HTTPException(
                 status_code=500,
@@ -65,16 +149,43 @@ def organize_images(
                 detail=f"Predicted file not found in raw_dir: {src_path}"
             )
 
-        folder_name = _safe_folder_name(label)
+        folder_name = prediction_folder(label, unsure)
         dest_folder = organized_dir / folder_name
         dest_folder.mkdir(parents=True, exist_ok=True)
 
         dest_path = dest_folder / filename
 
         try:
-            op(src_path, dest_path)
+            _place(src_path, dest_path, methods)
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to organize '{filename}' into '{folder_name}': {e}"
             )
+
+
+def _place(src_path: Path, dest_path: Path, methods: List[str]) -> None:
+    """
+    Try methods in order; drop the ones that fail from `methods` (in place)
+    so later files go straight to what works.
+    """
+    if methods == ["move"]:
+        shutil.move(src_path, dest_path)
+        ORGANIZED_FILES.inc(method="move")
+        return
+
+    # Re-running organize over the same job must not trip over old links
+    if dest_path.exists():
+        dest_path.unlink()
+
+    while True:
+        method = methods[0]
+        op: Callable[[Path, Path], None] = _METHODS[method]
+        try:
+            op(src_path, dest_path)
+            ORGANIZED_FILES.inc(method=method)
+            return
+        except OSError:
+            if len(methods) == 1:
+                raise
+            methods.pop(0)
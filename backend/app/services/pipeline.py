@@ -0,0 +1,157 @@
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.schemas import BatchPredictResponse, ImagePrediction, LabelScore
+from app.services.executors import run_io
+from app.services.janitor import get_janitor
+from app.services.organizer import organize_images
+from app.services.zipper import zip_folder, zip_predictions
+from app.utils.predictions import PredictionBatch
+from app.utils.temp_storage import save_job_manifest
+from app.utils.timing import StageTimings, current_timings
+
+# on_stage(stage, state) with state "running" | "done" | "skipped"
+StageFn = Callable[[str, str], None]
+
+
+def _report(on_stage: Optional[StageFn], stage: str, state: str) -> None:
+    if on_stage is not None:
+        on_stage(stage, state)
+
+
+def organize_as_predicted(
+    job_dirs: Dict[str, Path],
+    timings: Optional[StageTimings] = None,
+) -> Optional[Callable[[PredictionBatch], Awaitable[None]]]:
+    """
+    on_predicted callback for run_batch_inference / run_ingested_inference:
+    files each sub-batch into organized/ as soon as the model is done with
+    it, instead of after the whole batch. None when ORGANIZE_MATERIALIZE is
+    off (nothing to organize). Pass organized=True to finish_batch after.
+    """
+    if not settings.ORGANIZE_MATERIALIZE:
+        return None
+
+    timings = timings or current_timings()
+
+    async def organize(sub: PredictionBatch) -> None:
+        with timings.measure("organize"):
+            await run_io(
+                organize_images,
+                predictions=sub,
+                raw_dir=job_dirs["raw"],
+                organized_dir=job_dirs["organized"]
+            )
+
+    return organize
+
+
+async def finish_batch(
+    job_id: str,
+    job_dirs: Dict[str, Path],
+    predictions: PredictionBatch,
+    on_stage: Optional[StageFn] = None,
+    organized: bool = False,
+    timings: Optional[StageTimings] = None,
+) -> None:
+    """
+    Everything after inference, shared by /predict/batch and background jobs:
+    - record predictions so downloads can be (re)built from the job's files
+    - organize into class folders (unless ORGANIZE_MATERIALIZE is off, or
+      organized=True: already done sub-batch by sub-batch via
+      organize_as_predicted)
+    - build the zip (unless ZIP_MODE=stream, where /download builds it on the fly)
+    - record the workspace's size with the janitor
+
+    Blocking file work runs on the I/O pool.
+    """
+    timings = timings or current_timings()
+
+    try:
+        with timings.measure("manifest"):
+            await run_io(save_job_manifest, job_id, predictions)
+
+        if settings.ORGANIZE_MATERIALIZE and not organized:
+            _report(on_stage, "organize", "running")
+            # Organize images into folders by class (links where possible)
+            with timings.measure("organize"):
+                await run_io(
+                    organize_images,
+                    predictions=predictions,
+                    raw_dir=job_dirs["raw"],
+                    organized_dir=job_dirs["organized"]
+                )
+            _report(on_stage, "organize", "done")
+        elif organized:
+            _report(on_stage, "organize", "done")
+        else:
+            _report(on_stage, "organize", "skipped")
+
+        if settings.ZIP_MODE == "stream":
+            _report(on_stage, "zip", "skipped")
+            return
+
+        _report(on_stage, "zip", "running")
+
+        with timings.measure("zip"):
+            if settings.ORGANIZE_MATERIALIZE:
+                # Zip organized folder
+                await run_io(
+                    zip_folder,
+                    source_dir=job_dirs["organized"],
+                    job_id=job_id
+                )
+            else:
+                # Zip straight from raw/ with class-prefixed names (no organized/ copies)
+                await run_io(
+                    zip_predictions,
+                    raw_dir=job_dirs["raw"],
+                    predictions=predictions,
+                    job_id=job_id
+                )
+
+        _report(on_stage, "zip", "done")
+    finally:
+        # Size it once for the janitor (TTL / quota eviction), finished or not
+        await run_io(get_janitor().record, job_id)
+
+
+def image_predictions(predictions: PredictionBatch, top_k: int = 1) -> List[ImagePrediction]:
+    """
+    Response rows; with top_k > 1 the k best labels for every image come
+    from one batch-wide top-k over the probability matrix.
+    """
+    ranked = predictions.top_k_labels(top_k) if top_k > 1 else None
+
+    return [
+        ImagePrediction(
+            filename=filename,
+            label=label,
+            confidence=confidence,
+            unsure=unsure,
+            top_k=[LabelScore(label=name, probability=p) for name, p in ranked[i]] if ranked else None,
+        )
+        for i, (filename, label, confidence, unsure) in enumerate(predictions.rows())
+    ]
+
+
+def build_batch_response(
+    job_id: str,
+    predictions: PredictionBatch,
+    top_k: int = 1,
+    timings: Optional[StageTimings] = None,
+) -> BatchPredictResponse:
+    results = image_predictions(predictions, top_k)
+
+    return BatchPredictResponse(
+        job_id=job_id,
+        summary={
+            "total": len(predictions),
+            "by_class": predictions.counts_by_class(),
+            "unsure": int(predictions.unsure.sum())
+        },
+        results=results,
+        download_url=f"/download/{job_id}",
+        timings=timings.as_ms() if timings is not None else None
+    )
@@ -0,0 +1,161 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils.metrics import REGISTRY
+
+CACHE_HITS = REGISTRY.counter(
+    "scene_sorter_prediction_cache_hits_total",
+    "Uploads answered from the prediction cache.",
+)
+CACHE_MISSES = REGISTRY.counter(
+    "scene_sorter_prediction_cache_misses_total",
+    "Uploads that had to be decoded and run through the model.",
+)
+CACHE_ENTRIES = REGISTRY.gauge(
+    "scene_sorter_prediction_cache_entries",
+    "Probability vectors held in the in-memory LRU.",
+)
+
+# Global singleton (created on first use)
+_CACHE: Optional["PredictionCache"] = None
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Hash of the raw upload bytes (hashlib releases the GIL on large inputs).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class PredictionCache:
+    """
+    Probability vectors keyed by upload content hash, scoped to one model identity.
+
+    - In-memory LRU bounded to max_entries
+    - Optional sqlite store (db_path) that survives restarts
+    - Calling with a different model identity drops every entry computed by
+      the previous model (memory and disk), so a model swap invalidates
+      the cache automatically
+    """
+
+    def __init__(self, max_entries: int, db_path: Optional[Path] = None):
+        self.max_entries = max(0, int(max_entries))
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._identity: Optional[str] = None
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " identity TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " probs BLOB NOT NULL,"
+                " PRIMARY KEY (identity, digest))"
+            )
+            self._db.commit()
+
+    def _use_identity(self, identity: str) -> None:
+        # Caller holds self._lock
+        if identity == self._identity:
+            return
+
+        self._identity = identity
+        self._lru.clear()
+        CACHE_ENTRIES.set(0)
+
+        if self._db is not None:
+            self._db.execute("DELETE FROM predictions WHERE identity != ?", (identity,))
+            self._db.commit()
+
+    def get(self, identity: str, digest: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self._use_identity(identity)
+
+            probs = self._lru.get(digest)
+            if probs is not None:
+                self._lru.move_to_end(digest)
+                CACHE_HITS.inc()
+                return probs
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT probs FROM predictions WHERE identity = ? AND digest = ?",
+                    (identity, digest),
+                ).fetchone()
+                if row is not None:
+                    probs = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(digest, probs)
+                    CACHE_HITS.inc()
+                    return probs
+
+        CACHE_MISSES.inc()
+        return None
+
+    def put(self, identity: str, digest: str, probs: np.ndarray) -> None:
+        self.put_many(identity, [(digest, probs)])
+
+    def put_many(self, identity: str, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """
+        Store several vectors at once: with the sqlite store that is one
+        executemany and one commit (fsync) for the lot. Blocking when
+        persistent - run it on the I/O executor.
+        """
+        items = [(digest, np.ascontiguousarray(probs, dtype=np.float32)) for digest, probs in items]
+
+        with self._lock:
+            self._use_identity(identity)
+            for digest, probs in items:
+                self._remember(digest, probs)
+
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions (identity, digest, probs) VALUES (?, ?, ?)",
+                    [(identity, digest, probs.tobytes()) for digest, probs in items],
+                )
+                self._db.commit()
+
+    def _remember(self, digest: str, probs: np.ndarray) -> None:
+        # Caller holds self._lock
+        if self.max_entries == 0:
+            return
+
+        self._lru[digest] = probs
+        self._lru.move_to_end(digest)
+
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+        CACHE_ENTRIES.set(len(self._lru))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lru)
+
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """
+    Returns the process-wide cache, or None when disabled
+    (SCENE_SORTER_PREDICTION_CACHE_ENTRIES=0 and persistence off).
+    """
+    global _CACHE
+
+    if settings.PREDICTION_CACHE_ENTRIES <= 0 and not settings.PREDICTION_CACHE_PERSIST:
+        return None
+
+    if _CACHE is None:
+        db_path = None
+        if settings.PREDICTION_CACHE_PERSIST:
+            db_path = settings.temp_root / "prediction_cache.sqlite3"
+        _CACHE = PredictionCache(settings.PREDICTION_CACHE_ENTRIES, db_path=db_path)
+
+    return _CACHE
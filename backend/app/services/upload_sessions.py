@@ -0,0 +1,289 @@
+"""
+Upload sessions: one batch (one job_id, one zip) uploaded over many requests.
+
+    POST   /sessions                      -> open a session (job workspace + JobRecord "open")
+    POST   /sessions/{job_id}/files       -> append up to MAX_FILES_PER_BATCH files
+    POST   /sessions/{job_id}/finalize    -> manifest, organize, zip; returns the batch result
+    DELETE /sessions/{job_id}             -> abandon it and delete the workspace
+
+Every appended chunk is streamed into the job's raw/ folder and its
+inference starts right away in the background, so the model works on
+chunk k while the client uploads chunk k+1. Finalize only waits for the
+chunks still in flight, then runs the usual finish_batch() over the
+whole set. Progress is on GET /jobs/{job_id} like any other job.
+A chunk that fails (e.g. an undecodable image) fails the session right
+away: GET /jobs/{job_id} shows the error and the next append / finalize
+answers 409, so the client can stop uploading.
+
+Open sessions (the in-flight inference tasks) live in this process;
+with several replicas, a session's requests must reach the same one.
+A session with no upload for SESSION_IDLE_TTL_S is expired by the
+janitor loop: its record fails and its workspace becomes evictable.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from uuid import uuid4
+
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.services.executors import run_io
+from app.services.inference import run_ingested_inference
+from app.services.janitor import get_janitor
+from app.services.jobs import JobRecord, StageProgress, get_job_manager, ingest_files, upload_to_input
+from app.services.pipeline import build_batch_response, finish_batch
+from app.schemas import BatchPredictResponse
+from app.utils.predictions import PredictionBatch
+from app.utils.temp_storage import cleanup_job, create_job_dirs, get_job_dirs
+from app.utils.timing import StageTimings, record_stage_metrics
+
+
+@dataclass
+class UploadSession:
+    record: JobRecord
+    unsure_threshold: float
+    names: set = field(default_factory=set)
+    chunks: List["asyncio.Task[PredictionBatch]"] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Chunks outlive the request that appended them: one StageTimings per session
+    timings: StageTimings = field(default_factory=StageTimings)
+
+    @property
+    def job_id(self) -> str:
+        return self.record.job_id
+
+
+# job_id -> open session
+_SESSIONS: Dict[str, UploadSession] = {}
+
+# Sessions being closed because a chunk failed (keeps the tasks referenced)
+_CLOSING: Set["asyncio.Task[None]"] = set()
+
+
+async def _save(record: JobRecord) -> None:
+    record.updated_at = time.time()
+    await run_io(get_job_manager().backend.save, record)
+
+
+async def _get_open_session(job_id: str) -> UploadSession:
+    session = _SESSIONS.get(job_id)
+    if session is None:
+        record = await run_io(get_job_manager().get, job_id)
+        if record is not None and record.state == "failed":
+            raise HTTPException(status_code=409, detail=f"Upload session '{job_id}' failed: {record.error}")
+        raise HTTPException(status_code=404, detail=f"Upload session '{job_id}' not found or already finalized.")
+    return session
+
+
+def _check_still_open(session: UploadSession) -> None:
+    # Finalized / aborted by a request that held the lock before us
+    if _SESSIONS.get(session.job_id) is not session:
+        raise HTTPException(status_code=409, detail=f"Upload session '{session.job_id}' is already closed.")
+
+
+async def _close_failed(session: UploadSession, error: str) -> None:
+    """
+    Close a session that will never be finalized (caller holds its lock):
+    stop its chunks, mark the record failed and hand the workspace to the
+    janitor, which evicts it like any finished job.
+    """
+    _SESSIONS.pop(session.job_id, None)
+    for task in session.chunks:
+        task.cancel()
+    await asyncio.gather(*session.chunks, return_exceptions=True)
+    session.chunks.clear()
+
+    record = session.record
+    record.state = "failed"
+    record.error = error
+    await _save(record)
+    await run_io(get_janitor().record, session.job_id, record.created_at)
+    record_stage_metrics(session.timings)
+
+
+def _error_message(e: BaseException) -> str:
+    return str(e.detail) if isinstance(e, HTTPException) else f"Job failed: {e}"
+
+
+async def _fail_on_chunk_error(session: UploadSession, error: BaseException) -> None:
+    async with session.lock:
+        # Finalize / abort got there first and dealt with it
+        if _SESSIONS.get(session.job_id) is not session:
+            return
+        await _close_failed(session, _error_message(error))
+
+
+def _watch_chunk(session: UploadSession, task: "asyncio.Task[PredictionBatch]") -> None:
+    """
+    Fail the session as soon as one of its chunks fails (e.g. an
+    undecodable image), so the client learns it on its next append or
+    status poll instead of at finalize, after uploading everything else.
+    """
+    def on_done(t: "asyncio.Task[PredictionBatch]") -> None:
+        if t.cancelled() or t.exception() is None:
+            return
+        closing = asyncio.ensure_future(_fail_on_chunk_error(session, t.exception()))
+        _CLOSING.add(closing)
+        closing.add_done_callback(_CLOSING.discard)
+
+    task.add_done_callback(on_done)
+
+
+async def expire_idle_sessions(idle_ttl_s: Optional[float] = None, now: Optional[float] = None) -> List[str]:
+    """
+    Fail the open sessions nobody has uploaded to for idle_ttl_s (default
+    SESSION_IDLE_TTL_S; 0 = never). Sessions in use by a request or still
+    inferring a chunk are left alone. Returns the expired job_ids.
+    """
+    idle_ttl_s = settings.SESSION_IDLE_TTL_S if idle_ttl_s is None else idle_ttl_s
+    if idle_ttl_s <= 0:
+        return []
+    now = time.time() if now is None else now
+
+    expired: List[str] = []
+    for session in list(_SESSIONS.values()):
+        if session.lock.locked() or any(not task.done() for task in session.chunks):
+            continue
+        if now - session.record.updated_at < idle_ttl_s:
+            continue
+
+        async with session.lock:
+            if _SESSIONS.get(session.job_id) is not session:
+                continue
+            await _close_failed(session, f"Upload session expired after {idle_ttl_s:g} s without uploads.")
+        expired.append(session.job_id)
+
+    return expired
+
+
+async def open_session(unsure_threshold: Optional[float] = None) -> JobRecord:
+    job_id = uuid4().hex
+    await run_io(create_job_dirs, job_id)
+
+    threshold = settings.UNSURE_THRESHOLD if unsure_threshold is None else unsure_threshold
+    record = JobRecord(job_id=job_id, state="open", options={"unsure_threshold": threshold})
+    record.stages["ingest"].state = "running"
+
+    _SESSIONS[job_id] = UploadSession(record=record, unsure_threshold=threshold)
+    await _save(record)
+    return record
+
+
+async def append_files(job_id: str, files: List[UploadFile]) -> JobRecord:
+    """
+    Ingest one chunk and start its inference in the background.
+    """
+    session = await _get_open_session(job_id)
+    record = session.record
+
+    async with session.lock:
+        _check_still_open(session)
+
+        if len(record.inputs) + len(files) > settings.SESSION_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {settings.SESSION_MAX_FILES} files allowed per upload session."
+            )
+
+        job_dirs = await run_io(get_job_dirs, job_id)
+        uploads = await ingest_files(files, job_dirs["raw"], session.names)
+
+        record.inputs.extend(upload_to_input(up) for up in uploads)
+        total = len(record.inputs)
+        record.stages["ingest"] = StageProgress(state="running", done=total, total=total)
+        for stage in ("decode", "predict"):
+            progress = record.stages[stage]
+            progress.state, progress.total = "running", total
+
+        reported = {"decode": 0, "predict": 0}
+
+        def on_progress(stage: str, done: int, chunk_total: int) -> None:
+            # Chunks report their own counts; the record shows session totals
+            record.stages[stage].done += done - reported[stage]
+            reported[stage] = done
+
+        task = asyncio.ensure_future(
+            run_ingested_inference(
+                uploads,
+                on_progress=on_progress,
+                unsure_threshold=session.unsure_threshold,
+                timings=session.timings,
+            )
+        )
+        session.chunks.append(task)
+        _watch_chunk(session, task)
+        await _save(record)
+
+    return record
+
+
+async def finalize_session(job_id: str, top_k: int = 1) -> BatchPredictResponse:
+    """
+    Wait for the chunks still being inferred, then build the job's
+    manifest / class folders / zip over all of them.
+    """
+    session = await _get_open_session(job_id)
+    record = session.record
+
+    async with session.lock:
+        _check_still_open(session)
+
+        if not session.chunks:
+            raise HTTPException(status_code=400, detail="No files uploaded to this session.")
+
+        _SESSIONS.pop(job_id, None)
+        record.state = "running"
+        record.stages["ingest"].state = "done"
+        await _save(record)
+
+        def on_stage(stage: str, state: str) -> None:
+            record.stages[stage].state = state
+
+        try:
+            predictions = PredictionBatch.concat(await asyncio.gather(*session.chunks), session.unsure_threshold)
+            for stage in ("decode", "predict"):
+                record.stages[stage].state = "done"
+
+            job_dirs = await run_io(get_job_dirs, job_id)
+            await finish_batch(job_id, job_dirs, predictions, on_stage=on_stage, timings=session.timings)
+        except BaseException as e:
+            for task in session.chunks:
+                task.cancel()
+            await asyncio.gather(*session.chunks, return_exceptions=True)
+
+            record.state = "failed"
+            record.error = _error_message(e)
+            await asyncio.shield(_save(record))
+            # Never finalized: the janitor evicts it like any finished job
+            await asyncio.shield(run_io(get_janitor().record, job_id, record.created_at))
+            raise
+        finally:
+            record_stage_metrics(session.timings)
+
+        response = build_batch_response(job_id, predictions, top_k=top_k)
+        record.result = response.model_dump(exclude_none=True)
+        record.state = "succeeded"
+        await _save(record)
+
+    return response
+
+
+async def abort_session(job_id: str) -> None:
+    session = await _get_open_session(job_id)
+
+    async with session.lock:
+        _check_still_open(session)
+
+        _SESSIONS.pop(job_id, None)
+        for task in session.chunks:
+            task.cancel()
+        await asyncio.gather(*session.chunks, return_exceptions=True)
+
+        session.record.state = "failed"
+        session.record.error = "Upload session aborted."
+        await _save(session.record)
+        await run_io(cleanup_job, job_id)
+        get_janitor().forget(job_id)
+        record_stage_metrics(session.timings)
@@ -1,32 +1,109 @@
+from collections import deque
+from concurrent.futures import Executor, Future
 from pathlib import Path
-from zipfile import ZipFile, ZIP_DEFLATED
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 
 from fastapi import HTTPException
 
-from app.utils.temp_storage import get_job_dirs
+from app.config import settings
+from app.services.executors import get_zip_executor, zip_worker_count
+from app.services.organizer import prediction_folder
+from app.utils.image_io import SNIFF_BYTES, sniff_image_format
+from app.utils.predictions import prediction_rows
+from app.utils.temp_storage import get_job_dirs, load_job_manifest
+from app.utils.zip_stream import ZIP_DEFLATED, ZIP_STORED, PreparedEntry, ZipStreamWriter, prepare_entry
 
+ZipEntries = Iterable[Tuple[Path, str]]
 
-def zip_folder(source_dir: Path, job_id: str) -> Path:
-    """
-    Zip the organized folder for a given job_id.
+# Formats that are already compressed; deflating them again is wasted CPU
+ALREADY_COMPRESSED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".zip", ".gz"}
 
-    - source_dir: typically .../{job_id}/organized
-    - output: .../{job_id}/zips/organized_photos_{job_id}.zip
 
-    Returns:
-      Path to the created zip file.
+def zip_name(job_id: str) -> str:
+    return f"organized_photos_{job_id}.zip"
+
+
+def choose_compression(arcname: str, head: bytes, policy: str) -> int:
     """
-    if not source_dir.exists() or not source_dir.is_dir():
+    Per-entry compression method:
+    - "store" / "deflate": forced
+    - "auto": store JPEG/PNG/WebP (by extension or magic bytes) - they are
+      already compressed, so deflate burns CPU for ~0% gain - deflate the rest
+    """
+    if policy == "store":
+        return ZIP_STORED
+    if policy == "deflate":
+        return ZIP_DEFLATED
+    if policy != "auto":
         raise HTTPException(
             status_code=500,
-            detail=f"Source directory not found for zipping: {source_dir}"
+            detail=f"Unknown zip compression policy '{policy}'. Expected auto, store or deflate."
         )
 
+    if Path(arcname).suffix.lower() in ALREADY_COMPRESSED_EXTENSIONS:
+        return ZIP_STORED
+    if sniff_image_format(head[:SNIFF_BYTES]) is not None:
+        return ZIP_STORED
+    return ZIP_DEFLATED
+
+
+def _prepare_file_entry(file_path: Path, arcname: str, policy: str, level: int) -> PreparedEntry:
+    data = file_path.read_bytes()
+    return prepare_entry(
+        arcname,
+        data,
+        method=choose_compression(arcname, data, policy),
+        level=level,
+        mtime=file_path.stat().st_mtime,
+    )
+
+
+def iter_zip(
+    entries: ZipEntries,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> Iterator[bytes]:
+    """
+    Generate a zip archive chunk by chunk from (file on disk, arcname) pairs.
+
+    Entries are read and compressed in parallel on the zip executor, a
+    bounded window ahead of the writer, and emitted in order. Memory stays
+    at ~window entries; nothing touches disk.
+
+    compression / level default to settings.ZIP_COMPRESSION / ZIP_DEFLATE_LEVEL.
+    """
+    policy = compression or settings.ZIP_COMPRESSION
+    level = settings.ZIP_DEFLATE_LEVEL if level is None else level
+    executor = executor or get_zip_executor()
+    window = 2 * zip_worker_count()
+
+    writer = ZipStreamWriter()
+    pending: Deque[Future] = deque()
+    source = iter(entries)
+
+    try:
+        for file_path, arcname in source:
+            pending.append(executor.submit(_prepare_file_entry, file_path, arcname, policy, level))
+            if len(pending) >= window:
+                yield from writer.add(pending.popleft().result())
+
+        while pending:
+            yield from writer.add(pending.popleft().result())
+    finally:
+        # Client went away mid-stream: don't leave work queued
+        for fut in pending:
+            fut.cancel()
+
+    yield writer.finish()
+
+
+def _prepare_zip_path(job_id: str) -> Path:
     job_dirs = get_job_dirs(job_id)
     zips_dir = job_dirs["zips"]
     zips_dir.mkdir(parents=True, exist_ok=True)
 
-    zip_path = zips_dir / f"organized_photos_{job_id}.zip"
+    zip_path = zips_dir / zip_name(job_id)
 
     # If zip already exists, overwrite it
     if zip_path.exists():
@@ -38,18 +115,102 @@ def zip_folder(source_dir: Path, job_id: str) -> Path:
                 detail=f"Failed to overwrite existing zip: {zip_path} ({e})"
             )
 
+    return zip_path
+
+
+def _write_zip(zip_path: Path, job_id: str, entries: Iterable[Tuple[Path, str]]) -> Path:
+    """
+    entries: (file on disk, arcname inside the zip)
+    """
     try:
-        with ZipFile(zip_path, mode="w", compression=ZIP_DEFLATED) as zf:
-            # Walk all files and write them with relative paths
-            for file_path in source_dir.rglob("*"):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(source_dir)  # keep folder structure
-                    zf.write(file_path, arcname.as_posix())
+        with zip_path.open("wb") as out:
+            for chunk in iter_zip(entries):
+                out.write(chunk)
 
         return zip_path
 
     except Exception as e:
+        zip_path.unlink(missing_ok=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to create zip for job '{job_id}': {e}"
         )
+
+
+def zip_folder(source_dir: Path, job_id: str) -> Path:
+    """
+    Zip the organized folder for a given job_id.
+
+    - source_dir: typically .../{job_id}/organized
+    - output: .../{job_id}/zips/organized_photos_{job_id}.zip
+
+    Returns:
+      Path to the created zip file.
+    """
+    if not source_dir.exists() or not source_dir.is_dir():
+        raise HTTPException(
+            status_code=500,
+            detail=f"Source directory not found for zipping: {source_dir}"
+        )
+
+    zip_path = _prepare_zip_path(job_id)
+
+    return _write_zip(zip_path, job_id, _folder_entries(source_dir))
+
+
+def zip_predictions(raw_dir: Path, predictions: Iterable, job_id: str) -> Path:
+    """
+    Build the same archive as organize_images + zip_folder, straight from raw/:
+    each image is stored as "<class>/<filename>", so organized/ never has
+    to be materialized on disk.
+
+    Returns:
+      Path to the created zip file.
+    """
+    if not raw_dir.exists() or not raw_dir.is_dir():
+        raise HTTPException(
+            status_code=500,
+            detail=f"Source directory not found for zipping: {raw_dir}"
+        )
+
+    zip_path = _prepare_zip_path(job_id)
+
+    return _write_zip(zip_path, job_id, _prediction_entries(raw_dir, predictions))
+
+
+def _folder_entries(source_dir: Path) -> ZipEntries:
+    # Walk all files and write them with relative paths (keep folder structure)
+    return (
+        (file_path, file_path.relative_to(source_dir).as_posix())
+        for file_path in sorted(source_dir.rglob("*"))
+        if file_path.is_file()
+    )
+
+
+def _prediction_entries(raw_dir: Path, predictions: Iterable) -> ZipEntries:
+    return (
+        (raw_dir / filename, f"{prediction_folder(label, unsure)}/{filename}")
+        for filename, label, _, unsure in prediction_rows(predictions)
+    )
+
+
+def job_zip_entries(job_id: str) -> List[Tuple[Path, str]]:
+    """
+    Work out what a job's zip should contain without building it:
+    - organized/ when it was materialized
+    - otherwise raw/ + the job's saved predictions (class-prefixed names)
+    """
+    job_dirs = get_job_dirs(job_id)
+    organized_dir = job_dirs["organized"]
+
+    if organized_dir.exists() and any(p.is_file() for p in organized_dir.rglob("*")):
+        return list(_folder_entries(organized_dir))
+
+    manifest = load_job_manifest(job_id)
+    if manifest is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Zip not found. Run /predict/batch first to generate it."
+        )
+
+    return list(_prediction_entries(job_dirs["raw"], manifest))
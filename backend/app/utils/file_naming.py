@@ -1,8 +1,16 @@
 import re
 from pathlib import Path
+from typing import Optional
 
+# Sniffed image format -> extensions that are accurate for it (first = canonical)
+FORMAT_EXTENSIONS = {
+    "jpeg": (".jpg", ".jpeg"),
+    "png": (".png",),
+    "webp": (".webp",),
+}
 
-def make_safe_filename(filename: str) -> str:
+
+def make_safe_filename(filename: str, image_format: Optional[str] = None) -> str:
     """
     Convert an incoming filename into a safe filename.
 
@@ -10,6 +18,8 @@ def make_safe_filename(filename: str) -> str:
     - Keeps extension if present
     - Replaces unsafe characters
     - Ensures non-empty name
+    - If image_format (sniffed from magic bytes) is given, the extension is
+      corrected to match the actual content
     """
 
     # Remove any directory parts (Windows/Linux)
@@ -29,14 +39,17 @@ def make_safe_filename(filename: str) -> str:
     if suffix not in {".jpg", ".jpeg", ".png", ".webp"}:
         suffix = ".jpg"
 
+    if image_format in FORMAT_EXTENSIONS and suffix not in FORMAT_EXTENSIONS[image_format]:
+        suffix = FORMAT_EXTENSIONS[image_format][0]
+
     return f"{cleaned_stem}{suffix}"
 
 
-def ensure_unique_filename(filename: str, existing_names: set[str]) -> str:
+def ensure_unique_filename(filename: str, existing_names: set[str], image_format: Optional[str] = None) -> str:
     """
     If filename already exists in existing_names, append _1, _2, etc.
     """
-    safe = make_safe_filename(filename)
+    safe = make_safe_filename(filename, image_format)
 
     if safe not in existing_names:
         existing_names.add(safe)
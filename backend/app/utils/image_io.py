@@ -1,10 +1,13 @@
-from io import BytesIO
-from typing import List
+import hashlib
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple
 
 from fastapi import UploadFile, HTTPException
-from PIL import Image
 
 from app.config import settings
+from app.utils.timing import current_timings
 
 
 ALLOWED_IMAGE_TYPES = {
@@ -13,6 +16,52 @@ ALLOWED_IMAGE_TYPES = {
     "image/webp",
 }
 
+# Read uploads in bounded chunks (never the whole file at once)
+INGEST_CHUNK_SIZE = 1024 * 1024
+
+# Enough leading bytes to recognise every supported format
+SNIFF_BYTES = 12
+
+
+@dataclass(frozen=True)
+class IngestedUpload:
+    filename: str        # saved (safe, unique) filename inside raw/
+    original_name: str   # client-provided filename
+    path: Optional[Path] # raw/ path holding the original bytes (None: never saved)
+    size: int            # bytes
+    digest: str          # sha256 of the original bytes
+    image_format: str    # "jpeg" | "png" | "webp" (from magic bytes)
+
+
+def _max_upload_bytes() -> int:
+    return settings.MAX_FILE_SIZE_MB * 1024 * 1024
+
+
+def _too_large(filename: str, size: int) -> HTTPException:
+    size_mb = size / (1024 * 1024)
+    return HTTPException(
+        status_code=400,
+        detail=(
+            f"File '{filename}' is too large "
+            f"({size_mb:.2f} MB). "
+            f"Max allowed is {settings.MAX_FILE_SIZE_MB} MB."
+        )
+    )
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    """
+    Detect the image format from its first bytes (magic numbers).
+    Returns "jpeg", "png", "webp" or None.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
 
 async def validate_images(files: List[UploadFile]) -> None:
     """
@@ -20,43 +69,138 @@ async def validate_images(files: List[UploadFile]) -> None:
     - content type
     - file size
     """
-    for f in files:
-        if f.content_type not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {f.filename} ({f.content_type})"
-            )
-
-        # File size check (read without consuming stream)
-        contents = await f.read()
-        size_mb = len(contents) / (1024 * 1024)
-
-        if size_mb > settings.MAX_FILE_SIZE_MB:
-            raise HTTPException(
-                status_code=400,
-                detail=(
-                    f"File '{f.filename}' is too large "
-                    f"({size_mb:.2f} MB). "
-                    f"Max allowed is {settings.MAX_FILE_SIZE_MB} MB."
+    with current_timings().measure("validate"):
+        for f in files:
+            if f.content_type not in ALLOWED_IMAGE_TYPES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsupported file type: {f.filename} ({f.content_type})"
                 )
-            )
 
-        # Reset stream for later reading
-        await f.seek(0)
+            # Cheap early size check when the multipart parser already knows it;
+            # scan_upload / ingest_upload enforce the limit again while reading the spool.
+            size = getattr(f, "size", None)
+            if size is not None and size > _max_upload_bytes():
+                raise _too_large(f.filename, size)
 
 
-async def read_upload_as_pil_rgb(file: UploadFile) -> Image.Image:
+def peek_image_format(src: BinaryIO, original_name: str) -> str:
+    """
+    Sniff the format from the first bytes of an upload, leaving the stream
+    at position 0. Raises 400 for anything that isn't JPEG/PNG/WebP.
     """
-    Read an UploadFile into a PIL Image and convert to RGB.
+    src.seek(0)
+    head = src.read(SNIFF_BYTES)
+    src.seek(0)
+
+    image_format = sniff_image_format(head)
+    if image_format is None:
+        detail = "file is empty." if not head else "unrecognised image format."
+        raise HTTPException(status_code=400, detail=f"Invalid image file '{original_name}': {detail}")
+
+    return image_format
+
+
+def _stream_upload(src: BinaryIO, original_name: str, out: Optional[BinaryIO]) -> Tuple[int, str, str]:
+    """
+    One chunked read of a spooled upload: enforce the size limit, sniff,
+    hash and (optionally) write the bytes to `out`. Returns (size, sha256, format).
+
+    The limit only bounds what is kept: Starlette has already spooled the
+    whole body (in memory up to 1 MB, then a temp file) before the route
+    runs, so an oversized upload is fully received before it is rejected.
+    """
+    max_bytes = _max_upload_bytes()
+    hasher = hashlib.sha256()
+    size = 0
+    image_format = peek_image_format(src, original_name)
+
+    while True:
+        chunk = src.read(INGEST_CHUNK_SIZE)
+        if not chunk:
+            break
+
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(original_name, size)
+
+        hasher.update(chunk)
+        if out is not None:
+            out.write(chunk)
+
+    src.seek(0)
+    return size, hasher.hexdigest(), image_format
+
+
+def scan_upload(src: BinaryIO, original_name: str, filename: str, dest_path: Optional[Path] = None) -> IngestedUpload:
+    """
+    Validate and hash an upload without writing it anywhere (blocking - run
+    on the I/O executor). The bytes land in dest_path later via persist_upload,
+    so the disk write can overlap with inference; dest_path=None for uploads
+    that are only predicted from memory and never saved.
+
+    On that path the spool is read up to four times, always in chunks:
+    peek (first bytes), this scan, decode, persist. The size limit is
+    checked here, after the body was spooled (see _stream_upload).
     """
     try:
-        data = await file.read()
-        image = Image.open(BytesIO(data))
-        image = image.convert("RGB")
-        await file.seek(0)
-        return image
+        size, digest, image_format = _stream_upload(src, original_name, out=None)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid image file '{file.filename}': {e}"
-        )
+        raise HTTPException(status_code=400, detail=f"Invalid image file '{original_name}': {e}")
+
+    return IngestedUpload(
+        filename=filename,
+        original_name=original_name,
+        path=dest_path,
+        size=size,
+        digest=digest,
+        image_format=image_format,
+    )
+
+
+def persist_upload(src: BinaryIO, dest_path: Path) -> None:
+    """
+    Copy the original upload bytes verbatim into dest_path (no decode / re-encode).
+    """
+    try:
+        src.seek(0)
+        with dest_path.open("wb") as out:
+            shutil.copyfileobj(src, out, INGEST_CHUNK_SIZE)
+        src.seek(0)
+    except Exception as e:
+        dest_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=500, detail=f"Failed to save '{dest_path.name}': {e}")
+
+
+def ingest_upload(src: BinaryIO, original_name: str, dest_path: Path) -> IngestedUpload:
+    """
+    Copy one spooled upload into raw/ (blocking - run on the I/O executor):
+    - enforce MAX_FILE_SIZE_MB chunk by chunk while copying
+    - sniff the format from the first bytes
+    - hash the bytes for the prediction cache
+    - write the original bytes verbatim (no decode / re-encode)
+
+    Only one chunk is held in memory at a time. A rejected upload leaves no
+    partial file behind, but was already spooled in full by Starlette (the
+    limit is not enforced on the request stream, see _stream_upload).
+    """
+    try:
+        with dest_path.open("wb") as out:
+            size, digest, image_format = _stream_upload(src, original_name, out=out)
+    except HTTPException:
+        dest_path.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        dest_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"Failed to save '{dest_path.name}': {e}")
+
+    return IngestedUpload(
+        filename=dest_path.name,
+        original_name=original_name,
+        path=dest_path,
+        size=size,
+        digest=digest,
+        image_format=image_format,
+    )
@@ -0,0 +1,146 @@
+"""
+Batch prediction results, stored column-wise.
+
+PredictionBatch keeps the (N, num_classes) probability matrix plus the
+argmax / confidence / unsure columns computed once per batch in NumPy
+(top-k on demand, also batch-wide). Consumers that walk every image
+(response, manifest, organizer, zip) read the columns via
+prediction_rows(); per-image PredictionResult objects are only built
+when someone indexes or iterates the batch.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PredictionResult:
+    filename: str
+    label: str
+    confidence: float
+    probabilities: Sequence[float]
+    unsure: bool = False
+
+
+class PredictionBatch:
+    __slots__ = ("filenames", "class_names", "probabilities", "label_idx", "confidence", "unsure", "_labels")
+
+    def __init__(
+        self,
+        filenames: List[str],
+        class_names: List[str],
+        probabilities: np.ndarray,
+        unsure_threshold: float = 0.0,
+    ):
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+
+        if probabilities.shape != (len(filenames), len(class_names)):
+            raise ValueError(
+                f"Expected probabilities of shape {(len(filenames), len(class_names))}, got {probabilities.shape}"
+            )
+
+        self.filenames = filenames
+        self.class_names = class_names
+        self.probabilities = probabilities
+        self.label_idx = np.argmax(probabilities, axis=1)
+        self.confidence = np.take_along_axis(probabilities, self.label_idx[:, None], axis=1)[:, 0]
+        # Low-confidence images get reviewed instead of filed under their argmax
+        self.unsure = self.confidence < np.float32(unsure_threshold)
+        self._labels = None
+
+    @classmethod
+    def concat(cls, batches: Sequence["PredictionBatch"], unsure_threshold: float = 0.0) -> "PredictionBatch":
+        """
+        One batch from several (e.g. the chunks of an upload session), in order.
+        """
+        if not batches:
+            raise ValueError("Nothing to concatenate.")
+
+        return cls(
+            [name for b in batches for name in b.filenames],
+            batches[0].class_names,
+            np.concatenate([b.probabilities for b in batches], axis=0),
+            unsure_threshold,
+        )
+
+    @property
+    def labels(self) -> List[str]:
+        # One vectorized lookup instead of a Python loop per image
+        if self._labels is None:
+            names = np.asarray(self.class_names, dtype=object)
+            self._labels = names[self.label_idx].tolist()
+        return self._labels
+
+    def top_k(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (class indices, probabilities), each (N, k), best first - one
+        argpartition over the whole matrix, then a sort of only k columns.
+        """
+        num_classes = len(self.class_names)
+        k = max(1, min(int(k), num_classes))
+
+        if k == num_classes:
+            idx = np.argsort(-self.probabilities, axis=1, kind="stable")
+        else:
+            part = np.argpartition(-self.probabilities, k - 1, axis=1)[:, :k]
+            order = np.argsort(-np.take_along_axis(self.probabilities, part, axis=1), axis=1, kind="stable")
+            idx = np.take_along_axis(part, order, axis=1)
+
+        return idx, np.take_along_axis(self.probabilities, idx, axis=1)
+
+    def top_k_labels(self, k: int) -> List[List[Tuple[str, float]]]:
+        """
+        Per image: [(label, probability), ...] for the k most likely classes.
+        """
+        idx, probs = self.top_k(k)
+        names = np.asarray(self.class_names, dtype=object)[idx].tolist()
+        return [list(zip(n, p)) for n, p in zip(names, probs.tolist())]
+
+    def counts_by_class(self) -> Dict[str, int]:
+        """
+        {class: count} for the classes present, in labels.json order.
+        """
+        counts = np.bincount(self.label_idx, minlength=len(self.class_names))
+        return {self.class_names[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def rows(self) -> Iterator[Tuple[str, str, float, bool]]:
+        """
+        (filename, label, confidence, unsure) per image, without per-image objects.
+        """
+        return zip(self.filenames, self.labels, self.confidence.tolist(), self.unsure.tolist())
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def __getitem__(self, i: int) -> PredictionResult:
+        return PredictionResult(
+            filename=self.filenames[i],
+            label=self.labels[i],
+            confidence=float(self.confidence[i]),
+            probabilities=self.probabilities[i],
+            unsure=bool(self.unsure[i]),
+        )
+
+    def __iter__(self) -> Iterator[PredictionResult]:
+        return (self[i] for i in range(len(self)))
+
+
+def prediction_rows(predictions: Iterable) -> Iterator[Tuple[str, str, float, bool]]:
+    """
+    (filename, label, confidence, unsure) from a PredictionBatch (columnar
+    fast path) or any iterable of objects with those attributes (e.g. saved
+    manifest entries). Missing attributes come back as None (unsure: False).
+    """
+    if isinstance(predictions, PredictionBatch):
+        return predictions.rows()
+
+    return (
+        (
+            getattr(p, "filename", None),
+            getattr(p, "label", None),
+            getattr(p, "confidence", None),
+            bool(getattr(p, "unsure", False)),
+        )
+        for p in predictions
+    )
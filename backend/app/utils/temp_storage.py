@@ -1,10 +1,25 @@
+import json
 import shutil
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, List, Optional
 
 from fastapi import HTTPException
 
 from app.config import settings
+from app.utils.predictions import prediction_rows
+
+
+# Per-job record of predictions (lets downloads be built without organized/)
+MANIFEST_NAME = "predictions.json"
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    filename: str
+    label: str
+    confidence: float
+    unsure: bool = False
 
 
 def create_job_dirs(job_id: str) -> Dict[str, Path]:
@@ -85,3 +100,48 @@ def cleanup_job(job_id: str) -> None:
             status_code=500,
             detail=f"Failed to cleanup job '{job_id}': {e}"
         )
+
+
+def save_job_manifest(job_id: str, predictions: Iterable) -> Path:
+    """
+    Persist filename/label/confidence/unsure for every prediction of a job.
+    Written atomically (tmp file + rename) so readers never see half a file.
+    """
+    job_root = settings.temp_root / job_id
+    path = job_root / MANIFEST_NAME
+    tmp_path = path.with_suffix(".json.tmp")
+
+    entries = [
+        asdict(ManifestEntry(filename=filename, label=label, confidence=float(confidence), unsure=unsure))
+        for filename, label, confidence, unsure in prediction_rows(predictions)
+    ]
+
+    try:
+        tmp_path.write_text(json.dumps({"job_id": job_id, "results": entries}), encoding="utf-8")
+        tmp_path.replace(path)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save predictions for job '{job_id}': {e}"
+        )
+
+    return path
+
+
+def load_job_manifest(job_id: str) -> Optional[List[ManifestEntry]]:
+    """
+    Returns the saved predictions for a job, or None if none were saved.
+    """
+    path = settings.temp_root / job_id / MANIFEST_NAME
+
+    if not path.exists():
+        return None
+
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        return [ManifestEntry(**item) for item in payload.get("results", [])]
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to read predictions for job '{job_id}': {e}"
+        )
@@ -0,0 +1,122 @@
+"""
+Per-stage wall-clock timings for one request / job.
+
+Each stage records the intervals it was busy; overlapping intervals of
+the same stage (e.g. several decodes at once) are merged, so busy(stage)
+is how long that stage had anything in flight. When stages overlap each
+other (decode of sub-batch k+1 while k is on the model), the busy times
+add up to more than the wall time - overlap() makes that visible.
+
+The Server-Timing middleware binds one StageTimings per HTTP request
+(current_timings()), reports it in the response header and feeds the
+busy times into the scene_sorter_stage_seconds histogram on /metrics.
+Recording is a perf_counter() pair and a list append per interval, so
+it stays on in production.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.utils.metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "scene_sorter_stage_seconds",
+    "Busy time per pipeline stage, per request or background job.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class StageTimings:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.finished: float = 0.0
+        self._intervals: Dict[str, List[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, start: float, end: float) -> None:
+        with self._lock:
+            self._intervals.setdefault(stage, []).append((start, end))
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, start, time.perf_counter())
+
+    def stop(self) -> None:
+        self.finished = time.perf_counter()
+
+    def spans(self, stage: str) -> List[Tuple[float, float]]:
+        """
+        (start, end) perf_counter intervals recorded for a stage, in start order.
+        """
+        with self._lock:
+            return sorted(self._intervals.get(stage, []))
+
+    def stages(self) -> List[str]:
+        with self._lock:
+            return list(self._intervals)
+
+    def busy(self, stage: str) -> float:
+        """
+        Seconds during which the stage had at least one interval open.
+        """
+        total, end = 0.0, float("-inf")
+        for s, e in sorted(self._intervals.get(stage, [])):
+            if s > end:
+                total += e - s
+                end = e
+            elif e > end:
+                total += e - end
+                end = e
+        return total
+
+    def wall(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def overlap(self) -> float:
+        """
+        Sum of stage busy times / wall time: 1.0 = strictly sequential,
+        higher = stages running at the same time.
+        """
+        wall = self.wall()
+        return sum(self.busy(s) for s in self._intervals) / wall if wall > 0 else 0.0
+
+    def as_ms(self) -> Dict[str, float]:
+        out = {stage: round(self.busy(stage) * 1000.0, 2) for stage in self._intervals}
+        out["total"] = round(self.wall() * 1000.0, 2)
+        return out
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value, e.g. "decode;dur=41.2, predict;dur=88.0, total;dur=140.3".
+        """
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in self.as_ms().items())
+
+
+_CURRENT: ContextVar[Optional[StageTimings]] = ContextVar("scene_sorter_stage_timings", default=None)
+
+
+def bind_timings(timings: StageTimings) -> Token:
+    return _CURRENT.set(timings)
+
+
+def unbind_timings(token: Token) -> None:
+    _CURRENT.reset(token)
+
+
+def current_timings() -> StageTimings:
+    """
+    The StageTimings of the request being served, or a fresh (unreported)
+    one outside a request - CLI, tests, background jobs.
+    """
+    return _CURRENT.get() or StageTimings()
+
+
+def record_stage_metrics(timings: StageTimings) -> None:
+    for stage in timings.stages():
+        STAGE_SECONDS.observe(timings.busy(stage), stage=stage)
@@ -0,0 +1,212 @@
+"""
+Minimal ZIP writer that emits the archive as a sequence of byte chunks.
+
+Unlike zipfile.ZipFile it never seeks, so the same code can write a zip to
+disk or stream it straight into an HTTP response. Each entry is prepared
+(CRC + optional deflate) up front by prepare_entry(), which is a pure
+function and can run on any thread.
+"""
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+_UTF8_FLAG = 0x0800
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_MADE_BY_UNIX = 3 << 8
+_FILE_ATTRS = (0o100644 & 0xFFFF) << 16
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_ZIP64_END_OF_CENTRAL_DIR = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+_MAX_32 = 0xFFFFFFFF
+_MAX_16 = 0xFFFF
+
+
+@dataclass(frozen=True)
+class PreparedEntry:
+    arcname: bytes
+    method: int
+    crc: int
+    size: int               # uncompressed bytes
+    data: bytes             # bytes as stored in the archive
+    dos_time: int
+    dos_date: int
+
+
+@dataclass(frozen=True)
+class _CentralRecord:
+    entry: PreparedEntry
+    offset: int
+
+
+def _dos_datetime(mtime: Optional[float]) -> Tuple[int, int]:
+    t = time.localtime(mtime if mtime is not None else time.time())
+    year = max(t.tm_year, 1980)
+    dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    return dos_time, dos_date
+
+
+def prepare_entry(
+    arcname: str,
+    data: bytes,
+    method: int = ZIP_DEFLATED,
+    level: int = 6,
+    mtime: Optional[float] = None,
+) -> PreparedEntry:
+    """
+    CRC and (for ZIP_DEFLATED) raw-deflate one entry. zlib releases the GIL,
+    so entries can be prepared in parallel on a thread pool.
+    """
+    if len(data) >= _MAX_32:
+        raise ValueError(f"Entry too large for this writer: {arcname}")
+
+    crc = zlib.crc32(data) & _MAX_32
+
+    if method == ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        stored = compressor.compress(data) + compressor.flush()
+    elif method == ZIP_STORED:
+        stored = data
+    else:
+        raise ValueError(f"Unsupported compression method: {method}")
+
+    dos_time, dos_date = _dos_datetime(mtime)
+
+    return PreparedEntry(
+        arcname=arcname.encode("utf-8"),
+        method=method,
+        crc=crc,
+        size=len(data),
+        data=stored,
+        dos_time=dos_time,
+        dos_date=dos_date,
+    )
+
+
+class ZipStreamWriter:
+    """
+    Usage:
+        writer = ZipStreamWriter()
+        for entry in entries:
+            for chunk in writer.add(entry): out.write(chunk)
+        out.write(writer.finish())
+
+    ZIP64 records are only emitted when the archive outgrows 4 GiB or
+    65535 entries.
+    """
+
+    def __init__(self):
+        self._offset = 0
+        self._records: List[_CentralRecord] = []
+
+    @property
+    def bytes_written(self) -> int:
+        return self._offset
+
+    def add(self, entry: PreparedEntry) -> Tuple[bytes, bytes]:
+        """
+        Returns (local header, entry data) - write both, in order.
+        """
+        header = _LOCAL_HEADER.pack(
+            0x04034B50,
+            _VERSION,
+            _UTF8_FLAG,
+            entry.method,
+            entry.dos_time,
+            entry.dos_date,
+            entry.crc,
+            len(entry.data),
+            entry.size,
+            len(entry.arcname),
+            0,
+        ) + entry.arcname
+
+        self._records.append(_CentralRecord(entry=entry, offset=self._offset))
+        self._offset += len(header) + len(entry.data)
+
+        return header, entry.data
+
+    def finish(self) -> bytes:
+        """
+        Central directory + end-of-central-directory record(s).
+        """
+        cd_offset = self._offset
+        parts: List[bytes] = []
+
+        for record in self._records:
+            entry = record.entry
+            extra = b""
+            offset_field = record.offset
+            version = _VERSION
+
+            if record.offset >= _MAX_32:
+                extra = struct.pack("<HHQ", 0x0001, 8, record.offset)
+                offset_field = _MAX_32
+                version = _VERSION_ZIP64
+
+            parts.append(_CENTRAL_HEADER.pack(
+                0x02014B50,
+                _MADE_BY_UNIX | version,
+                version,
+                _UTF8_FLAG,
+                entry.method,
+                entry.dos_time,
+                entry.dos_date,
+                entry.crc,
+                len(entry.data),
+                entry.size,
+                len(entry.arcname),
+                len(extra),
+                0,
+                0,
+                0,
+                _FILE_ATTRS,
+                offset_field,
+            ))
+            parts.append(entry.arcname)
+            parts.append(extra)
+
+        cd_size = sum(len(p) for p in parts)
+        count = len(self._records)
+        needs_zip64 = count >= _MAX_16 or cd_offset >= _MAX_32 or cd_size >= _MAX_32
+
+        if needs_zip64:
+            zip64_offset = cd_offset + cd_size
+            parts.append(_ZIP64_END_OF_CENTRAL_DIR.pack(
+                0x06064B50,
+                _ZIP64_END_OF_CENTRAL_DIR.size - 12,
+                _MADE_BY_UNIX | _VERSION_ZIP64,
+                _VERSION_ZIP64,
+                0,
+                0,
+                count,
+                count,
+                cd_size,
+                cd_offset,
+            ))
+            parts.append(_ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_offset, 1))
+
+        parts.append(_END_OF_CENTRAL_DIR.pack(
+            0x06054B50,
+            0,
+            0,
+            min(count, _MAX_16),
+            min(count, _MAX_16),
+            min(cd_size, _MAX_32),
+            min(cd_offset, _MAX_32),
+            0,
+        ))
+
+        tail = b"".join(parts)
+        self._offset += len(tail)
+        return tail
@@ -0,0 +1,68 @@
+"""
+Synthetic image corpora for benchmarks.
+
+Images are smooth gradients plus noise so JPEG/PNG/WebP encoders produce
+realistic file sizes and decode costs (flat colours decode unrealistically fast).
+"""
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+PHONE_PHOTO_SIZE: Tuple[int, int] = (4032, 3024)  # 12 MP
+
+_EXT = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+
+def synthetic_image(size: Tuple[int, int], seed: int) -> Image.Image:
+    w, h = size
+    rng = np.random.default_rng(seed)
+
+    # Build at low res and upsample: cheap to generate, still photo-like
+    small_w, small_h = max(1, w // 8), max(1, h // 8)
+    x = np.linspace(0.0, 1.0, small_w, dtype=np.float32)[None, :, None]
+    y = np.linspace(0.0, 1.0, small_h, dtype=np.float32)[:, None, None]
+    phase = rng.uniform(0, 2 * np.pi, size=(1, 1, 3)).astype(np.float32)
+    base = 0.5 + 0.5 * np.sin(6.0 * x + 4.0 * y + phase)
+    noise = rng.normal(0.0, 0.08, size=(small_h, small_w, 3)).astype(np.float32)
+    arr = np.clip((base + noise) * 255.0, 0, 255).astype(np.uint8)
+
+    return Image.fromarray(arr, mode="RGB").resize((w, h), Image.BILINEAR)
+
+
+def write_corpus(
+    out_dir: Path,
+    count: int,
+    sizes: Sequence[Tuple[int, int]] = (PHONE_PHOTO_SIZE,),
+    formats: Sequence[str] = ("JPEG",),
+    quality: int = 90,
+) -> List[Path]:
+    """
+    Write `count` images cycling through sizes and formats. Existing files are reused.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+
+    for i in range(count):
+        size = sizes[i % len(sizes)]
+        fmt = formats[i % len(formats)].upper()
+        path = out_dir / f"synthetic_{i:05d}_{size[0]}x{size[1]}{_EXT[fmt]}"
+
+        if not path.exists():
+            img = synthetic_image(size, seed=i)
+            if fmt == "PNG":
+                img.save(path, fmt)
+            else:
+                img.save(path, fmt, quality=quality)
+
+        paths.append(path)
+
+    return paths
+
+
+def list_images(folder: Path) -> List[Path]:
+    return sorted(
+        p for p in folder.rglob("*")
+        if p.is_file() and p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"}
+    )
@@ -0,0 +1,107 @@
+"""
+Decode/resize throughput: legacy full decode vs. draft/reduce decode.
+
+  python -m benchmarks.decode                       # synthetic 12 MP JPEGs
+  python -m benchmarks.decode --images ~/Pictures   # your own folder
+
+"legacy" is the pre-draft path: full-resolution decode, convert("RGB"),
+resize + float conversion per image, then np.stack.
+"draft" is load_batch(): Image.draft()/reduce() decode straight into a
+preallocated (N,224,224,3) buffer.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.utils.preprocessing import load_batch
+from benchmarks.corpus import list_images, write_corpus
+from benchmarks.preprocess import legacy_preprocess
+
+
+def _legacy_one(data: bytes) -> np.ndarray:
+    img = Image.open(BytesIO(data)).convert("RGB")
+    return legacy_preprocess(img.resize((224, 224)))
+
+
+def legacy_batch(blobs: List[bytes], executor: Optional[ThreadPoolExecutor]) -> np.ndarray:
+    if executor is None:
+        processed = [_legacy_one(b) for b in blobs]
+    else:
+        processed = list(executor.map(_legacy_one, blobs))
+    return np.stack(processed, axis=0)
+
+
+def draft_batch(blobs: List[bytes], executor: Optional[ThreadPoolExecutor]) -> np.ndarray:
+    return load_batch(blobs, executor=executor)
+
+
+def _measure(fn: Callable, blobs: List[bytes], workers: int, repeats: int) -> float:
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        fn(blobs[:2], executor)  # warm-up
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn(blobs, executor)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return len(blobs) / best
+
+
+def run(blobs: List[bytes], worker_counts: List[int], repeats: int) -> List[Dict[str, float]]:
+    rows = []
+    for workers in worker_counts:
+        for name, fn in (("legacy", legacy_batch), ("draft", draft_batch)):
+            ips = _measure(fn, blobs, workers, repeats)
+            rows.append({
+                "path": name,
+                "workers": workers,
+                "images_per_sec": round(ips, 2),
+                "images_per_sec_per_core": round(ips / workers, 2),
+            })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=Path, help="Folder of images (default: synthetic 12 MP JPEGs)")
+    parser.add_argument("--count", type=int, default=24, help="Synthetic images to generate")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.images:
+        paths = list_images(args.images)
+    else:
+        corpus_dir = Path(tempfile.gettempdir()) / "scene_sorter_bench" / "jpeg_12mp"
+        paths = write_corpus(corpus_dir, args.count)
+
+    if not paths:
+        raise SystemExit("No images found.")
+
+    blobs = [p.read_bytes() for p in paths]
+    rows = run(blobs, sorted(set(args.workers)), args.repeats)
+
+    print(f"{len(blobs)} images, {sum(map(len, blobs)) / len(blobs) / 1e6:.2f} MB avg")
+    print(f"{'path':<8} {'workers':>7} {'img/s':>10} {'img/s/core':>11}")
+    for r in rows:
+        print(f"{r['path']:<8} {r['workers']:>7} {r['images_per_sec']:>10.2f} {r['images_per_sec_per_core']:>11.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Inference throughput vs. number of inference worker processes.
+
+  python -m benchmarks.inference_processes --reference                 # untrained MobileNetV2, 1..cpu_count workers
+  python -m benchmarks.inference_processes --reference --backend keras --workers 1 2 4
+  python -m benchmarks.inference_processes --images 256 --json out.json   # configured model (SCENE_SORTER_MODEL_*)
+
+Pushes the same preprocessed (N,224,224,3) batch through
+InferenceProcessPool.predict() - shared-memory hand-off to spawned
+workers, one model each, threads split evenly over the cores (as with
+SCENE_SORTER_INFERENCE_PROCESSES) - and reports best-of-`--repeats`
+images/s per worker count. "in-process" is the same model called
+directly in this process with all cores, for reference.
+
+Near-linear scaling needs at least as many free cores as workers; on
+a 1-2 core machine the sweep mostly shows the hand-off overhead.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.inference_pool import InferenceProcessPool
+from app.services.model_backends import load_backend
+
+
+def throughput(model, batch: np.ndarray, repeats: int) -> float:
+    model.predict(batch)  # warm-up
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(batch)
+        best = min(best, time.perf_counter() - start)
+
+    return batch.shape[0] / best
+
+
+def reference_artifacts(out_dir: Path, backend: str) -> Path:
+    from app.services.inference import _load_class_names
+    from app.services.model_export import export_tflite, load_keras_model, variant_path
+    from benchmarks.quantized import reference_model
+
+    keras_path = reference_model(out_dir, len(_load_class_names()))
+    if backend == "keras":
+        return keras_path
+    return export_tflite(load_keras_model(keras_path), variant_path(keras_path, "fp32"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts to try (default: 1..cpu_count)")
+    parser.add_argument("--backend", choices=["keras", "tflite"], help="Model backend (default: SCENE_SORTER_MODEL_BACKEND)")
+    parser.add_argument("--reference", action="store_true", help="Use an untrained MobileNetV2 (built once, in a temp dir)")
+    parser.add_argument("--images", type=int, default=128, help="Images per predict() call")
+    parser.add_argument("--slot-rows", type=int, default=settings.INFERENCE_MAX_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or list(range(1, cores + 1))
+
+    rng = np.random.default_rng(0)
+    batch = rng.uniform(-1.0, 1.0, size=(args.images, *settings.IMAGE_SIZE, 3)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory(prefix="scene_sorter_procs_") as tmp:
+        # Workers are spawned, so they read the model settings from the environment
+        if args.backend:
+            os.environ["SCENE_SORTER_MODEL_BACKEND"] = args.backend
+        if args.reference:
+            backend = args.backend or settings.MODEL_BACKEND
+            os.environ["SCENE_SORTER_MODEL_PATH"] = str(reference_artifacts(Path(tmp), backend))
+
+        backend_name = os.environ.get("SCENE_SORTER_MODEL_BACKEND", settings.MODEL_BACKEND)
+        model_path = Path(os.environ.get("SCENE_SORTER_MODEL_PATH", str(settings.model_path)))
+
+        rows: List[Dict] = [{
+            "workers": "in-process",
+            "images_per_s": round(throughput(load_backend(backend_name, model_path), batch, args.repeats), 1),
+        }]
+
+        for workers in worker_counts:
+            pool = InferenceProcessPool(workers=workers, slot_rows=args.slot_rows, image_size=settings.IMAGE_SIZE)
+            try:
+                rows.append({"workers": workers, "images_per_s": round(throughput(pool, batch, args.repeats), 1)})
+            finally:
+                pool.close()
+
+    base: Optional[float] = next((r["images_per_s"] for r in rows if r["workers"] == worker_counts[0]), None)
+
+    print(f"{args.images} images/call, {backend_name} backend, {cores} cores")
+    print(f"{'workers':>10} {'images/s':>9} {'speedup':>8} {'efficiency':>11}")
+    for r in rows:
+        if r["workers"] == "in-process":
+            print(f"{r['workers']:>10} {r['images_per_s']:>9.1f}")
+            continue
+        r["speedup"] = round(r["images_per_s"] / base, 2) if base else None
+        r["efficiency"] = round(r["speedup"] * worker_counts[0] / r["workers"], 2) if base else None
+        print(f"{r['workers']:>10} {r['images_per_s']:>9.1f} {r['speedup']:>7.2f}x {r['efficiency']:>10.0%}")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+API load benchmark: /predict and /predict/batch under concurrent clients.
+
+  python -m benchmarks.load                                    # in-process (ASGI), stub model
+  python -m benchmarks.load --transport asgi http --concurrency 1 4 16
+  python -m benchmarks.load --model configured                 # real weights (SCENE_SORTER_MODEL_*)
+  python -m benchmarks.load --url http://localhost:8000        # an already running server
+  python -m benchmarks.load --json after.json --compare before.json
+
+Transports:
+- asgi: requests go straight into the app through httpx's ASGI transport,
+  on one event loop with the clients - no sockets, no HTTP parsing
+- http: the app is served by uvicorn on a local port in this process, and
+  `--concurrency` httpx clients drive it over real connections
+- --url: an external server; its model and settings are its own, and the
+  RSS column is then this client's, not the server's
+
+Every scenario (endpoint x transport x concurrency) sends `--requests`
+requests after `--warmup` unrecorded ones, cycling through the same
+seeded synthetic corpus (mixed sizes, JPEG / PNG / WebP), and reports
+images/s, requests/s, p50/p95/p99 latency, errors and the peak RSS
+during the scenario. The prediction cache is off unless --cache, so
+repeated images are decoded and predicted every time.
+
+--json writes {"meta": ..., "results": [...]}; --compare prints the
+images/s and p95 change against an earlier file, scenario by scenario.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.corpus import write_corpus
+
+# name, bytes, content type
+CorpusFile = Tuple[str, bytes, str]
+
+CORPUS_SIZES = ((4032, 3024), (1600, 1200), (1200, 1600), (640, 480))
+CORPUS_FORMATS = ("JPEG", "JPEG", "PNG", "WEBP")
+_CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+ENDPOINTS = ("predict", "batch")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    endpoint: str
+    transport: str
+    concurrency: int
+    images_per_request: int
+
+    def key(self) -> Tuple:
+        return (self.endpoint, self.transport, self.concurrency, self.images_per_request)
+
+
+class PeakRss:
+    """
+    Peak resident set size over a window. On Linux the kernel's high-water
+    mark (VmHWM) is reset at the start of each window; elsewhere this falls
+    back to the process-lifetime peak (ru_maxrss).
+    """
+
+    def reset(self) -> None:
+        try:
+            with open("/proc/self/clear_refs", "w") as fh:
+                fh.write("5")
+        except OSError:
+            pass
+
+    def peak_mb(self) -> float:
+        try:
+            with open("/proc/self/status") as fh:
+                for line in fh:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_corpus(out_dir: Path, count: int) -> List[CorpusFile]:
+    """
+    Seeded synthetic images (reused if already written), held in memory so
+    client-side disk reads aren't part of the measurement.
+    """
+    paths = write_corpus(out_dir, count, sizes=CORPUS_SIZES, formats=CORPUS_FORMATS)
+    return [(p.name, p.read_bytes(), _CONTENT_TYPES[p.suffix]) for p in paths]
+
+
+def _request_files(scenario: Scenario, corpus: Sequence[CorpusFile], i: int):
+    if scenario.endpoint == "predict":
+        return "/predict", {"file": corpus[i % len(corpus)]}
+
+    start = i * scenario.images_per_request
+    picked = [corpus[(start + j) % len(corpus)] for j in range(scenario.images_per_request)]
+    return "/predict/batch", [("files", f) for f in picked]
+
+
+async def drive(client, scenario: Scenario, corpus: Sequence[CorpusFile], requests: int, warmup: int) -> Dict:
+    """
+    `scenario.concurrency` clients pull request numbers off a shared
+    counter until `requests` have been sent; returns latencies and errors.
+    """
+    for i in range(warmup):
+        path, files = _request_files(scenario, corpus, i)
+        await client.post(path, files=files)
+
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_request
+        while next_request < requests:
+            i = next_request
+            next_request += 1
+            path, files = _request_files(scenario, corpus, warmup + i)
+
+            start = time.perf_counter()
+            try:
+                res = await client.post(path, files=files)
+                ok = res.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(scenario.concurrency)))
+    return {"wall_s": time.perf_counter() - start, "latencies": latencies, "errors": errors}
+
+
+def summarize(scenario: Scenario, run: Dict, peak_rss_mb: Optional[float]) -> Dict:
+    latencies_ms = np.asarray(run["latencies"]) * 1000.0
+    requests = len(latencies_ms)
+    ok = requests - run["errors"]
+    images = ok * (1 if scenario.endpoint == "predict" else scenario.images_per_request)
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if requests else (0.0, 0.0, 0.0)
+
+    return {
+        "endpoint": scenario.endpoint,
+        "transport": scenario.transport,
+        "concurrency": scenario.concurrency,
+        "images_per_request": 1 if scenario.endpoint == "predict" else scenario.images_per_request,
+        "requests": requests,
+        "errors": run["errors"],
+        "wall_s": round(run["wall_s"], 3),
+        "images_per_s": round(images / run["wall_s"], 1) if run["wall_s"] > 0 else 0.0,
+        "requests_per_s": round(ok / run["wall_s"], 1) if run["wall_s"] > 0 else 0.0,
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "peak_rss_mb": round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+    }
+
+
+class _LocalServer:
+    """
+    uvicorn serving the app on 127.0.0.1:<free port> from a background
+    thread of this process (so the stub model injected here is the one
+    it serves).
+    """
+
+    def __init__(self, app) -> None:
+        import uvicorn
+
+        # lifespan off: the model is loaded / injected by the harness, no job workers needed
+        config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="bench-uvicorn", daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+async def _run_scenario(base_url: Optional[str], app, scenario: Scenario, corpus, args) -> Dict:
+    import httpx
+
+    if base_url is None:
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+    else:
+        limits = httpx.Limits(max_connections=scenario.concurrency)
+        client = httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits)
+
+    async with client:
+        return await drive(client, scenario, corpus, args.requests, args.warmup)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict:
+    transports = ["url"] if args.url else args.transport
+
+    scenarios = [
+        Scenario(endpoint, transport, concurrency, args.batch_size)
+        for endpoint in args.endpoints
+        for transport in transports
+        for concurrency in args.concurrency
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="scene_sorter_load_") as tmp:
+        corpus_dir = args.corpus_dir or Path(tmp) / "corpus"
+        corpus = load_corpus(corpus_dir, args.images)
+
+        app = None
+        if not args.url:
+            # Settings are read at import: configure before app.* is imported
+            os.environ["SCENE_SORTER_TEMP_ROOT"] = str(Path(tmp) / "workspace")
+            if not args.cache:
+                os.environ["SCENE_SORTER_PREDICTION_CACHE_ENTRIES"] = "0"
+                os.environ["SCENE_SORTER_PREDICTION_CACHE_PERSIST"] = "false"
+
+            from app.main import app
+            from app.services import model_loader
+            from app.services.inference import get_serving_model
+
+            if args.model == "stub":
+                from app.services.model_backends import StubBackend
+
+                model_loader._MODEL = StubBackend(Path("stub"), per_image_ms=args.stub_ms)
+            get_serving_model()
+
+        rss = PeakRss()
+        results: List[Dict] = []
+
+        for scenario in scenarios:
+            rss.reset()
+            if scenario.transport == "http":
+                with _LocalServer(app) as base_url:
+                    run = asyncio.run(_run_scenario(base_url, app, scenario, corpus, args))
+            else:
+                base_url = args.url if scenario.transport == "url" else None
+                run = asyncio.run(_run_scenario(base_url, app, scenario, corpus, args))
+
+            row = summarize(scenario, run, rss.peak_mb())
+            results.append(row)
+            if args.progress:
+                print(_format_row(row), flush=True)
+
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": "external" if args.url else args.model,
+        "stub_ms_per_image": args.stub_ms if args.model == "stub" and not args.url else None,
+        "prediction_cache": bool(args.cache),
+        "corpus_images": args.images,
+        "requests": args.requests,
+        "warmup": args.warmup,
+    }
+    return {"meta": meta, "results": results}
+
+
+_HEADER = (
+    f"{'endpoint':<8} {'transport':<9} {'conc':>4} {'img/req':>7} {'img/s':>8} {'req/s':>7} "
+    f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'rss MB':>7}"
+)
+
+
+def _format_row(r: Dict) -> str:
+    rss = f"{r['peak_rss_mb']:>7.0f}" if r["peak_rss_mb"] is not None else f"{'-':>7}"
+    return (
+        f"{r['endpoint']:<8} {r['transport']:<9} {r['concurrency']:>4} {r['images_per_request']:>7} "
+        f"{r['images_per_s']:>8.1f} {r['requests_per_s']:>7.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+        f"{r['p99_ms']:>8.1f} {r['errors']:>6} {rss}"
+    )
+
+
+def compare(current: Dict, baseline: Dict) -> List[Dict]:
+    """
+    images/s and p95 change per scenario present in both reports.
+    """
+    def key(r: Dict) -> Tuple:
+        return (r["endpoint"], r["transport"], r["concurrency"], r["images_per_request"])
+
+    before = {key(r): r for r in baseline.get("results", [])}
+    deltas: List[Dict] = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        deltas.append({
+            "scenario": key(r),
+            "images_per_s_change": round(r["images_per_s"] / old["images_per_s"] - 1, 3) if old["images_per_s"] else None,
+            "p95_change": round(r["p95_ms"] / old["p95_ms"] - 1, 3) if old["p95_ms"] else None,
+        })
+    return deltas
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--transport", nargs="+", choices=["asgi", "http"], default=["asgi"])
+    parser.add_argument("--url", help="Benchmark a running server instead of this process's app")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=40, help="Recorded requests per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Unrecorded requests before each scenario")
+    parser.add_argument("--batch-size", type=int, default=16, help="Images per /predict/batch request")
+    parser.add_argument("--images", type=int, default=32, help="Distinct images in the corpus")
+    parser.add_argument("--corpus-dir", type=Path, help="Keep the generated corpus here (reused across runs)")
+    parser.add_argument("--model", choices=["stub", "configured"], default="stub")
+    parser.add_argument("--stub-ms", type=float, default=5.0, help="Stub model time per image")
+    parser.add_argument("--cache", action="store_true", help="Leave the prediction cache on")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Earlier --json output to compare against")
+    parser.add_argument("--quiet", dest="progress", action="store_false", help="Only print the final table")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    args = parse_args(argv)
+
+    if args.progress:
+        print(_HEADER, flush=True)
+    report = run_benchmark(args)
+
+    if not args.progress:
+        print(_HEADER)
+        for row in report["results"]:
+            print(_format_row(row))
+
+    meta = report["meta"]
+    print(f"\n{meta['cpu_count']} cores, model={meta['model']}, corpus={meta['corpus_images']} images, cache={'on' if meta['prediction_cache'] else 'off'}")
+
+    if args.compare:
+        deltas = compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+        report["compared_to"] = {"file": str(args.compare), "changes": deltas}
+        print(f"\nvs {args.compare}:")
+        for d in deltas:
+            endpoint, transport, conc, per_req = d["scenario"]
+            ips = f"{d['images_per_s_change']:+.1%}" if d["images_per_s_change"] is not None else "n/a"
+            p95 = f"{d['p95_change']:+.1%}" if d["p95_change"] is not None else "n/a"
+            print(f"  {endpoint:<8} {transport:<9} c={conc:<3} images/s {ips:>8}  p95 {p95:>8}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Batch request wall time vs. pipeline sub-batch size.
+
+  python -m benchmarks.pipeline                                   # 48 x 12 MP JPEGs, simulated 15 ms/image model
+  python -m benchmarks.pipeline --images 96 --model-ms 30 --sub-batch 96 16 8 4
+  python -m benchmarks.pipeline --json out.json
+
+Runs run_batch_inference() over the same synthetic corpus once per
+sub-batch size and reports wall time plus busy time per stage (ingest,
+decode, predict, persist). A sub-batch equal to --images is the old
+behaviour: decode everything, then one predict. Smaller sub-batches let
+the model start on the first group while the rest are still decoding;
+"overlap" is the sum of stage busy times over wall time (1.0 = strictly
+sequential).
+
+The model is the stub backend (sleeps --model-ms per image, GIL
+released) so the numbers show the scheduling, not this machine's
+TensorFlow build.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+# Every run must decode and predict, not hit the previous run's results
+os.environ["SCENE_SORTER_PREDICTION_CACHE_ENTRIES"] = "0"
+
+from starlette.datastructures import UploadFile  # noqa: E402
+
+from app.services import model_loader  # noqa: E402
+from app.services.inference import run_batch_inference  # noqa: E402
+from app.services.model_backends import StubBackend  # noqa: E402
+from app.utils.timing import StageTimings  # noqa: E402
+from benchmarks.corpus import write_corpus  # noqa: E402
+
+
+async def run_once(paths: List[Path], out_dir: Path, sub_batch: int) -> StageTimings:
+    handles = [open(p, "rb") for p in paths]
+    try:
+        uploads = [UploadFile(file=fh, filename=p.name) for fh, p in zip(handles, paths)]
+        timings = StageTimings()
+        await run_batch_inference(uploads, out_dir, timings=timings, sub_batch_size=sub_batch)
+        timings.stop()
+        return timings
+    finally:
+        for fh in handles:
+            fh.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=48)
+    parser.add_argument("--model-ms", type=float, default=15.0, help="Simulated model time per image")
+    parser.add_argument("--sub-batch", type=int, nargs="+", help="Sub-batch sizes to try (default: images, 16, 8, 4)")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    sizes = args.sub_batch or [args.images, 16, 8, 4]
+    model_loader._MODEL = StubBackend(Path("stub"), per_image_ms=args.model_ms)
+
+    rows: List[Dict] = []
+    with tempfile.TemporaryDirectory(prefix="scene_sorter_pipeline_") as tmp:
+        os.environ["SCENE_SORTER_TEMP_ROOT"] = tmp
+        paths = write_corpus(Path(tmp) / "corpus", args.images)
+
+        for i, size in enumerate(sizes):
+            timings = asyncio.run(run_once(paths, Path(tmp) / f"run{i}", size))
+            stages = timings.as_ms()
+            rows.append({
+                "sub_batch": size,
+                "wall_ms": stages.pop("total"),
+                "overlap": round(timings.overlap(), 2),
+                **{f"{stage}_ms": ms for stage, ms in stages.items()},
+            })
+
+    print(f"{args.images} images, simulated model {args.model_ms:g} ms/image, {os.cpu_count()} cores")
+    print(f"{'sub-batch':>9} {'wall ms':>9} {'decode ms':>10} {'predict ms':>11} {'overlap':>8}")
+    for r in rows:
+        print(
+            f"{r['sub_batch']:>9} {r['wall_ms']:>9.0f} {r.get('decode_ms', 0):>10.0f} "
+            f"{r.get('predict_ms', 0):>11.0f} {r['overlap']:>8.2f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Pixels -> model input: bytes allocated and time per batch.
+
+  python -m benchmarks.preprocess                 # 50-image batches
+  python -m benchmarks.preprocess --batch 32 --repeats 20
+
+Starts from already-decoded 224x224 uint8 images, so only the
+preprocessing chain is measured:
+
+"legacy" is the old chain: per image np.asarray(float32) and / 255.0,
+np.stack, then astype(float32), * 255.0 and mobilenet_v2.preprocess_input
+(x / 127.5 - 1) - several full-size float copies that undo each other's
+scaling.
+"fused" is pixels_to_model_input() straight from uint8 into a pooled
+(N,224,224,3) buffer (BATCH_BUFFERS).
+
+Peak allocation per batch is measured with tracemalloc (NumPy reports
+its data buffers to it).
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.utils.preprocessing import BatchBufferPool, pixels_to_model_input
+
+
+def legacy_preprocess(pixels: np.ndarray) -> np.ndarray:
+    """
+    The pre-fusion per-image step: float32 copy, then scale to [0,1].
+    """
+    arr = np.asarray(pixels, dtype=np.float32)
+    arr = arr / 255.0
+    return arr
+
+
+def legacy_batch(images: List[np.ndarray], pool: BatchBufferPool) -> np.ndarray:
+    batch = np.stack([legacy_preprocess(img) for img in images], axis=0)
+    batch = batch.astype(np.float32)
+    batch = batch * 255.0
+    return batch / 127.5 - 1.0
+
+
+def fused_batch(images: List[np.ndarray], pool: BatchBufferPool) -> np.ndarray:
+    batch = pool.acquire(len(images))
+    for i, img in enumerate(images):
+        pixels_to_model_input(img, batch[i])
+    pool.release(batch)
+    return batch
+
+
+def measure(fn: Callable, images: List[np.ndarray], repeats: int) -> Dict[str, float]:
+    pool = BatchBufferPool(per_size=1)
+    fn(images, pool)  # warm-up (fills the pool for "fused")
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(images, pool)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn(images, pool)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ms_per_batch": round(best * 1000.0, 3),
+        "allocated_mb": round(peak / 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=50, help="Images per batch")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, size=(224, 224, 3), dtype=np.uint8) for _ in range(args.batch)]
+
+    legacy = legacy_batch(images, BatchBufferPool())
+    fused = fused_batch(images, BatchBufferPool())
+    max_diff = float(np.max(np.abs(legacy - fused)))
+
+    rows = []
+    for name, fn in (("legacy", legacy_batch), ("fused", fused_batch)):
+        rows.append({"path": name, "batch": args.batch, **measure(fn, images, args.repeats)})
+
+    batch_mb = args.batch * 224 * 224 * 3 * 4 / 1e6
+    print(f"{args.batch} images, model input {batch_mb:.1f} MB, max |legacy - fused| = {max_diff:.1e}")
+    print(f"{'path':<8} {'ms/batch':>9} {'peak allocated MB':>18}")
+    for r in rows:
+        print(f"{r['path']:<8} {r['ms_per_batch']:>9.2f} {r['allocated_mb']:>18.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
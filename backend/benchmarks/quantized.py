@@ -0,0 +1,144 @@
+"""
+Float vs. quantized model: latency, size and accuracy.
+
+  python -m benchmarks.quantized                                  # untrained MobileNetV2 reference
+  python -m benchmarks.quantized --model ../model/exported/best_finetuned_model.keras \
+      --calibration ~/data/calib --samples ~/data/val              # the real model
+
+Builds fp32 / fp16 / int8 TFLite exports of the model in a temp folder
+(same conversion as `python -m app.cli quantize`) and times
+backend.predict() for each, next to the Keras model, at several batch
+sizes. Without --model, a seeded, untrained MobileNetV2 (224x224, 6
+classes) stands in: the latency and size numbers are representative,
+accuracy/agreement numbers are not.
+
+--samples with <class>/ subfolders (labels.json names) adds accuracy vs.
+the float model.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.inference import _load_class_names
+from app.services.model_backends import KerasBackend, ModelBackend, load_backend
+from app.services.model_export import (
+    evaluate_variant,
+    export_tflite,
+    load_keras_model,
+    quantization_hook,
+    sample_batch,
+    sample_labels,
+    variant_path,
+)
+
+
+def reference_model(out_dir: Path, num_classes: int) -> Path:
+    """
+    Untrained MobileNetV2 with the same input size / head shape as ours.
+    """
+    import keras
+
+    keras.utils.set_random_seed(0)
+    base = keras.applications.MobileNetV2(input_shape=(224, 224, 3), include_top=False, weights=None)
+    x = keras.layers.GlobalAveragePooling2D()(base.output)
+    outputs = keras.layers.Dense(num_classes, activation="softmax")(x)
+
+    path = out_dir / "reference_mobilenetv2.keras"
+    keras.Model(base.input, outputs).save(path)
+    return path
+
+
+def time_backend(backend: ModelBackend, batch_sizes: List[int], repeats: int, seed: int = 0) -> Dict[int, float]:
+    """
+    Best-of-`repeats` milliseconds per image, per batch size.
+    """
+    rng = np.random.default_rng(seed)
+    out = {}
+
+    for n in batch_sizes:
+        batch = rng.uniform(-1.0, 1.0, size=(n, 224, 224, 3)).astype(np.float32)
+        backend.predict(batch)  # warm-up (allocations, kernel selection)
+
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            backend.predict(batch)
+            best = min(best, time.perf_counter() - start)
+
+        out[n] = best * 1000.0 / n
+
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, help="Float .keras model (default: untrained MobileNetV2 reference)")
+    parser.add_argument("--calibration", type=Path, help="Images for int8 calibration (default: random inputs)")
+    parser.add_argument("--calibration-count", type=int, default=100)
+    parser.add_argument("--samples", type=Path, help="Evaluation images, ideally in <class>/ folders")
+    parser.add_argument("--count", type=int, default=64, help="Max evaluation samples")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="TFLite interpreter threads")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    class_names = _load_class_names()
+
+    with tempfile.TemporaryDirectory(prefix="scene_sorter_quant_") as tmp:
+        work_dir = Path(tmp)
+        keras_path = args.model or reference_model(work_dir, len(class_names))
+        keras_model = load_keras_model(keras_path)
+
+        calibration = sample_batch(args.calibration, args.calibration_count, seed=1)
+        batch = sample_batch(args.samples, args.count)
+        labels = sample_labels(args.samples, args.count, class_names)
+
+        reference = KerasBackend(keras_path, model=keras_model)
+        rows = [{
+            "variant": "keras",
+            "size_mb": round(keras_path.stat().st_size / 1e6, 2),
+            "ms_per_image": time_backend(reference, args.batch_sizes, args.repeats),
+            "accuracy": None,
+            "top1_agreement": 1.0,
+        }]
+
+        for variant in ("fp32", "fp16", "int8"):
+            out_path = work_dir / variant_path(keras_path, variant).name
+            hook = None if variant == "fp32" else quantization_hook(variant, calibration)
+            export_tflite(keras_model, out_path, converter_hook=hook)
+
+            backend = load_backend("tflite", out_path, num_threads=args.threads)
+            report = evaluate_variant(variant, reference, backend, batch, labels)
+
+            rows.append({
+                "variant": f"tflite-{variant}",
+                "size_mb": round(report.size_bytes / 1e6, 2),
+                "ms_per_image": time_backend(backend, args.batch_sizes, args.repeats),
+                "accuracy": report.accuracy,
+                "reference_accuracy": report.reference_accuracy,
+                "top1_agreement": report.top1_agreement,
+            })
+
+    baseline = rows[1]["ms_per_image"]  # tflite-fp32
+
+    header = " ".join(f"{'bs=' + str(n):>9}" for n in args.batch_sizes)
+    print(f"{'variant':<14} {'MB':>6} {header} {'speedup':>8} {'agree':>7} {'acc':>7}")
+    for r in rows:
+        speedup = baseline[args.batch_sizes[-1]] / r["ms_per_image"][args.batch_sizes[-1]]
+        cells = " ".join(f"{r['ms_per_image'][n]:>7.2f}ms" for n in args.batch_sizes)
+        acc = f"{r['accuracy']:.2%}" if r["accuracy"] is not None else "n/a"
+        print(f"{r['variant']:<14} {r['size_mb']:>6.2f} {cells} {speedup:>7.2f}x {r['top1_agreement']:>7.2%} {acc:>7}")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Process startup cost: `import app.main` and time-to-first-prediction.
+
+  python -m benchmarks.startup                        # configured model (SCENE_SORTER_MODEL_*)
+  python -m benchmarks.startup --reference            # untrained MobileNetV2 as .keras + .tflite
+  python -m benchmarks.startup --reference --backends keras tflite
+
+Every measurement runs in a fresh interpreter (nothing warm in
+sys.modules), `--runs` times; the median is reported with the peak RSS
+of that process.
+
+- import app.main:  what tests, CLI tools and /health probes pay
+- import tensorflow: for reference - what every process used to pay
+- first prediction: import + model load + one image through
+  decode -> preprocess -> predict, per backend
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+_PROBE_PREFIX = """
+import resource, sys, time
+t0 = time.perf_counter()
+"""
+
+_PROBE_SUFFIX = """
+elapsed = time.perf_counter() - t0
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{elapsed} {rss_mb} {int('tensorflow' in sys.modules)}")
+"""
+
+PROBES = {
+    "import app.main": "import app.main",
+    "import tensorflow": "import tensorflow",
+    "first prediction": """
+import app.main
+import numpy as np
+from PIL import Image
+from io import BytesIO
+from app.services.model_loader import get_model
+from app.utils.preprocessing import load_batch
+
+buf = BytesIO()
+Image.new("RGB", (1024, 768), (90, 140, 200)).save(buf, "JPEG")
+batch = load_batch([buf.getvalue()])
+get_model().predict(batch)
+""",
+}
+
+
+def run_probe(code: str, env: Dict[str, str]) -> Dict[str, float]:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE_PREFIX + code + _PROBE_SUFFIX],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env, "TF_CPP_MIN_LOG_LEVEL": "3"},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "probe failed")
+
+    elapsed, rss_mb, tf_loaded = proc.stdout.strip().splitlines()[-1].split()
+    return {"seconds": float(elapsed), "rss_mb": float(rss_mb), "tensorflow_imported": bool(int(tf_loaded))}
+
+
+def measure(name: str, code: str, env: Dict[str, str], runs: int) -> Dict:
+    try:
+        samples = [run_probe(code, env) for _ in range(runs)]
+    except RuntimeError as e:
+        return {"probe": name, "error": str(e)}
+
+    return {
+        "probe": name,
+        "seconds": round(statistics.median(s["seconds"] for s in samples), 3),
+        "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "tensorflow_imported": samples[0]["tensorflow_imported"],
+    }
+
+
+def reference_models(out_dir: Path) -> Dict[str, Path]:
+    from app.services.inference import _load_class_names
+    from app.services.model_export import export_tflite, load_keras_model, variant_path
+    from benchmarks.quantized import reference_model
+
+    keras_path = reference_model(out_dir, len(_load_class_names()))
+    tflite_path = export_tflite(load_keras_model(keras_path), variant_path(keras_path, "fp32"))
+    return {"keras": keras_path, "tflite": tflite_path}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=[None], help="Model backends to time first prediction for")
+    parser.add_argument("--reference", action="store_true", help="Use an untrained MobileNetV2 (built once, in a temp dir)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows: List[Dict] = [
+        measure("import app.main", PROBES["import app.main"], {}, args.runs),
+        measure("import tensorflow", PROBES["import tensorflow"], {}, args.runs),
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="scene_sorter_startup_") as tmp:
+        models: Optional[Dict[str, Path]] = reference_models(Path(tmp)) if args.reference else None
+
+        for backend in args.backends:
+            env: Dict[str, str] = {}
+            if backend:
+                env["SCENE_SORTER_MODEL_BACKEND"] = backend
+            if models is not None:
+                env["SCENE_SORTER_MODEL_PATH"] = str(models[backend or "keras"])
+
+            row = measure("first prediction", PROBES["first prediction"], env, args.runs)
+            row["backend"] = backend or os.getenv("SCENE_SORTER_MODEL_BACKEND", "keras")
+            rows.append(row)
+
+    print(f"{'probe':<18} {'backend':<8} {'seconds':>8} {'rss MB':>8} {'tf':>4}")
+    for r in rows:
+        if "error" in r:
+            print(f"{r['probe']:<18} {r.get('backend', ''):<8} error: {r['error']}")
+            continue
+        tf = "yes" if r["tensorflow_imported"] else "no"
+        print(f"{r['probe']:<18} {r.get('backend', ''):<8} {r['seconds']:>8.3f} {r['rss_mb']:>8.1f} {tf:>4}")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
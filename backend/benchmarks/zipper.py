@@ -0,0 +1,90 @@
+"""
+Zip build time: the old zipfile path vs. app.services.zipper.
+
+  python -m benchmarks.zipper                 # 12 phone-ish JPEGs + PNGs
+  python -m benchmarks.zipper --count 48 --workers 8
+
+"legacy" is zipfile.ZipFile deflating every entry on one thread.
+"deflate" and "auto" are iter_zip() with entries prepared in parallel;
+"auto" stores already-compressed formats (JPEG/PNG/WebP) as-is.
+"""
+import argparse
+import io
+import json
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from app.services.zipper import iter_zip
+from benchmarks.corpus import write_corpus
+
+SIZES = ((1600, 1200), (1200, 1600))
+FORMATS = ("JPEG", "JPEG", "JPEG", "PNG")
+
+Entries = List[Tuple[Path, str]]
+
+
+def corpus_entries(out_dir: Path, count: int) -> Entries:
+    paths = write_corpus(out_dir, count, sizes=SIZES, formats=FORMATS)
+    return [(p, f"class_{i % 6}/{p.name}") for i, p in enumerate(paths)]
+
+
+def legacy_zip(entries: Entries) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for file_path, arcname in entries:
+            zf.write(file_path, arcname)
+    return buf.getvalue()
+
+
+def _measure(fn: Callable[[], bytes], repeats: int) -> Tuple[float, int]:
+    best, size = float("inf"), 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def run(entries: Entries, workers: int, repeats: int) -> List[Dict[str, float]]:
+    # Warm the page cache so every path measures zip work, not disk reads
+    legacy_zip(entries)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        paths = (
+            ("legacy", lambda: legacy_zip(entries)),
+            ("deflate", lambda: b"".join(iter_zip(entries, compression="deflate", executor=pool))),
+            ("auto", lambda: b"".join(iter_zip(entries, compression="auto", executor=pool))),
+        )
+        rows = []
+        for name, fn in paths:
+            seconds, size = _measure(fn, repeats)
+            rows.append({"path": name, "ms": round(seconds * 1000.0, 1), "mb": round(size / 1e6, 2)})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=12, help="Synthetic images to generate")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    corpus_dir = Path(tempfile.gettempdir()) / "scene_sorter_bench" / "zip_corpus"
+    rows = run(corpus_entries(corpus_dir, args.count), args.workers, args.repeats)
+
+    print(f"zip {args.count} images, {args.workers} workers")
+    print(f"{'path':<8} {'ms':>8} {'MB':>7}")
+    for r in rows:
+        print(f"{r['path']:<8} {r['ms']:>8.1f} {r['mb']:>7.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Shared test setup: a TEMP_ROOT of its own for every test that asks for
+one, and the NumPy stub model (SCENE_SORTER_MODEL_BACKEND=stub) standing
+in for the TensorFlow model.
+"""
+import io
+from pathlib import Path
+from typing import Callable, Tuple
+
+import pytest
+from PIL import Image
+
+from app.services import jobs, model_loader
+from app.services.model_backends import StubBackend
+
+Color = Tuple[int, int, int]
+
+
+def _image_bytes(color: Color, size: Tuple[int, int], fmt: str) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, fmt)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def png_bytes() -> Callable[..., bytes]:
+    def make(color: Color, size: Tuple[int, int] = (32, 32)) -> bytes:
+        return _image_bytes(color, size, "PNG")
+    return make
+
+
+@pytest.fixture
+def jpeg_bytes() -> Callable[..., bytes]:
+    def make(color: Color, size: Tuple[int, int] = (320, 240)) -> bytes:
+        return _image_bytes(color, size, "JPEG")
+    return make
+
+
+@pytest.fixture
+def temp_root(tmp_path, monkeypatch) -> Path:
+    """
+    SCENE_SORTER_TEMP_ROOT for this test, with a fresh job manager (its
+    records and sqlite file live under TEMP_ROOT).
+    """
+    monkeypatch.setenv("SCENE_SORTER_TEMP_ROOT", str(tmp_path))
+    monkeypatch.setattr(jobs, "_MANAGER", None)
+    return tmp_path
+
+
+@pytest.fixture
+def use_model(temp_root, monkeypatch) -> Callable:
+    """
+    use_model(model) serves `model` for this test; use_model(**options)
+    serves a StubBackend built with those options. Returns the model.
+    """
+    def install(model=None, **stub_options):
+        if model is None:
+            model = StubBackend(Path("stub"), **stub_options)
+        monkeypatch.setattr(model_loader, "_MODEL", model)
+        return model
+    return install
+
+
+@pytest.fixture
+def stub_model(use_model) -> StubBackend:
+    """
+    The one-hot stub: every image gets one label (same image, same label), confidence 1.0.
+    """
+    return use_model()
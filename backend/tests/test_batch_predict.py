@@ -1,5 +1,5 @@
-import os
-from pathlib import Path
+import io
+import zipfile
 
 from fastapi.testclient import TestClient
 
@@ -17,3 +17,51 @@ def test_batch_endpoint_exists():
 def test_download_not_found_for_unknown_job():
     res = client.get("/download/does_not_exist")
     assert res.status_code == 404
+
+
+# End-to-end through the real pipeline with the NumPy stub backend
+# (SCENE_SORTER_MODEL_BACKEND=stub) standing in for the TensorFlow model
+
+def test_batch_predict_end_to_end(stub_model, jpeg_bytes):
+    colors = [(200, 30, 30), (30, 200, 30), (30, 30, 200), (200, 30, 30)]
+    files = [("files", (f"photo{i}.jpg", jpeg_bytes(c), "image/jpeg")) for i, c in enumerate(colors)]
+
+    res = client.post("/predict/batch", files=files)
+    assert res.status_code == 200
+    body = res.json()
+
+    assert body["summary"]["total"] == 4
+    labels = [r["label"] for r in body["results"]]
+    # Deterministic: identical images get identical labels
+    assert labels[0] == labels[3]
+    assert all(r["confidence"] == 1.0 for r in body["results"])
+
+    archive = client.get(body["download_url"])
+    assert archive.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(archive.content)) as zf:
+        assert sorted(zf.namelist()) == sorted(f"{label}/photo{i}.jpg" for i, label in enumerate(labels))
+
+
+def test_single_predict_end_to_end_with_unsure(use_model, temp_root, jpeg_bytes):
+    use_model(distribution="uniform")
+
+    res = client.post("/predict?unsure_threshold=0.5&top_k=2", files={"file": ("x.jpg", jpeg_bytes((90, 90, 90)), "image/jpeg")})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["unsure"] is True
+    assert abs(body["confidence"] - 1 / 6) < 1e-6
+    assert len(body["top_k"]) == 2
+    # Diskless by default: nothing written under TEMP_ROOT
+    assert "job_id" not in body
+    assert list(temp_root.iterdir()) == []
+
+
+def test_single_predict_persist_gets_its_own_workspace(stub_model, temp_root, jpeg_bytes):
+    upload = {"file": ("same.jpg", jpeg_bytes((10, 120, 200)), "image/jpeg")}
+    first = client.post("/predict?persist=true", files=upload).json()
+    second = client.post("/predict?persist=true", files=upload).json()
+
+    assert first["job_id"] != second["job_id"]
+    for body in (first, second):
+        assert (temp_root / body["job_id"] / "raw" / "same.jpg").read_bytes() == upload["file"][1]
+    assert not (temp_root / "single").exists()
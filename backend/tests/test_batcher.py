@@ -0,0 +1,66 @@
+import asyncio
+
+import numpy as np
+
+from app.services.batcher import MicroBatcher
+from app.utils.metrics import REGISTRY
+
+
+def _fake_predict(calls):
+    async def predict(batch: np.ndarray) -> np.ndarray:
+        calls.append(batch.shape[0])
+        # One "probability" row per input, tagged with the input value
+        return np.repeat(batch.reshape(batch.shape[0], -1)[:, :1], 2, axis=1)
+    return predict
+
+
+def test_concurrent_requests_share_one_forward_pass():
+    calls = []
+    batcher = MicroBatcher(_fake_predict(calls), max_batch_size=32, window_ms=50)
+
+    async def run():
+        inputs = [np.full((n, 1), i, dtype=np.float32) for i, n in enumerate((1, 2, 3))]
+        return inputs, await asyncio.gather(*(batcher.predict(x) for x in inputs))
+
+    inputs, outputs = asyncio.run(run())
+
+    assert calls == [6]
+    for x, out in zip(inputs, outputs):
+        assert out.shape == (x.shape[0], 2)
+        assert np.all(out == x[0, 0])
+
+
+def test_max_batch_size_flushes_without_waiting_for_window():
+    calls = []
+    batcher = MicroBatcher(_fake_predict(calls), max_batch_size=2, window_ms=10_000)
+
+    async def run():
+        xs = [np.zeros((1, 1), dtype=np.float32) for _ in range(4)]
+        return await asyncio.wait_for(asyncio.gather(*(batcher.predict(x) for x in xs)), timeout=5)
+
+    outputs = asyncio.run(run())
+
+    assert calls == [2, 2]
+    assert len(outputs) == 4
+
+
+def test_prediction_errors_reach_every_caller():
+    async def boom(batch):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(boom, max_batch_size=8, window_ms=5)
+
+    async def run():
+        x = np.zeros((1, 1), dtype=np.float32)
+        return await asyncio.gather(batcher.predict(x), batcher.predict(x), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_batcher_metrics_are_exported():
+    text = REGISTRY.render()
+    assert "scene_sorter_batcher_queue_depth" in text
+    assert "scene_sorter_batcher_batch_size_bucket" in text
+    assert "scene_sorter_batcher_wait_seconds_count" in text
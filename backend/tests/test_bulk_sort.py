@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app import cli
+from app.services import bulk_sort
+from app.services.bulk_sort import CHECKPOINT_NAME, SORT_MANIFEST_NAME, iter_images, sort_directory
+
+
+class _RedIsForestModel:
+    def predict(self, batch):
+        probs = np.zeros((batch.shape[0], 6), dtype=np.float32)
+        red = batch[..., 0].mean(axis=(1, 2)) > 0
+        probs[red, 1] = 1.0   # forest
+        probs[~red, 4] = 1.0  # sea
+        return probs
+
+
+def _tree(root):
+    """
+    root/2021/a.jpg (red), root/2021/trip/b.png (blue), root/2022/c.jpg (red),
+    root/2022/broken.jpg, root/notes.txt
+    """
+    for rel, color in (("2021/a.jpg", (220, 10, 10)), ("2021/trip/b.png", (10, 10, 220)), ("2022/c.jpg", (200, 0, 0))):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (40, 30), color).save(path)
+    (root / "2022" / "broken.jpg").write_bytes(b"not an image")
+    (root / "notes.txt").write_text("skip me")
+
+
+@pytest.fixture(autouse=True)
+def fake_model(use_model):
+    use_model(_RedIsForestModel())
+
+
+def test_walk_is_lazy_sorted_and_resumable(tmp_path):
+    _tree(tmp_path)
+
+    walked = [p.relative_to(tmp_path).as_posix() for p in iter_images(tmp_path)]
+    assert walked == ["2021/a.jpg", "2021/trip/b.png", "2022/broken.jpg", "2022/c.jpg"]
+
+    after = [p.relative_to(tmp_path).as_posix() for p in iter_images(tmp_path, after=("2021", "trip", "b.png"))]
+    assert after == ["2022/broken.jpg", "2022/c.jpg"]
+
+
+def test_sort_files_into_class_folders_and_records_failures(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _tree(src)
+
+    stats = sort_directory(src, dst, batch_size=2)
+
+    assert (stats.sorted, stats.failed) == (3, 1)
+    assert sorted(p.relative_to(dst).as_posix() for p in dst.rglob("*.*") if p.parent != dst) == [
+        "forest/a.jpg", "forest/c.jpg", "sea/b.png",
+    ]
+    assert (dst / "forest" / "a.jpg").stat().st_ino == (src / "2021" / "a.jpg").stat().st_ino
+
+    entries = [json.loads(line) for line in (dst / SORT_MANIFEST_NAME).read_text().splitlines()]
+    assert [e["source"] for e in entries] == ["2021/a.jpg", "2021/trip/b.png", "2022/broken.jpg", "2022/c.jpg"]
+    assert "error" in entries[2] and entries[3]["label"] == "forest"
+
+
+def test_file_that_cannot_be_placed_is_recorded_not_fatal(tmp_path, monkeypatch):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _tree(src)
+    place = bulk_sort._place
+
+    def place_or_fail(source, dest, methods):
+        if source.name == "a.jpg":
+            raise PermissionError(13, "Permission denied", str(dest))
+        place(source, dest, methods)
+
+    monkeypatch.setattr(bulk_sort, "_place", place_or_fail)
+
+    stats = sort_directory(src, dst, batch_size=2)
+
+    assert (stats.sorted, stats.failed) == (2, 2)
+    assert not (dst / "forest" / "a.jpg").exists()
+    entries = [json.loads(line) for line in (dst / SORT_MANIFEST_NAME).read_text().splitlines()]
+    assert entries[0]["error"].startswith("PermissionError") and "label" not in entries[0]
+
+
+def test_interrupted_sort_resumes_after_checkpoint(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _tree(src)
+
+    def stop_after_first_batch(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        sort_directory(src, dst, batch_size=2, on_batch=stop_after_first_batch)
+
+    assert json.loads((dst / CHECKPOINT_NAME).read_text())["last"] == ["2021", "trip", "b.png"]
+
+    stats = sort_directory(src, dst, batch_size=2)
+
+    assert stats.resumed_from == "2021/trip/b.png"
+    assert (stats.sorted, stats.failed) == (1, 1)
+    sources = [json.loads(line)["source"] for line in (dst / SORT_MANIFEST_NAME).read_text().splitlines()]
+    assert len(sources) == len(set(sources)) == 4
+
+
+def test_cli_sort_reports_throughput(tmp_path, capsys):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    _tree(src)
+
+    assert cli.main(["sort", str(src), str(dst), "--strategy", "copy"]) == 0
+
+    out = capsys.readouterr().out
+    assert "Sorted 3 images (1 failed)" in out and "images/s" in out
+    assert (dst / "sea" / "b.png").stat().st_ino != (src / "2021" / "trip" / "b.png").stat().st_ino
@@ -0,0 +1,13 @@
+from app.utils.file_naming import ensure_unique_filename, make_safe_filename
+
+
+def test_extension_is_corrected_from_sniffed_format():
+    assert make_safe_filename("holiday.jpg", image_format="png") == "holiday.png"
+    assert make_safe_filename("scan.webp", image_format="jpeg") == "scan.jpg"
+    assert make_safe_filename("IMG_01.JPEG", image_format="jpeg") == "IMG_01.jpeg"
+
+
+def test_unique_names_use_corrected_extension():
+    existing: set[str] = set()
+    assert ensure_unique_filename("a.png", existing, "png") == "a.png"
+    assert ensure_unique_filename("a.jpg", existing, "png") == "a_1.png"
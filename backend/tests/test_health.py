@@ -10,3 +10,10 @@ def test_health_ok():
     assert res.status_code == 200
     data = res.json()
     assert data["status"] == "ok"
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert "# TYPE scene_sorter_batcher_batch_size histogram" in res.text
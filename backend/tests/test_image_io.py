@@ -0,0 +1,46 @@
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from app.utils import image_io
+from app.utils.image_io import ingest_upload, sniff_image_format
+
+
+def _encoded(fmt: str) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (32, 32), (10, 20, 30)).save(buf, fmt)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("fmt, expected", [("JPEG", "jpeg"), ("PNG", "png"), ("WEBP", "webp")])
+def test_sniff_image_format(fmt, expected):
+    assert sniff_image_format(_encoded(fmt)[:12]) == expected
+
+
+def test_sniff_rejects_unknown_bytes():
+    assert sniff_image_format(b"GIF89a......") is None
+
+
+def test_ingest_writes_original_bytes_verbatim(tmp_path):
+    data = _encoded("PNG")
+    dest = tmp_path / "photo.png"
+
+    up = ingest_upload(BytesIO(data), "photo.png", dest)
+
+    assert dest.read_bytes() == data
+    assert up.size == len(data)
+    assert up.image_format == "png"
+
+
+def test_ingest_enforces_size_limit_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_io, "INGEST_CHUNK_SIZE", 64)
+    monkeypatch.setattr(image_io, "_max_upload_bytes", lambda: 100)
+    dest = tmp_path / "big.jpg"
+
+    with pytest.raises(HTTPException) as exc:
+        ingest_upload(BytesIO(_encoded("JPEG") + b"\0" * 1000), "big.jpg", dest)
+
+    assert exc.value.status_code == 400
+    assert not dest.exists()
@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.services.inference_pool import InferenceProcessPool
+
+
+class _ChannelMeanModel:
+    """
+    Output depends on the input rows, plus the worker's pid in the last column.
+    """
+
+    def predict(self, batch):
+        means = batch.mean(axis=(1, 2))
+        pid = np.full((batch.shape[0], 1), os.getpid(), dtype=np.float32)
+        return np.concatenate([means, pid], axis=1)
+
+
+class _FailingModel:
+    def predict(self, batch):
+        raise ValueError("bad input")
+
+
+def _load_channel_mean(num_threads):
+    return _ChannelMeanModel()
+
+
+def _load_failing(num_threads):
+    return _FailingModel()
+
+
+def _load_missing(num_threads):
+    raise FileNotFoundError("no model")
+
+
+def _load_unless_broken(num_threads):
+    if os.environ.get("POOL_TEST_BROKEN_MODEL"):
+        raise FileNotFoundError("model went away")
+    return _ChannelMeanModel()
+
+
+@pytest.fixture
+def batch():
+    rng = np.random.default_rng(0)
+    return rng.uniform(-1.0, 1.0, size=(10, 8, 8, 3)).astype(np.float32)
+
+
+def test_pool_splits_batch_across_workers_in_order(batch):
+    pool = InferenceProcessPool(workers=2, slot_rows=4, image_size=(8, 8), loader=_load_channel_mean)
+    try:
+        out = pool.predict(batch)
+    finally:
+        pool.close()
+
+    np.testing.assert_allclose(out[:, :3], batch.mean(axis=(1, 2)), rtol=1e-5)
+    # 10 rows over 2 workers with 4-row slots -> 3 chunks, both processes used
+    assert len(set(out[:, 3].tolist()) - {float(os.getpid())}) == 2
+
+
+def test_pool_slots_follow_width_height_image_size():
+    # IMAGE_SIZE is (width, height): a 12x8 image is an (8, 12, 3) row
+    wide = np.random.default_rng(1).uniform(-1.0, 1.0, size=(5, 8, 12, 3)).astype(np.float32)
+    pool = InferenceProcessPool(workers=1, slot_rows=4, image_size=(12, 8), loader=_load_channel_mean)
+    try:
+        out = pool.predict(wide)
+    finally:
+        pool.close()
+
+    np.testing.assert_allclose(out[:, :3], wide.mean(axis=(1, 2)), rtol=1e-5)
+
+
+def test_pool_reports_worker_errors_and_keeps_serving(batch):
+    pool = InferenceProcessPool(workers=1, slot_rows=16, image_size=(8, 8), loader=_load_failing)
+    try:
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="bad input"):
+                pool.predict(batch)
+    finally:
+        pool.close()
+
+
+def test_pool_fails_fast_when_model_cannot_load():
+    with pytest.raises(RuntimeError, match="no model"):
+        InferenceProcessPool(workers=1, slot_rows=1, image_size=(8, 8), loader=_load_missing)
+
+
+def test_pool_keeps_its_workers_when_a_restart_fails(batch, monkeypatch):
+    pool = InferenceProcessPool(workers=2, slot_rows=4, image_size=(8, 8), loader=_load_unless_broken)
+    try:
+        # Replacements now fail to load; then one worker dies while idle
+        monkeypatch.setenv("POOL_TEST_BROKEN_MODEL", "1")
+        pool._all[0].process.kill()
+        pool._all[0].process.join()
+
+        with pytest.raises(RuntimeError, match="model went away"):
+            pool.predict(batch)
+        assert pool._free.qsize() == 2
+
+        monkeypatch.delenv("POOL_TEST_BROKEN_MODEL")
+        out = pool.predict(batch)
+    finally:
+        pool.close()
+
+    np.testing.assert_allclose(out[:, :3], batch.mean(axis=(1, 2)), rtol=1e-5)
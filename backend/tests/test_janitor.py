@@ -0,0 +1,116 @@
+import io
+import os
+import time
+import zipfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes.download import _hold_while_streaming
+from app.services.janitor import EVICTIONS, TempJanitor, get_janitor, workspace_size
+from app.services.zipper import iter_zip, job_zip_entries
+
+MB = 1024 * 1024
+
+
+def _workspace(root: Path, job_id: str, mb: int) -> None:
+    raw = root / job_id / "raw"
+    raw.mkdir(parents=True)
+    (raw / "a.jpg").write_bytes(os.urandom(mb * MB))
+    organized = root / job_id / "organized" / "sea"
+    organized.mkdir(parents=True)
+    os.link(raw / "a.jpg", organized / "a.jpg")
+
+
+def _janitor(root: Path, active=(), **kwargs) -> TempJanitor:
+    options = dict(ttl_s=1000, download_ttl_s=100, quota_bytes=0, interval_s=60, orphan_grace_s=50)
+    options.update(kwargs)
+    return TempJanitor(root, is_active=lambda job_id: job_id in active, **options)
+
+
+def test_ttl_download_ttl_and_lru_quota(tmp_path):
+    for job_id, mb in (("old", 1), ("downloaded", 1), ("a", 2), ("b", 2), ("running", 2)):
+        _workspace(tmp_path, job_id, mb)
+    (tmp_path / "jobs.sqlite3").write_bytes(b"x" * MB)
+
+    janitor = _janitor(tmp_path, active={"running"}, quota_bytes=3 * MB)
+    for job_id in ("old", "downloaded", "a", "b", "running"):
+        janitor.record(job_id)
+
+    # Hardlinked organized/ copies are counted once
+    assert workspace_size(tmp_path / "a") < 3 * MB
+    assert 8 * MB <= janitor.total_bytes() < 9 * MB
+
+    now = time.time()
+    janitor._entries["old"].created_at = now - 2000
+    janitor.note_download("downloaded")
+    janitor._entries["downloaded"].downloaded_at = now - 200
+    janitor.note_download("b")  # b used more recently than a
+
+    evicted = janitor.sweep(now)
+
+    # TTLs first, then least recently used down to the quota; active jobs are kept
+    assert evicted == [("old", "ttl"), ("downloaded", "downloaded"), ("a", "quota"), ("b", "quota")]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["jobs.sqlite3", "running"]
+    assert [e.job_id for e in janitor.entries()] == ["running"]
+
+
+def test_orphans_adopted_after_grace_and_held_workspaces_kept(tmp_path):
+    _workspace(tmp_path, "crashed", 1)
+    _workspace(tmp_path, "in_flight", 1)
+    stale = time.time() - 5000
+    os.utime(tmp_path / "crashed", (stale, stale))
+
+    janitor = _janitor(tmp_path)
+    now = time.time()
+
+    with janitor.hold("crashed"):
+        assert janitor.sweep(now) == []
+    # Adopted with its on-disk age, so it's already past the TTL
+    assert janitor.sweep(now) == [("crashed", "ttl")]
+
+    # Recent and never recorded: maybe a request still writing it
+    assert (tmp_path / "in_flight").exists()
+    assert [e.job_id for e in janitor.entries()] == []
+
+
+def test_batch_workspace_is_indexed_and_expires_after_download(stub_model, jpeg_bytes):
+    client = TestClient(app)
+
+    upload = jpeg_bytes((10, 120, 200), size=(64, 48))
+    job = client.post("/predict/batch", files=[("files", ("x.jpg", upload, "image/jpeg"))]).json()
+
+    janitor = get_janitor()
+    entry = next(e for e in janitor.entries() if e.job_id == job["job_id"])
+    assert entry.size > 0 and entry.downloaded_at is None
+
+    assert client.get(job["download_url"]).status_code == 200
+    assert entry.downloaded_at is not None
+
+    before = EVICTIONS.value(reason="downloaded")
+    assert janitor.sweep(time.time() + janitor.download_ttl_s) == [(job["job_id"], "downloaded")]
+    assert EVICTIONS.value(reason="downloaded") == before + 1
+
+    assert client.get(job["download_url"]).status_code == 404
+    assert "scene_sorter_temp_bytes" in client.get("/metrics").text
+
+
+def test_streamed_download_holds_workspace_until_done(stub_model, jpeg_bytes):
+    client = TestClient(app)
+
+    upload = jpeg_bytes((200, 20, 20), size=(64, 48))
+    job_id = client.post("/predict/batch", files=[("files", ("x.jpg", upload, "image/jpeg"))]).json()["job_id"]
+
+    janitor = get_janitor()
+    expired = time.time() + janitor.ttl_s + 1
+    chunks = _hold_while_streaming(job_id, iter_zip(job_zip_entries(job_id)))
+    first = next(chunks)
+
+    # Past its TTL, but mid-download: kept until the archive is complete
+    assert janitor.sweep(expired) == []
+    archive = first + b"".join(chunks)
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+
+    assert janitor.sweep(expired) == [(job_id, "ttl")]
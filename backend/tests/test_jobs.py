@@ -0,0 +1,142 @@
+import io
+import sqlite3
+import time
+import zipfile
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.janitor import get_janitor
+from app.services.jobs import JobRecord, MemoryJobBackend, SqliteJobBackend
+
+
+def test_async_batch_returns_202_and_completes_in_background(stub_model, png_bytes):
+    files = [("files", (f"img{i}.png", png_bytes((i * 40, 80, 120)), "image/png")) for i in range(3)]
+
+    with TestClient(app) as client:
+        res = client.post("/predict/batch?mode=async", files=files)
+        assert res.status_code == 202
+        job_id = res.json()["job_id"]
+
+        deadline = time.time() + 10
+        while True:
+            status = client.get(f"/jobs/{job_id}").json()
+            if status["state"] in ("succeeded", "failed") or time.time() > deadline:
+                break
+            time.sleep(0.05)
+
+        assert status["state"] == "succeeded", status
+        assert status["stages"]["decode"] == {"state": "done", "done": 3, "total": 3}
+        result = status["result"]
+        labels = [r["label"] for r in result["results"]]
+        assert result["summary"]["total"] == 3 and result["summary"]["unsure"] == 0
+        assert sum(result["summary"]["by_class"].values()) == 3
+
+        zip_res = client.get(f"/download/{job_id}")
+        assert zip_res.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(zip_res.content)) as zf:
+            assert sorted(zf.namelist()) == sorted(f"{label}/img{i}.png" for i, label in enumerate(labels))
+
+        # Evicting the workspace drops the record with it (no dead download_url)
+        assert (job_id, "ttl") in get_janitor().sweep(time.time() + settings.TEMP_TTL_S + 1)
+        assert client.get(f"/jobs/{job_id}").status_code == 404
+
+
+class _SplitModel:
+    def predict(self, batch, verbose=0):
+        probs = np.full((batch.shape[0], 6), 0.025, dtype=np.float32)
+        probs[:, 1], probs[:, 3] = 0.6, 0.3  # forest, then mountain
+        return probs
+
+
+def test_sync_batch_top_k_and_unsure_bucket(use_model, png_bytes):
+    use_model(_SplitModel())
+
+    files = [("files", (f"img{i}.png", png_bytes((i * 40, 10, 200)), "image/png")) for i in range(2)]
+    client = TestClient(app)
+
+    res = client.post("/predict/batch?top_k=2&unsure_threshold=0.7", files=files)
+    assert res.status_code == 200
+    body = res.json()
+
+    assert body["summary"] == {"total": 2, "by_class": {"forest": 2}, "unsure": 2}
+    first = body["results"][0]
+    assert first["unsure"] is True
+    assert [s["label"] for s in first["top_k"]] == ["forest", "mountain"]
+
+    with zipfile.ZipFile(io.BytesIO(client.get(body["download_url"]).content)) as zf:
+        assert sorted(zf.namelist()) == ["unsure/img0.png", "unsure/img1.png"]
+
+    single = client.post("/predict", files=[("file", files[0][1])]).json()
+    assert "top_k" not in single and single["unsure"] is False
+
+
+def test_rejected_async_batch_leaves_no_workspace(stub_model, temp_root, png_bytes):
+    files = [
+        ("files", ("ok.png", png_bytes((10, 20, 30)), "image/png")),
+        ("files", ("fake.png", b"not an image at all", "image/png")),
+    ]
+
+    with TestClient(app) as client:
+        res = client.post("/predict/batch?mode=async", files=files)
+
+    assert res.status_code == 400 and "fake.png" in res.json()["detail"]
+    assert list(temp_root.glob("*/raw")) == []
+
+
+def test_unknown_job_is_404():
+    client = TestClient(app)
+    assert client.get("/jobs/does_not_exist").status_code == 404
+
+
+def test_sqlite_backend_hands_each_job_to_one_replica(tmp_path):
+    db_path = tmp_path / "jobs.sqlite3"
+    replica_a = SqliteJobBackend(db_path)
+    replica_b = SqliteJobBackend(db_path)
+
+    replica_a.enqueue(JobRecord(job_id="job1"))
+
+    claims = [replica_b.claim(), replica_a.claim()]
+
+    assert [c.job_id if c else None for c in claims] == ["job1", None]
+    assert replica_a.get("job1").state == "running"
+
+
+def test_sqlite_lease_requeues_jobs_of_a_dead_replica(tmp_path):
+    db_path = tmp_path / "jobs.sqlite3"
+    replica_a = SqliteJobBackend(db_path, lease_s=60)
+    replica_b = SqliteJobBackend(db_path, lease_s=60)
+
+    replica_a.enqueue(JobRecord(job_id="job1"))
+    assert replica_a.claim().job_id == "job1"
+
+    def age_everything(seconds):
+        with sqlite3.connect(str(db_path)) as db:
+            db.execute("UPDATE jobs SET updated_at = updated_at - ?", (seconds,))
+
+    # Heartbeats keep the lease
+    age_everything(45)
+    replica_a.heartbeat("job1")
+    age_everything(45)
+    assert replica_b.claim() is None
+
+    # Replica a stopped beating: b takes the job over
+    age_everything(61)
+    reclaimed = replica_b.claim()
+    assert reclaimed.job_id == "job1" and reclaimed.state == "running"
+    assert replica_b.claim() is None
+
+
+def test_finished_records_are_purged_after_ttl(tmp_path):
+    for backend in (MemoryJobBackend(), SqliteJobBackend(tmp_path / "jobs.sqlite3")):
+        for job_id, state in (("done", "succeeded"), ("broken", "failed"), ("busy", "queued")):
+            backend.enqueue(JobRecord(job_id=job_id, state=state, updated_at=time.time() - 100))
+
+        assert backend.purge(time.time() - 200) == 0
+        assert backend.purge(time.time() - 50) == 2
+        assert [backend.get(j) is not None for j in ("done", "broken", "busy")] == [False, False, True]
+
+        backend.delete("busy")
+        assert backend.get("busy") is None
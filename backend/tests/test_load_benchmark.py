@@ -0,0 +1,48 @@
+"""
+Smoke run of the API load benchmark (benchmarks/load.py) with the stub
+model: every scenario completes without errors and the JSON report has
+what run-to-run comparisons rely on. Run `python -m benchmarks.load`
+for real numbers.
+"""
+import json
+
+from app.services import model_loader
+from benchmarks import load
+
+
+def test_load_benchmark_reports_every_scenario(tmp_path, monkeypatch, capsys):
+    # run_benchmark configures these for a fresh process; keep them scoped to this test
+    monkeypatch.setenv("SCENE_SORTER_TEMP_ROOT", str(tmp_path / "workspace"))
+    monkeypatch.setenv("SCENE_SORTER_PREDICTION_CACHE_ENTRIES", "0")
+    monkeypatch.setenv("SCENE_SORTER_PREDICTION_CACHE_PERSIST", "false")
+    monkeypatch.setattr(model_loader, "_MODEL", None)
+
+    out = tmp_path / "run.json"
+    report = load.main([
+        "--transport", "asgi", "http",
+        "--concurrency", "1", "3",
+        "--requests", "4",
+        "--warmup", "1",
+        "--batch-size", "3",
+        "--images", "4",
+        "--corpus-dir", str(tmp_path / "corpus"),
+        "--stub-ms", "0",
+        "--json", str(out),
+        "--quiet",
+    ])
+
+    rows = report["results"]
+    assert len(rows) == 2 * 2 * 2  # endpoints x transports x concurrency
+    assert all(r["errors"] == 0 and r["requests"] == 4 for r in rows)
+    assert all(r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"] for r in rows)
+    assert all(r["images_per_s"] > 0 and r["peak_rss_mb"] > 0 for r in rows)
+    assert {r["images_per_request"] for r in rows if r["endpoint"] == "batch"} == {3}
+
+    saved = json.loads(out.read_text())
+    assert saved["meta"]["model"] == "stub" and saved["results"] == rows
+
+    # Comparing a run with itself: every scenario matched, no change
+    deltas = load.compare(saved, saved)
+    assert len(deltas) == len(rows)
+    assert all(d["images_per_s_change"] == 0 for d in deltas)
+    assert "img/s" in capsys.readouterr().out
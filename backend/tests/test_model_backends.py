@@ -0,0 +1,121 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.cli import main
+from app.services.model_backends import StubBackend, load_backend
+from app.services.model_loader import get_model_identity
+
+
+@pytest.fixture(scope="module")
+def keras_model_path(tmp_path_factory):
+    keras = pytest.importorskip("keras")
+
+    inputs = keras.Input((224, 224, 3))
+    x = keras.layers.Conv2D(4, 3, strides=8)(inputs)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    outputs = keras.layers.Dense(6, activation="softmax")(x)
+
+    path = tmp_path_factory.mktemp("model") / "best_finetuned_model.keras"
+    keras.Model(inputs, outputs).save(path)
+    return path
+
+
+def test_convert_to_tflite_agrees_with_keras(keras_model_path, capsys):
+    assert main(["convert", "--model", str(keras_model_path), "--to", "tflite", "--count", "8"]) == 0
+    assert "top-1 agreement 100.00%" in capsys.readouterr().out
+
+    tflite_path = keras_model_path.with_suffix(".tflite")
+    batch = np.random.default_rng(0).uniform(-1, 1, size=(3, 224, 224, 3)).astype(np.float32)
+
+    keras_probs = load_backend("keras", keras_model_path).predict(batch)
+    tflite = load_backend("tflite", tflite_path)
+
+    # Different batch sizes resize the interpreter in place
+    np.testing.assert_allclose(tflite.predict(batch), keras_probs, atol=1e-5)
+    np.testing.assert_allclose(tflite.predict(batch[:1]), keras_probs[:1], atol=1e-5)
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        load_backend("pytorch", tmp_path / "model.pt")
+    assert exc.value.status_code == 500
+
+
+def test_quantize_builds_variants_and_writes_report(keras_model_path, tmp_path, capsys):
+    code = main([
+        "quantize", "--model", str(keras_model_path), "--out-dir", str(tmp_path),
+        "--variants", "fp16", "int8", "--calibration-count", "4", "--count", "8",
+        "--max-accuracy-drop", "1.0",
+    ])
+
+    assert code == 0
+    report = json.loads((tmp_path / "quantization_report.json").read_text())
+    assert [r["variant"] for r in report] == ["fp16", "int8"]
+    assert (tmp_path / "best_finetuned_model_int8.tflite").exists()
+    assert "[int8]" in capsys.readouterr().out
+
+
+def test_stub_backend_is_deterministic_per_image():
+    batch = np.random.default_rng(1).uniform(-1, 1, size=(4, 224, 224, 3)).astype(np.float32)
+
+    onehot = StubBackend(Path("stub")).predict(batch)
+    assert onehot.shape == (4, 6) and set(np.unique(onehot)) == {0.0, 1.0}
+    # Same image -> same label, whatever batch it's in
+    np.testing.assert_array_equal(StubBackend(Path("stub")).predict(batch[::-1]), onehot[::-1])
+
+    softmax = StubBackend(Path("stub"), distribution="softmax").predict(batch)
+    np.testing.assert_allclose(softmax.sum(axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_array_equal(softmax.argmax(axis=1), onehot.argmax(axis=1))
+
+    with pytest.raises(ValueError):
+        StubBackend(Path("stub"), distribution="gaussian")
+
+
+def test_stub_identity_follows_the_serving_model(use_model):
+    use_model(distribution="softmax")
+    softmax = get_model_identity()
+    use_model(distribution="softmax", num_classes=4)
+    fewer_classes = get_model_identity()
+    use_model(distribution="uniform", num_classes=4)
+
+    assert softmax.startswith("stub-softmax-6:")
+    assert fewer_classes.startswith("stub-softmax-4:")
+    assert get_model_identity().startswith("stub-uniform-4:")
+
+
+def test_stub_backend_selected_by_env_var(tmp_path):
+    """
+    A fresh process with SCENE_SORTER_MODEL_BACKEND=stub starts up and
+    serves a batch without any model file, and never imports TensorFlow -
+    even with a quantized MODEL_VARIANT left in the environment.
+    """
+    script = (
+        "import io, sys\n"
+        "from PIL import Image\n"
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "buf = io.BytesIO(); Image.new('RGB', (64, 64), (1, 2, 3)).save(buf, 'PNG')\n"
+        "with TestClient(app) as client:\n"
+        "    res = client.post('/predict/batch', files=[('files', ('a.png', buf.getvalue(), 'image/png'))])\n"
+        "print(res.status_code, res.json()['summary']['total'], 'tensorflow' in sys.modules)\n"
+    )
+    env = dict(
+        os.environ,
+        SCENE_SORTER_MODEL_BACKEND="stub",
+        SCENE_SORTER_MODEL_PATH=str(tmp_path / "missing.keras"),
+        SCENE_SORTER_TEMP_ROOT=str(tmp_path / "tmp"),
+        SCENE_SORTER_STUB_LATENCY_MS="1",
+        SCENE_SORTER_MODEL_VARIANT="int8",
+    )
+    backend_dir = Path(__file__).resolve().parents[1]
+    proc = subprocess.run([sys.executable, "-c", script], cwd=backend_dir, env=env, capture_output=True, text=True, timeout=120)
+
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.split()[-3:] == ["200", "1", "False"]
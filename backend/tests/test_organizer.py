@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+from zipfile import ZipFile
+
+from app.services.organizer import organize_images
+from app.services.zipper import zip_folder, zip_predictions
+from app.utils.temp_storage import create_job_dirs
+
+
+def _job(job_id="job1"):
+    dirs = create_job_dirs(job_id)
+    preds = []
+    for name, label in (("a.jpg", "mountain"), ("b.png", "sea")):
+        (dirs["raw"] / name).write_bytes(name.encode() * 100)
+        preds.append(SimpleNamespace(filename=name, label=label))
+    return dirs, preds
+
+
+def test_auto_strategy_hardlinks_instead_of_copying(temp_root):
+    dirs, preds = _job()
+
+    organize_images(preds, dirs["raw"], dirs["organized"], strategy="auto")
+
+    src = dirs["raw"] / "a.jpg"
+    dest = dirs["organized"] / "mountain" / "a.jpg"
+    assert dest.read_bytes() == src.read_bytes()
+    assert dest.stat().st_ino == src.stat().st_ino
+
+
+def test_copy_strategy_makes_independent_files(temp_root):
+    dirs, preds = _job()
+
+    organize_images(preds, dirs["raw"], dirs["organized"], strategy="copy")
+
+    src = dirs["raw"] / "b.png"
+    dest = dirs["organized"] / "sea" / "b.png"
+    assert dest.read_bytes() == src.read_bytes()
+    assert dest.stat().st_ino != src.stat().st_ino
+
+
+def test_zip_from_raw_matches_organized_zip(temp_root):
+    dirs, preds = _job()
+
+    organize_images(preds, dirs["raw"], dirs["organized"])
+    with ZipFile(zip_folder(dirs["organized"], "job1")) as zf:
+        from_organized = sorted(zf.namelist())
+
+    with ZipFile(zip_predictions(dirs["raw"], preds, "job1")) as zf:
+        from_raw = sorted(zf.namelist())
+
+    assert from_raw == from_organized == ["mountain/a.jpg", "sea/b.png"]
+
+
+def test_unsure_predictions_go_to_unsure_folder(temp_root):
+    dirs, preds = _job()
+    preds[1].unsure = True
+
+    organize_images(preds, dirs["raw"], dirs["organized"])
+    with ZipFile(zip_predictions(dirs["raw"], preds, "job1")) as zf:
+        from_raw = sorted(zf.namelist())
+
+    assert (dirs["organized"] / "unsure" / "b.png").exists()
+    assert not (dirs["organized"] / "sea").exists()
+    assert from_raw == ["mountain/a.jpg", "unsure/b.png"]
@@ -0,0 +1,156 @@
+import asyncio
+import io
+import time
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from app.main import app
+from app.services import inference
+from app.services.inference import run_batch_inference
+from app.services.prediction_cache import CACHE_HITS
+from app.utils.preprocessing import BatchBufferPool
+from app.utils.timing import STAGE_SECONDS, StageTimings
+
+
+class _SlowModel:
+    """
+    Sleeps like a model busy on other cores; label = brightest channel.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, batch, verbose=0):
+        self.calls.append(batch.shape[0])
+        time.sleep(0.03)
+        probs = np.zeros((batch.shape[0], 6), dtype=np.float32)
+        probs[np.arange(batch.shape[0]), batch.mean(axis=(1, 2)).argmax(axis=1)] = 1.0
+        return probs
+
+
+class _CountingPool(BatchBufferPool):
+    def __init__(self):
+        super().__init__(per_size=8)
+        self.acquired = self.released = 0
+
+    def acquire(self, n):
+        self.acquired += 1
+        return super().acquire(n)
+
+    def release(self, buf):
+        self.released += 1
+        super().release(buf)
+
+    def idle(self):
+        return sum(len(bufs) for bufs in self._idle.values())
+
+
+def _uploads(n):
+    files = []
+    for i in range(n):
+        color = [(200, 10, 10), (10, 200, 10), (10, 10, 200)][i % 3]
+        buf = io.BytesIO()
+        Image.new("RGB", (640, 480), color).save(buf, "JPEG")
+        buf.seek(0)
+        files.append(UploadFile(file=buf, filename=f"img{i}.jpg"))
+    return files
+
+
+def test_sub_batches_overlap_decode_and_predict(use_model, tmp_path):
+    model = use_model(_SlowModel())
+
+    timings = StageTimings()
+    organized = []
+
+    async def on_predicted(sub):
+        # Each sub-batch is already saved to raw/ when it's handed over
+        assert all((tmp_path / "raw" / name).exists() for name in sub.filenames)
+        organized.append(list(sub.filenames))
+
+    predictions = asyncio.run(run_batch_inference(
+        _uploads(12), tmp_path / "raw", on_predicted=on_predicted, timings=timings, sub_batch_size=4,
+    ))
+
+    assert model.calls == [4, 4, 4]
+    assert predictions.labels == ["buildings", "forest", "glacier"] * 4
+    assert sorted(name for sub in organized for name in sub) == sorted(predictions.filenames)
+
+    # The model started on the first sub-batch before the last one was decoded
+    first_predict_start = timings.spans("predict")[0][0]
+    last_decode_end = max(end for _, end in timings.spans("decode"))
+    assert first_predict_start < last_decode_end
+    assert {"ingest", "decode", "predict", "persist"} <= set(timings.as_ms())
+
+
+def test_decode_failure_releases_pipeline(use_model, tmp_path, monkeypatch):
+    use_model(_SlowModel())
+    pool = _CountingPool()
+    monkeypatch.setattr(inference, "BATCH_BUFFERS", pool)
+
+    files = _uploads(6)
+    # Right magic bytes, truncated body: passes the sniff, fails the decode
+    files[4] = UploadFile(file=io.BytesIO(b"\xff\xd8\xff\xe0" + b"\x00" * 64), filename="broken.jpg")
+
+    async def run():
+        with pytest.raises(HTTPException) as exc:
+            await run_batch_inference(files, tmp_path / "raw", sub_batch_size=2)
+        # Producer, consumer and follow-ups are all finished, not left
+        # running (the shared micro-batcher's loop outlives requests)
+        leftovers = [t for t in asyncio.all_tasks() if "_run_pipeline" in t.get_coro().__qualname__]
+        return exc.value, leftovers
+
+    error, leftovers = asyncio.run(run())
+
+    assert error.status_code == 400
+    assert leftovers == []
+    # Every pooled buffer (including the failed sub-batch's) went back
+    assert pool.acquired == 3
+    assert pool.released == pool.acquired == pool.idle()
+
+
+def test_batch_endpoint_reports_timings_on_request(use_model):
+    use_model(_SlowModel())
+    client = TestClient(app)
+
+    files = [("files", (up.filename, up.file.getvalue(), "image/jpeg")) for up in _uploads(3)]
+
+    timed = client.post("/predict/batch?timings=true", files=files).json()
+    assert {"decode", "predict", "manifest", "zip", "total"} <= set(timed["timings"])
+    assert timed["summary"]["total"] == 3
+
+    # Second pass is all cache hits: no decode / predict stage at all
+    hits_before = CACHE_HITS.value()
+    res = client.post("/predict/batch", files=files)
+    assert "timings" not in res.json()
+    assert CACHE_HITS.value() == hits_before + 3
+    stages = {part.strip().split(";")[0] for part in res.headers["server-timing"].split(",")}
+    assert not {"decode", "predict"} & stages
+
+
+def test_server_timing_header_and_stage_histograms(use_model, png_bytes):
+    use_model(_SlowModel())
+    client = TestClient(app)
+
+    before = {stage: STAGE_SECONDS.snapshot(stage=stage)["count"] for stage in ("decode", "predict", "zip")}
+
+    files = [("files", (f"t{i}.png", png_bytes((i, 40, 200)), "image/png")) for i in range(2)]
+    res = client.post("/predict/batch", files=files)
+
+    header = res.headers["server-timing"]
+    stages = dict(part.strip().split(";dur=") for part in header.split(","))
+    assert {"validate", "ingest", "decode", "preprocess", "predict", "zip", "total"} <= set(stages)
+    assert all(float(ms) >= 0 for ms in stages.values())
+
+    # One observation per stage per request
+    for stage, count in before.items():
+        assert STAGE_SECONDS.snapshot(stage=stage)["count"] == count + 1
+
+    assert "server-timing" not in client.get("/health").headers
+    metrics = client.get("/metrics").text
+    assert 'scene_sorter_stage_seconds_count{stage="predict"}' in metrics
+    assert "scene_sorter_ingested_bytes_total" in metrics
@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.services.prediction_cache import CACHE_HITS, PredictionCache, content_digest
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put("m1", "a", np.array([1.0, 0.0]))
+    cache.put("m1", "b", np.array([0.0, 1.0]))
+
+    assert cache.get("m1", "a") is not None  # touch "a"
+    cache.put("m1", "c", np.array([0.5, 0.5]))
+
+    assert cache.get("m1", "b") is None
+    assert cache.get("m1", "a") is not None
+    assert len(cache) == 2
+
+
+def test_model_swap_invalidates_entries(tmp_path):
+    cache = PredictionCache(max_entries=10, db_path=tmp_path / "cache.sqlite3")
+    digest = content_digest(b"same photo")
+    cache.put("model-v1", digest, np.array([0.9, 0.1]))
+
+    assert cache.get("model-v2", digest) is None
+    assert cache.get("model-v1", digest) is None  # dropped, not just shadowed
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    db_path = tmp_path / "cache.sqlite3"
+    PredictionCache(max_entries=10, db_path=db_path).put("m1", "abc", np.array([0.25, 0.75]))
+
+    hits_before = CACHE_HITS.value()
+    probs = PredictionCache(max_entries=10, db_path=db_path).get("m1", "abc")
+
+    assert np.allclose(probs, [0.25, 0.75])
+    assert CACHE_HITS.value() == hits_before + 1
+
+
+def test_put_many_stores_a_sub_batch_in_one_commit(tmp_path):
+    db_path = tmp_path / "cache.sqlite3"
+    cache = PredictionCache(max_entries=10, db_path=db_path)
+    cache.get("m1", "warm")  # first use of the identity commits its own cleanup
+    commits = []
+    cache._db.set_trace_callback(lambda sql: commits.append(sql) if sql.startswith("COMMIT") else None)
+
+    cache.put_many("m1", [(f"d{i}", np.array([i / 4, 1 - i / 4])) for i in range(4)])
+
+    assert len(commits) == 1
+    reopened = PredictionCache(max_entries=10, db_path=db_path)
+    assert np.allclose(reopened.get("m1", "d3"), [0.75, 0.25])
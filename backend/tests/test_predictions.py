@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.utils.predictions import PredictionBatch, prediction_rows
+
+CLASSES = ["buildings", "forest", "glacier", "mountain", "sea", "street"]
+
+
+def _batch() -> PredictionBatch:
+    probs = np.full((3, 6), 0.02, dtype=np.float32)
+    probs[0, 3], probs[1, 1], probs[2, 3] = 0.9, 0.8, 0.7
+    return PredictionBatch(["a.jpg", "b.jpg", "c.jpg"], CLASSES, probs)
+
+
+def test_batch_computes_top1_and_counts_once():
+    batch = _batch()
+
+    assert batch.labels == ["mountain", "forest", "mountain"]
+    np.testing.assert_allclose(batch.confidence, [0.9, 0.8, 0.7])
+    assert batch.counts_by_class() == {"forest": 1, "mountain": 2}
+    assert list(batch.rows())[1] == ("b.jpg", "forest", pytest.approx(0.8), False)
+
+
+def test_batch_items_and_plain_objects_read_the_same():
+    batch = _batch()
+    as_objects = [SimpleNamespace(filename=p.filename, label=p.label, confidence=p.confidence) for p in batch]
+
+    assert batch[2].label == "mountain"
+    assert len(batch[2].probabilities) == 6
+    assert list(prediction_rows(as_objects)) == list(prediction_rows(batch))
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(0)
+    probs = rng.dirichlet(np.ones(6), size=20).astype(np.float32)
+    batch = PredictionBatch([f"{i}.jpg" for i in range(20)], CLASSES, probs)
+
+    idx, top = batch.top_k(3)
+
+    np.testing.assert_array_equal(idx, np.argsort(-probs, axis=1)[:, :3])
+    np.testing.assert_allclose(top, -np.sort(-probs, axis=1)[:, :3])
+    assert batch.top_k(10)[0].shape == (20, 6)
+    assert batch.top_k_labels(2)[0][0] == (batch.labels[0], pytest.approx(float(batch.confidence[0])))
+
+
+def test_unsure_threshold_flags_low_confidence():
+    probs = np.full((3, 6), 0.02, dtype=np.float32)
+    probs[0, 3], probs[1, 1], probs[2, 3] = 0.9, 0.8, 0.7
+    batch = PredictionBatch(["a.jpg", "b.jpg", "c.jpg"], CLASSES, probs, unsure_threshold=0.75)
+
+    assert batch.unsure.tolist() == [False, False, True]
+    assert batch[2].unsure and batch[2].label == "mountain"
+    assert not _batch().unsure.any()
+
+
+def test_batch_rejects_mismatched_shapes():
+    with pytest.raises(ValueError):
+        PredictionBatch(["a.jpg"], CLASSES, np.zeros((1, 5), dtype=np.float32))
@@ -0,0 +1,68 @@
+import subprocess
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.utils.preprocessing import BatchBufferPool, load_batch, pixels_to_model_input
+
+
+def _jpeg_bytes(size=(1600, 1200)) -> bytes:
+    x = np.linspace(0, 255, size[0], dtype=np.uint8)[None, :, None]
+    arr = np.broadcast_to(x, (size[1], size[0], 3)).copy()
+    buf = BytesIO()
+    Image.fromarray(arr).save(buf, "JPEG", quality=95)
+    return buf.getvalue()
+
+
+def test_draft_decode_matches_full_decode():
+    data = _jpeg_bytes()
+
+    full_pixels = np.asarray(Image.open(BytesIO(data)).convert("RGB").resize((224, 224)))
+    full = full_pixels / 127.5 - 1.0
+    batch = load_batch([data, data])
+
+    assert batch.shape == (2,) + full.shape
+    assert batch.dtype == np.float32
+    assert np.abs(batch[0] - full).mean() < 0.02
+
+
+def test_load_batch_handles_png_and_grayscale():
+    buf = BytesIO()
+    Image.new("L", (900, 700), 128).save(buf, "PNG")
+
+    batch = load_batch([buf.getvalue()])
+
+    assert batch.shape[-1] == 3
+    assert np.allclose(batch, 128 / 127.5 - 1.0, atol=1e-3)
+
+
+def test_fused_preprocess_matches_keras_mobilenetv2():
+    mobilenet_v2 = pytest.importorskip("keras.applications.mobilenet_v2")
+
+    pixels = np.random.default_rng(0).integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    expected = mobilenet_v2.preprocess_input(pixels.astype(np.float32))
+
+    out = np.empty((8, 8, 3), dtype=np.float32)
+    np.testing.assert_allclose(pixels_to_model_input(pixels, out), expected, atol=1e-6)
+
+
+def test_buffer_pool_reuses_released_buffers():
+    pool = BatchBufferPool(per_size=1)
+
+    first = pool.acquire(4)
+    pool.release(first)
+
+    assert pool.acquire(4) is first
+    assert pool.acquire(4) is not first
+    assert pool.acquire(3).shape[0] == 3
+
+
+def test_importing_the_app_does_not_import_tensorflow():
+    code = "import sys, app.main; sys.exit('tensorflow' in sys.modules or 'keras' in sys.modules)"
+    backend_dir = Path(__file__).resolve().parents[1]
+
+    assert subprocess.run([sys.executable, "-c", code], cwd=backend_dir).returncode == 0
@@ -0,0 +1,151 @@
+import asyncio
+import io
+import time
+import zipfile
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services import upload_sessions
+from app.services.janitor import get_janitor
+from app.services.upload_sessions import expire_idle_sessions
+from app.utils.timing import STAGE_SECONDS
+
+
+def test_session_chunks_finalize_into_one_zip(stub_model, png_bytes):
+    with TestClient(app) as client:
+        opened = client.post("/sessions")
+        assert opened.status_code == 201
+        session = opened.json()
+        assert client.get(session["status_url"]).json()["state"] == "open"
+
+        # Same names in every chunk: unique across the whole session
+        for chunk in range(3):
+            files = [("files", (f"img{i}.png", png_bytes((chunk * 60, i * 90, 10)), "image/png")) for i in range(2)]
+            res = client.post(session["upload_url"], files=files)
+            assert res.status_code == 200
+            assert res.json()["total"] == 2 * (chunk + 1)
+
+        assert client.get(session["download_url"]).status_code == 409
+
+        result = client.post(session["finalize_url"]).json()
+        assert result["summary"]["total"] == 6 and result["summary"]["unsure"] == 0
+        assert sum(result["summary"]["by_class"].values()) == 6
+
+        status = client.get(session["status_url"]).json()
+        assert status["state"] == "succeeded"
+        assert status["stages"]["predict"] == {"state": "done", "done": 6, "total": 6}
+
+        assert sorted(r["filename"] for r in result["results"]) == [
+            "img0.png", "img0_1.png", "img0_2.png", "img1.png", "img1_1.png", "img1_2.png",
+        ]
+        with zipfile.ZipFile(io.BytesIO(client.get(session["download_url"]).content)) as zf:
+            assert sorted(zf.namelist()) == sorted(f"{r['label']}/{r['filename']}" for r in result["results"])
+
+        # Closed: no more files, no second finalize
+        late = [("files", ("late.png", png_bytes((1, 2, 3)), "image/png"))]
+        assert client.post(session["upload_url"], files=late).status_code == 404
+        assert client.post(session["finalize_url"]).status_code == 404
+
+
+def test_aborted_session_deletes_workspace(stub_model, temp_root, png_bytes):
+    with TestClient(app) as client:
+        session = client.post("/sessions").json()
+        files = [("files", ("a.png", png_bytes((5, 5, 5)), "image/png"))]
+        client.post(session["upload_url"], files=files)
+
+        assert client.delete(f"/sessions/{session['job_id']}").status_code == 204
+        assert not (temp_root / session["job_id"]).exists()
+        assert client.get(session["status_url"]).json()["state"] == "failed"
+
+
+def test_session_stage_timings_reported_once_at_finalize(stub_model, png_bytes):
+    stages = ("decode", "predict", "zip")
+    before = {stage: STAGE_SECONDS.snapshot(stage=stage)["count"] for stage in stages}
+
+    with TestClient(app) as client:
+        session = client.post("/sessions").json()
+        for chunk in range(2):
+            files = [("files", (f"c{chunk}.png", png_bytes((chunk * 90, 30, 60)), "image/png"))]
+            client.post(session["upload_url"], files=files)
+        assert client.post(session["finalize_url"]).status_code == 200
+
+    # Both chunks and the zip land in the session's timings, observed once
+    for stage, count in before.items():
+        assert STAGE_SECONDS.snapshot(stage=stage)["count"] == count + 1
+
+
+def test_finalize_without_files_is_rejected(stub_model):
+    with TestClient(app) as client:
+        session = client.post("/sessions").json()
+        assert client.post(session["finalize_url"]).status_code == 400
+
+
+async def _settle(job_id: str) -> None:
+    await asyncio.gather(*upload_sessions._SESSIONS[job_id].chunks)
+
+
+def test_abandoned_session_expires_and_is_evicted(stub_model, temp_root, png_bytes):
+    with TestClient(app) as client:
+        session = client.post("/sessions").json()
+        job_id = session["job_id"]
+        files = [("files", ("a.png", png_bytes((5, 5, 5)), "image/png"))]
+        client.post(session["upload_url"], files=files)
+        client.portal.call(_settle, job_id)
+
+        assert job_id not in client.portal.call(expire_idle_sessions, 60)
+        assert job_id in client.portal.call(expire_idle_sessions, 60, time.time() + 61)
+
+        status = client.get(session["status_url"]).json()
+        assert status["state"] == "failed" and "expired" in status["error"]
+        assert job_id not in upload_sessions._SESSIONS
+        late = client.post(session["upload_url"], files=files)
+        assert late.status_code == 409 and "expired" in late.json()["detail"]
+
+        # No longer pinned as "open": the janitor evicts it like any finished job
+        evicted = get_janitor().sweep(time.time() + settings.TEMP_TTL_S + 1)
+        assert (job_id, "ttl") in evicted
+        assert not (temp_root / job_id).exists()
+
+
+def test_failed_finalize_hands_workspace_to_janitor(stub_model, png_bytes, monkeypatch):
+    async def fail_finish(*args, **kwargs):
+        raise HTTPException(status_code=500, detail="disk full")
+
+    monkeypatch.setattr(upload_sessions, "finish_batch", fail_finish)
+
+    with TestClient(app) as client:
+        session = client.post("/sessions").json()
+        job_id = session["job_id"]
+        files = [("files", ("a.png", png_bytes((5, 5, 5)), "image/png"))]
+        client.post(session["upload_url"], files=files)
+
+        res = client.post(session["finalize_url"])
+        assert res.status_code == 500 and res.json()["detail"] == "disk full"
+        assert client.get(session["status_url"]).json()["state"] == "failed"
+
+        # Indexed right away (not left for orphan adoption), so TTL / quota apply
+        assert job_id in {entry.job_id for entry in get_janitor().entries()}
+
+
+def test_failed_chunk_fails_session_before_finalize(stub_model, png_bytes):
+    with TestClient(app) as client:
+        session = client.post("/sessions").json()
+        # Valid PNG signature, undecodable body: passes validation, fails decode
+        broken = [("files", ("broken.png", b"\x89PNG\r\n\x1a\n" + b"\0" * 64, "image/png"))]
+        assert client.post(session["upload_url"], files=broken).status_code == 200
+
+        for _ in range(200):
+            status = client.get(session["status_url"]).json()
+            if status["state"] != "open":
+                break
+            time.sleep(0.01)
+
+        assert status["state"] == "failed" and "broken.png" in status["error"]
+
+        late = [("files", ("a.png", png_bytes((5, 5, 5)), "image/png"))]
+        res = client.post(session["upload_url"], files=late)
+        assert res.status_code == 409 and "broken.png" in res.json()["detail"]
+        assert client.post(session["finalize_url"]).status_code == 409
@@ -0,0 +1,35 @@
+"""
+Zip build on a realistic batch (phone-ish JPEGs plus a few PNGs): the
+per-entry policy in app.services.zipper produces a valid archive no
+larger than the old deflate-everything zip. Timings are not asserted
+here; run `python -m benchmarks.zipper` for the numbers.
+"""
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.zipper import iter_zip
+from benchmarks.zipper import corpus_entries, legacy_zip
+
+BATCH_SIZE = 12
+
+
+@pytest.fixture(scope="module")
+def batch(tmp_path_factory):
+    return corpus_entries(tmp_path_factory.mktemp("zip_corpus"), BATCH_SIZE)
+
+
+def test_policy_zip_stores_images_and_is_no_larger(batch):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        auto = b"".join(iter_zip(batch, compression="auto", executor=pool))
+    legacy = legacy_zip(batch)
+
+    with zipfile.ZipFile(io.BytesIO(auto)) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == sorted(arc for _, arc in batch)
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist())
+
+    # Deflating JPEG/PNG buys next to nothing
+    assert len(auto) <= len(legacy) * 1.02
@@ -0,0 +1,58 @@
+import io
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.zipper import choose_compression
+from app.utils.temp_storage import create_job_dirs, save_job_manifest
+from app.utils.zip_stream import ZIP_DEFLATED, ZIP_STORED, ZipStreamWriter, prepare_entry
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("method", [ZIP_STORED, ZIP_DEFLATED])
+def test_stream_writer_output_is_a_valid_zip(method):
+    writer = ZipStreamWriter()
+    chunks = []
+    for name, data in (("forest/a.jpg", b"a" * 5000), ("sea/ü.png", b"b" * 10)):
+        chunks.extend(writer.add(prepare_entry(name, data, method=method)))
+    chunks.append(writer.finish())
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.testzip() is None
+        assert zf.read("forest/a.jpg") == b"a" * 5000
+        assert zf.getinfo("sea/ü.png").compress_type == method
+
+
+def test_download_streams_zip_built_from_raw_and_manifest(temp_root):
+    dirs = create_job_dirs("streamjob")
+    (dirs["raw"] / "a.jpg").write_bytes(b"jpeg bytes")
+    save_job_manifest("streamjob", [SimpleNamespace(filename="a.jpg", label="Mountain", confidence=0.9)])
+
+    res = client.get("/download/streamjob?stream=true")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(res.content)) as zf:
+        assert zf.namelist() == ["mountain/a.jpg"]
+        assert zf.read("mountain/a.jpg") == b"jpeg bytes"
+    assert not any(dirs["zips"].iterdir())
+
+
+def test_stream_download_without_results_is_404(temp_root):
+    create_job_dirs("emptyjob")
+
+    assert client.get("/download/emptyjob").status_code == 404
+
+
+def test_auto_policy_stores_images_and_deflates_the_rest():
+    jpeg_head = b"\xff\xd8\xff\xe0" + b"\x00" * 8
+
+    assert choose_compression("forest/a.jpg", b"", "auto") == ZIP_STORED
+    assert choose_compression("forest/noext", jpeg_head, "auto") == ZIP_STORED
+    assert choose_compression("predictions.json", b"{}", "auto") == ZIP_DEFLATED
+    assert choose_compression("forest/a.jpg", b"", "deflate") == ZIP_DEFLATED
+    assert choose_compression("predictions.json", b"{}", "store") == ZIP_STORED